@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+🧪 KIS API 로컬 대체 서버 (기록 재생)
+- stock_alert.py를 KIS_RECORD_DIR 지정 상태로 실행해 저장한 rest_*.jsonl / ws_*.jsonl 을 재생
+- REST: /oauth2/tokenP, /oauth2/Approval 더미 발급 + 기록된 GET 응답을 기록 지연시간 그대로 반환
+- WebSocket: 구독(H0STCNT0) 응답 + 구독 종목 체결 프레임을 기록 간격대로 송신
+실행: python kis_replay_server.py --record-dir ./kis_record --port 18443 --ws-port 21000
+봇:   KIS_BASE_URL=http://127.0.0.1:18443 WS_URL=ws://127.0.0.1:21000 python stock_alert.py
+"""
+
+import argparse
+import base64
+import glob
+import hashlib
+import json
+import os
+import socket
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qsl
+
+_WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC11B3B"
+
+# ============================================================
+# 📂 기록 로드
+# ============================================================
+def _load_jsonl(paths: list) -> list:
+    rows = []
+    for path in sorted(paths):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    rows.append(json.loads(line))
+                except ValueError:
+                    continue
+    rows.sort(key=lambda r: float(r.get("ts", 0) or 0))
+    return rows
+
+def _params_key(params: dict) -> tuple:
+    return tuple(sorted((str(k), str(v)) for k, v in (params or {}).items()))
+
+def _code_params_key(params: dict) -> tuple:
+    """종목 식별 파라미터(FID_INPUT_ISCD / FID_INPUT_ISCD_n / PDNO 등)만 추린 키."""
+    return tuple(sorted((str(k), str(v)) for k, v in (params or {}).items()
+                        if "ISCD" in str(k).upper() or str(k).upper() == "PDNO"))
+
+class ReplayStore:
+    """(tr_id, path, params) → 응답 목록. 같은 키가 여러 번 기록되면 순서대로 돌려주고 마지막 응답에서 멈춘다.
+    정확히 일치하는 기록이 없으면 같은 종목 파라미터(_code_params_key) 기록으로만 대체 — 다른 종목 응답은 반환하지 않음."""
+    def __init__(self, record_dir: str, day: str = ""):
+        pattern = f"_{day}.jsonl" if day else "_*.jsonl"
+        self.rest = _load_jsonl(glob.glob(os.path.join(record_dir, "rest" + pattern)))
+        self.ws = _load_jsonl(glob.glob(os.path.join(record_dir, "ws" + pattern)))
+        self._exact = {}
+        self._by_path = {}
+        for row in self.rest:
+            key = (row.get("tr_id", ""), row.get("path", ""), _params_key(row.get("params")))
+            self._exact.setdefault(key, []).append(row)
+            code_key = (row.get("tr_id", ""), row.get("path", ""), _code_params_key(row.get("params")))
+            self._by_path.setdefault(code_key, []).append(row)
+        self._cursor = {}
+        self._lock = threading.Lock()
+        self.stats = {"hit": 0, "path_fallback": 0, "miss": 0}
+
+    def lookup(self, tr_id: str, path: str, params: dict):
+        key = (tr_id, path, _params_key(params))
+        rows = self._exact.get(key)
+        stat = "hit"
+        if not rows:
+            key = ("path", tr_id, path, _code_params_key(params))
+            rows = self._by_path.get(key[1:])
+            stat = "path_fallback" if rows else "miss"
+        with self._lock:
+            self.stats[stat] += 1
+            if not rows:
+                return None
+            idx = self._cursor.get(key, 0)
+            self._cursor[key] = min(idx + 1, len(rows) - 1)
+        return rows[idx]
+
+# ============================================================
+# 🌐 REST
+# ============================================================
+def _make_http_handler(store: ReplayStore, latency_scale: float):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, fmt, *args):
+            return
+
+        def _send(self, status: int, body: str, content_type: str = "application/json; charset=utf-8"):
+            raw = body.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(raw)))
+            self.end_headers()
+            self.wfile.write(raw)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0) or 0)
+            if length:
+                self.rfile.read(length)
+            path = urlparse(self.path).path
+            if path == "/oauth2/tokenP":
+                return self._send(200, json.dumps({"access_token": "replay-token", "token_type": "Bearer", "expires_in": 86400}))
+            if path == "/oauth2/Approval":
+                return self._send(200, json.dumps({"approval_key": "replay-approval-key"}))
+            return self._send(404, json.dumps({"rt_cd": "1", "msg1": "replay: unsupported POST"}))
+
+        def do_GET(self):
+            parsed = urlparse(self.path)
+            params = dict(parse_qsl(parsed.query, keep_blank_values=True))
+            tr_id = self.headers.get("tr_id", "")
+            row = store.lookup(tr_id, parsed.path, params)
+            if row is None:
+                return self._send(404, json.dumps({"rt_cd": "1", "msg_cd": "REPLAY404", "msg1": f"no recording for {tr_id} {parsed.path}"}))
+            delay = float(row.get("latency_ms", 0) or 0) / 1000.0 * latency_scale
+            if delay > 0:
+                time.sleep(delay)
+            self._send(int(row.get("status") or 200), row.get("body", "") or "",
+                       row.get("content_type") or "application/json; charset=utf-8")
+    return Handler
+
+# ============================================================
+# 🔌 WebSocket (RFC 6455 최소 구현 — 텍스트 프레임만)
+# ============================================================
+def _ws_send_text(conn: socket.socket, text: str) -> None:
+    payload = text.encode("utf-8")
+    n = len(payload)
+    if n < 126:
+        header = struct.pack("!BB", 0x81, n)
+    elif n < 65536:
+        header = struct.pack("!BBH", 0x81, 126, n)
+    else:
+        header = struct.pack("!BBQ", 0x81, 127, n)
+    conn.sendall(header + payload)
+
+def _recv_exact(conn: socket.socket, n: int) -> bytes:
+    buf = b""
+    while len(buf) < n:
+        chunk = conn.recv(n - len(buf))
+        if not chunk:
+            raise ConnectionError("closed")
+        buf += chunk
+    return buf
+
+def _ws_recv_frame(conn: socket.socket):
+    b1, b2 = _recv_exact(conn, 2)
+    opcode = b1 & 0x0F
+    n = b2 & 0x7F
+    if n == 126:
+        n = struct.unpack("!H", _recv_exact(conn, 2))[0]
+    elif n == 127:
+        n = struct.unpack("!Q", _recv_exact(conn, 8))[0]
+    mask = _recv_exact(conn, 4) if b2 & 0x80 else b""
+    data = bytearray(_recv_exact(conn, n))
+    if mask:
+        for i in range(n):
+            data[i] ^= mask[i % 4]
+    return opcode, bytes(data)
+
+def _ws_handshake(conn: socket.socket) -> bool:
+    req = b""
+    while b"\r\n\r\n" not in req:
+        chunk = conn.recv(4096)
+        if not chunk:
+            return False
+        req += chunk
+    key = ""
+    for line in req.decode("latin-1").split("\r\n"):
+        if line.lower().startswith("sec-websocket-key:"):
+            key = line.split(":", 1)[1].strip()
+    if not key:
+        return False
+    accept = base64.b64encode(hashlib.sha1((key + _WS_GUID).encode()).digest()).decode()
+    conn.sendall((
+        "HTTP/1.1 101 Switching Protocols\r\n"
+        "Upgrade: websocket\r\nConnection: Upgrade\r\n"
+        f"Sec-WebSocket-Accept: {accept}\r\n\r\n"
+    ).encode())
+    return True
+
+def _frame_code(raw: str) -> str:
+    # "0|H0STCNT0|001|005930^..." → 첫 레코드 종목코드
+    parts = raw.split("|", 3)
+    return parts[3].split("^", 1)[0] if len(parts) == 4 else ""
+
+def _serve_ws_client(conn: socket.socket, store: ReplayStore, speed: float, loop: bool) -> None:
+    subscribed = set()
+    closed = threading.Event()
+    send_lock = threading.Lock()
+
+    def _reader():
+        try:
+            while not closed.is_set():
+                opcode, data = _ws_recv_frame(conn)
+                if opcode == 0x8:
+                    break
+                if opcode == 0x9:   # ping → pong
+                    with send_lock:
+                        conn.sendall(struct.pack("!BB", 0x8A, len(data)) + data)
+                    continue
+                if opcode != 0x1:
+                    continue
+                try:
+                    msg = json.loads(data.decode("utf-8"))
+                except ValueError:
+                    continue
+                header = msg.get("header", {}) or {}
+                inp = ((msg.get("body", {}) or {}).get("input", {}) or {})
+                tr_key = str(inp.get("tr_key", "") or "")
+                if header.get("tr_type") == "2":
+                    subscribed.discard(tr_key)
+                    text = "UNSUBSCRIBE SUCCESS"
+                else:
+                    subscribed.add(tr_key)
+                    text = "SUBSCRIBE SUCCESS"
+                ack = {"header": {"tr_id": inp.get("tr_id", ""), "tr_key": tr_key, "encrypt": "N"},
+                       "body": {"rt_cd": "0", "msg_cd": "OPSP0000", "msg1": text}}
+                with send_lock:
+                    _ws_send_text(conn, json.dumps(ack))
+        except Exception:
+            pass
+        finally:
+            closed.set()
+
+    threading.Thread(target=_reader, daemon=True).start()
+    frames = [r for r in store.ws if str(r.get("raw", "")).startswith("0|")]
+    while not subscribed and not closed.is_set():   # 첫 구독 전 프레임 유실 방지
+        time.sleep(0.05)
+    try:
+        while not closed.is_set() and frames:
+            prev_ts = None
+            for row in frames:
+                if closed.is_set():
+                    break
+                ts = float(row.get("ts", 0) or 0)
+                if prev_ts is not None and ts > prev_ts:
+                    time.sleep((ts - prev_ts) / max(speed, 1e-6))
+                prev_ts = ts
+                raw = row["raw"]
+                if _frame_code(raw) not in subscribed:
+                    continue
+                with send_lock:
+                    _ws_send_text(conn, raw)
+            if not loop:
+                break
+        closed.wait()
+    except Exception:
+        pass
+    finally:
+        closed.set()
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+def _run_ws_server(host: str, port: int, store: ReplayStore, speed: float, loop: bool) -> None:
+    srv = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    srv.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    srv.bind((host, port))
+    srv.listen(8)
+    while True:
+        conn, _ = srv.accept()
+        if _ws_handshake(conn):
+            threading.Thread(target=_serve_ws_client, args=(conn, store, speed, loop), daemon=True).start()
+        else:
+            conn.close()
+
+# ============================================================
+# 🚀 실행
+# ============================================================
+def main():
+    ap = argparse.ArgumentParser(description="KIS REST/WebSocket 기록 재생 서버")
+    ap.add_argument("--record-dir", default=os.environ.get("KIS_RECORD_DIR", "kis_record"))
+    ap.add_argument("--day", default="", help="재생할 기록 일자 YYYYMMDD (기본: 전체)")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=18443)
+    ap.add_argument("--ws-port", type=int, default=21000)
+    ap.add_argument("--latency-scale", type=float, default=1.0, help="기록 REST 지연 배수 (0=지연 없음)")
+    ap.add_argument("--speed", type=float, default=1.0, help="WebSocket 틱 재생 배속")
+    ap.add_argument("--loop", action="store_true", help="틱 기록 끝나면 처음부터 반복")
+    args = ap.parse_args()
+
+    store = ReplayStore(args.record_dir, args.day)
+    print(f"📂 기록 로드: REST {len(store.rest)}건 / WS {len(store.ws)}건 ({args.record_dir})")
+    threading.Thread(target=_run_ws_server, args=(args.host, args.ws_port, store, args.speed, args.loop), daemon=True).start()
+    httpd = ThreadingHTTPServer((args.host, args.port), _make_http_handler(store, args.latency_scale))
+    print(f"🌐 REST  http://{args.host}:{args.port}   🔌 WS  ws://{args.host}:{args.ws_port}")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"📊 재생 통계: {store.stats}")
+
+if __name__ == "__main__":
+    main()
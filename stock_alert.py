@@ -3,10 +3,287 @@
 r"""
 📈 KIS 주식 급등 알림 봇
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-버전: v177.15
-날짜: 2026-05-20
+버전: v177.40
+날짜: 2026-10-18
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 [변경 이력]
+- v177.40 (2026-10-18): runtime_state_bundle 메모리 캐시 (mtime/size 검증 + 키 단위 dirty + 병합 기록)
+    [#BC] _runtime_bundle_cache / _runtime_bundle_snapshot / _runtime_bundle_written 신규, _mark_state_dirty on_written 훅
+          이유: _runtime_state_get / _set / _delete 가 호출마다 runtime_state_bundle.json 전체 읽기·파싱,
+                set/delete 는 전체 재작성 + 백업 — 번들로 옮긴 모듈이 늘수록 키 1개 조회 비용이 전체 파싱
+          개선점: 파일 (mtime_ns, size) 가 캐시 시점과 같으면 메모리 dict 로 조회 (조회 값은 deepcopy 로 캐시 보호)
+                  set/delete 는 키별 세대 번호로 dirty 표시 → write-behind(v177.38 #BA) 로 STATE_FLUSH_INTERVAL_SEC 마다 1회 기록
+                  다른 프로세스가 파일을 바꾸면 재로드하면서 미기록 dirty 키는 메모리 값 유지 (병합)
+          주의점: _try_mark_preopen_dispatch 등 _save_runtime_state_bundle_unlocked 직접 저장은 기존처럼 즉시 기록 (인스턴스 간 중복 방지)
+                  set 후 STATE_FLUSH_INTERVAL_SEC 안의 비정상 종료 시 해당 키 유실 가능 — STATE_DURABILITY="runtime_state_bundle.json=sync" 로 즉시 기록
+
+- v177.39 (2026-10-18): 백업 스냅샷 정책 (파일별 최소 간격·내용 중복 제거·하드링크)
+    [#BB] _snapshot_backup 정책화, BACKUP_MIN_INTERVAL_SEC / BACKUP_POLICY / BACKUP_MODE 신규
+          이유: _write_json_atomic_unlocked 가 저장마다 직전 파일 전체 복사 + backups/ listdir·정렬·정리
+                → signal_log 등 자주 쓰는 파일은 쓰기 I/O 가 수 배로 증가
+          개선점: 파일별 최소 간격(기본 300초, BACKUP_POLICY="signal_log.json=900,x.json=off", 0=매번) 안의 저장은 백업 생략
+                  직전 백업과 크기·mtime 또는 sha256 동일하면 생략
+                  BACKUP_MODE=link(기본): os.replace 로 교체될 이전 inode 를 하드링크 → 복사 0바이트 (실패 시 copy)
+                  백업 목록은 파일별 메모리 유지, listdir 은 파일별 첫 백업 시 1회
+          주의점: 백업 간격 안의 중간 버전은 남지 않음 (최근 MAX_STATE_BACKUPS 개는 간격 단위 스냅샷)
+                  save_carry_stocks 도 제자리 덮어쓰기 → 원자적 교체로 변경 (하드링크 백업 내용 보호)
+
+- v177.38 (2026-10-18): 상태 파일 write-behind 저장 (dirty 표시 + 주기 병합 기록)
+    [#BA] _mark_state_dirty / _flush_dirty_state / _state_flusher_loop / _install_state_flush_handlers 신규
+          이유: _save_entry_watch_active / _save_preclose_gap_entry_watch / _save_pullback_wait_watch / _save_trading_halt_state /
+                update_news_cooccur 가 호출마다 전체 파일 직렬화 + 백업 복사 + fsync (스캔 1회에 같은 파일 수 회 기록)
+          개선점: 저장 함수는 dirty 표시만, "KIS-StateFlush" 스레드가 STATE_FLUSH_INTERVAL_SEC(2초)마다 파일별 최대 1회 기록
+                  파일별 안전 수준 sync / fsync / fast — 기본 fsync, news_cooccur 는 fast, STATE_DURABILITY 로 재정의
+                  직렬화 중 상태 변경(RuntimeError) 시 다음 주기 재시도, 상태 저장 통계는 WebSocket 상태 요약에 표시
+          주의점: 비정상 종료(SIGKILL·OOM) 시 최대 STATE_FLUSH_INTERVAL_SEC 분량 유실 가능 — 즉시 기록이 필요하면 파일=sync
+                  atexit·SIGTERM·SIGINT 에서 남은 dirty 기록 (신호 핸들러는 플래그만 → 플러시 스레드가 기록 후 신호 재전달)
+                  _read_json_safe / _read_state_json 은 같은 파일 dirty 분 먼저 기록, 기록 실패 항목은 다음 주기 재시도
+
+- v177.37 (2026-10-18): 차단·shadow 기록 JSONL 추가 전용 저널
+    [#AZ] _log_journal_append / _log_journal_iter / _log_journal_tail 신규, LOG_JOURNAL_DIR / LOG_JOURNAL_KEEP_DAYS
+          이유: _log_suppressed_alert / _record_shadow_capture 가 차단 후보 1건마다 파일 전체 읽기 → 키 정렬로 500/2000건 trim
+                → indent=2 전체 재작성 (스캔당 수십 회, O(n log n) + 전역 파일 잠금)
+          개선점: state/log_journal/{suppressed_alerts|shadow_captures}_YYYYMMDD.jsonl 에 한 줄 append, 최근 500/2000건은 메모리 tail
+                  _iter_today_records / _load_intraday_stale_shadow_counts 는 당일 세그먼트만, stale replay 는 pressure 일자만 스트리밍
+                  watchdog 차단 사유 집계는 tail 이 since_ts 이전까지 덮으면 메모리만 사용
+                  (_build_adaptive_capture_feedback 은 daily_self_audit.json 만 읽어 변경 없음 — 자가진단 집계가 세그먼트 스트리밍)
+          주의점: 기존 JSON 은 첫 사용 시 일자별 세그먼트로 이관 후 .migrated 로 이름 변경, 세그먼트 보관 LOG_JOURNAL_KEEP_DAYS(14일)
+                  date 필드 없는 차단 기록은 세그먼트 일자로 당일 판정 (기존엔 자가진단 당일 집계에서 누락)
+
+- v177.36 (2026-10-18): signal_log SQLite(WAL) 저장소 (행 단위 upsert)
+    [#AY] _signal_log_read / _signal_log_write / _signal_log_query / _signal_log_export_json 신규, SIGNAL_LOG_BACKEND
+          이유: signal_log.json(최대 5000건)을 87개 호출부가 전체 읽기·indent=2 전체 쓰기 + fsync, 전역 _file_lock 점유
+                → 레코드 1건 갱신(save_signal_log / _mark_entry_hit_in_signal_log 등)마다 수 MB 재기록, 다른 상태 저장까지 대기
+          개선점: state/signal_log.sqlite3 (WAL, synchronous=NORMAL) — 레코드 1행 + code/status/detect_date/signal_type 인덱스
+                  기존 호출부는 읽기/쓰기 함수만 교체, 쓰기는 호출자가 읽은 시점 본문(_SignalLogRows.base)과 다른 행만 upsert
+                  → 낡은 전체 스냅샷이 다른 스레드가 그 사이 갱신한 행을 되돌리지 않음, 삭제는 deleted_keys 로 넘긴 키만 (단일 트랜잭션)
+                  읽은 뒤 다른 스레드가 추가한 행은 삭제하지 않음 (기존 전체 덮어쓰기의 신규 레코드 유실 방지)
+                  건수 정리(_prune_signal_log)는 _prune_and_write_signal_log 가 정리로 빠진 키만 삭제
+                  save_signal_log / _persist_tracking_results_runtime / _upsert_preclose_gap_signal /
+                  _update_signal_log_execution_confirmed / _mark_entry_hit_in_signal_log 는 종목·상태 인덱스 부분 조회
+                  부분 조회 저장 경로의 건수 정리는 _signal_log_prune_if_needed (COUNT·아카이브 대상 확인, 분당 1회)
+                  JSON 백엔드도 변경 행만 파일에 병합 (부분 조회 결과로 파일 전체를 덮지 않음)
+                  전용 잠금(_signal_log_db_lock) 사용 → 다른 JSON 상태 저장과 독립
+          주의점: 첫 실행 시 signal_log.json 자동 이관, 이후 JSON 은 SIGNAL_LOG_EXPORT_MIN(10분)마다·/reset_stats·다운로드 시 내보내기
+                  SIGNAL_LOG_BACKEND=json 또는 SQLite 열기 실패 시 기존 JSON 전체 읽기/쓰기로 동작
+
+- v177.35 (2026-10-18): 대시보드 단일 발행 스레드 (갱신 요청 병합)
+    [#AX] _mark_dashboard_dirty / _dashboard_publisher_loop("KIS-Dashboard") / DASHBOARD_PUBLISH_WINDOW_SEC 신규
+          이유: 틱 배치·schedule 작업·_dashboard_realtime_loop·시작 시점이 매번 threading.Thread(target=_push_dashboard_json) 생성,
+                쓰로틀은 함수 내부(_WEB_DASHBOARD_LAST_PUSH)에서만 → 틱 폭주 시 분당 수백 개 단명 스레드가 쓰로틀에서 종료
+          개선점: 모든 갱신 요청은 Event 통지만, 발행 스레드가 직전 발행 후 윈도우(기본 3초) 경과 시점에 1회 빌드
+                  윈도우 안에 들어온 요청은 한 번의 빌드로 병합, 빌드는 항상 단일 스레드에서 직렬 실행
+                  WebSocket 상태 요약에 발행/요청 횟수 표시 (병합 비율 확인)
+          주의점: _ws_dashboard_push_inflight / _ws_push_dashboard_once (v177.28) 제거 — 발행 스레드가 대체
+                  _push_dashboard_json 내부 쓰로틀은 유지 (직접 호출 시 안전장치) — 실제 JSON 교체 시에만 True 반환,
+                  발행 횟수는 True만 집계하고 미발행(throttle·생성 실패)은 다음 윈도우 재발행
+
+- v177.34 (2026-10-18): 체결 틱 저널 (고정폭 바이너리 append + mmap 재생)
+    [#AW] TICK_JOURNAL_ENABLED / iter_tick_journal / replay_tick_journal / restore_execution_context_from_journal 신규
+          이유: 웹소켓 체결 틱은 링버퍼(약 6분)에만 남아 재시작 시 체결속도 맥락 소실, 오프라인 벤치마크용 실데이터 없음
+          개선점: 틱 워커가 배치당 1회 state/tick_journal/ticks_YYYYMMDD.bin 에 72바이트 고정폭 레코드 append
+                  (수신 ts·종목·시장 + _ws_iter_h0stcnt0 필드), 헤더 매직·버전·레코드 크기로 형식 검증
+                  mmap 조회 + since_ts 이진 탐색, _record_execution_snapshot(sample_ts=기록 시각) 경유 재생
+                  WS 시작 시 당일 저널 최근 구간 자동 재생 → 재시작 직후 체결속도 지표 즉시 준비
+                  python stock_alert.py --replay-ticks YYYYMMDD [--speed N] → 재생 건수·처리량 출력
+          주의점: 재생 틱은 VI 조회(get_stock_price) 생략, 링 마지막 ts보다 과거 틱은 무시 (실시간 틱과 섞여도 순서 유지)
+                  비정상 종료로 잘린 마지막 레코드는 다음 기록 시 경계로 truncate, 보관 TICK_JOURNAL_KEEP_DAYS(5일)
+
+- v177.33 (2026-10-18): 실시간 호가 스트림 H0STASP0 (REST 호가 조회 대체)
+    [#AV] WS_ORDERBOOK_ENABLED / WS_ORDERBOOK_TOP_N / get_ws_orderbook_snapshot / _ws_ingest_h0stasp0 신규
+          이유: _get_quiet_orderbook_snapshot은 FHKST01010200 REST 조회, no_ask soft allow·bid_ask 힌트는
+                시세 조회 시점 1호가 잔량 / 신호 시점 비율 사용 → 호가 게이트가 지연된 값으로 판정
+          개선점: 구독 점수 상위 종목에 H0STASP0 호가 구독 추가 (기존 샤드 연결 재사용, 체결 배정 후 남는 슬롯만)
+                  종목별 호가는 (수신 ts, array('q') 40칸) 튜플로 보관, 조회 시 REST와 같은 요약 필드 계산(_orderbook_depth_summary 공용)
+                  _get_quiet_orderbook_snapshot / _should_soft_allow_no_ask_liquidity_general / _signal_bid_ask_ratio_hint 가
+                  WS_ORDERBOOK_MAX_AGE_SEC(5초) 이내 호가 있으면 REST·시점 값 대신 실시간 잔량 사용
+          주의점: 기본 비활성 (WS_ORDERBOOK_ENABLED=1 필요), 호가 구독도 세션 상한(체결+호가 합산) 차감
+                  H0STASP0 는 KRX 호가 → NXT 종목·시간대는 기존 경로 유지, 스트림 끊기면 수신 지연으로 자동 폴백
+
+- v177.32 (2026-10-18): WebSocket 구독 우선순위 스케줄러 (점수·최소 유지·교체 예산)
+    [#AU] _ws_score_targets / WS_SUB_MIN_HOLD_SEC / WS_SUB_SWAP_MARGIN / WS_SUB_CHURN_BUDGET 신규
+          이유: _ws_get_target_codes가 entry_watch·prewarm·setup_watch를 순위 없이 합쳐 상한 초과 시 이름순 배정,
+                대상 이탈 즉시 해제 → WS_SYNC_INTERVAL_SEC마다 구독/해제 반복(건당 0.2~0.3초 지연) + 체결 이력 공백
+          개선점: 대상별 점수 — 진입 후 추적 노출(entry_hit) > 진입 감시(진입가 근접도·등급 가점) > 셋업 감시 > 프리웜(경과 감쇠)
+                  배정 후 WS_SUB_MIN_HOLD_SEC(120초) 동안은 대상에서 빠져도 구독 유지
+                  슬롯 부족 시 유지시간 지난 최저 점수 종목보다 WS_SUB_SWAP_MARGIN(15점) 이상 높을 때만 교체
+                  배정 1회당 교체·해제 메시지 WS_SUB_CHURN_BUDGET(6)개 상한, 초과분은 다음 주기로 보류
+          주의점: 빈 슬롯 신규 구독은 예산 미포함 (재연결 직후 즉시 채움), 샤드 끊김 정리도 메시지 없으므로 미포함
+                  상태 요약에 교체·해제 누적 횟수와 유지·보류 종목 수 표시
+
+- v177.31 (2026-10-18): WebSocket 다중 연결 샤드 (구독 상한 확장)
+    [#AT] WS_SHARD_COUNT / WS_SHARD_CREDENTIALS 신규 — 샤드별 _ws_connect_loop 스레드, _ws_plan_shards 배정
+          이유: 단일 연결 WS_MAX_SUBSCRIPTIONS(41) 상한 → 초과 종목은 get_stock_price REST 폴링으로 밀려
+                순위 낮은 감시 종목 시세 지연 + REST 호출 증가
+          개선점: 구독 대상(_ws_get_target_codes)을 연결된 샤드에 배정 — 기존 배정 유지(재구독 최소화),
+                  신규 종목은 여유 슬롯 최다 샤드, 샤드 끊기면 해당 종목은 다음 배정에서 다른 샤드로 이동
+                  샤드 1번부터는 WS_SHARD_CREDENTIALS 앱키로 approval_key 발급 — 앱키당 WS 세션 1개라
+                  샤드 수는 1 + 유효 자격증명 수로 제한 (기본 키를 공유하는 추가 샤드는 같은 세션을 다툼)
+          주의점: 기본 WS_SHARD_COUNT=1 → 기존 단일 연결과 동일 동작
+                  _ws_subscribed_codes는 전 샤드 합집합 유지 (기존 조회부 호환), 상태 요약에 샤드별 구독 수·초과 종목 수 표시
+
+- v177.30 (2026-10-18): H0STCNT0 fast-path 파서 (링버퍼 직접 기록)
+    [#AS] _ws_iter_h0stcnt0 / _ws_ingest_h0stcnt0 / _record_execution_tick 신규
+          이유: _ws_parse_execution_data가 레코드마다 46필드 슬라이스 리스트 + payload dict 생성,
+                _record_execution_snapshot이 같은 값을 safe_int로 재검증 → 09:00 동시호가 직후 웹소켓 처리 시간 대부분
+          개선점: 프레임 헤더는 split("|", 3), 데이터는 1회 split 후 오프셋 인덱스로 사용 필드만 변환 (슬라이스/dict 없음),
+                  검증된 값 튜플을 _record_execution_tick → _exec_ring_write 로 바로 기록
+                  _record_execution_snapshot(payload dict, REST 경로)은 값 정규화 후 같은 _record_execution_tick 사용
+          주의점: 검증 규칙(6자리 코드, 가격·누적거래량 > 0, 형식 오류 레코드 제외)은 기존 파서와 동일, 기존 파서는 벤치마크 기준용으로만 유지
+                  python stock_alert.py --bench-ws-parser → 레코드당 파싱 시간 비교 (재측정: 프레임당 1레코드 약 1.1배,
+                  3~10레코드 약 1.3배 — 3.5µs → 2.7µs 수준, 레코드 dict·재검증 제외분 별도)
+                  데이터부 전체 split은 그대로 — 필드별 find/슬라이스·itemgetter 방식은 C split보다 느려 미채택,
+                  남은 비용 대부분은 필드 int/float 변환
+
+- v177.29 (2026-10-18): 체결속도 지표 누적합 집계 (창 재스캔 제거)
+    [#AR] 링버퍼에 누적합 컬럼(pos/valid/amt/rate/bid/bid_n) + 마지막 유효체결 ts + 최고가 단조 덱 추가
+          이유: get_execution_speed_metrics가 창 샘플 dict 리스트를 만든 뒤 window/flow/recent/bid/dip 헬퍼에서 여러 번 재순회
+                → entry_watch / execution_setup 점검마다 감시 종목 × 샘플 수 비용
+          개선점: 틱 append 시 샘플 기여분(유효 여부, 체결대금, 속도, 호가비)을 누적, 창·최근/이전 구간 합은 ts 이분 탐색 + prefix 차로 O(1)
+                  창 최고가는 단조 덱 선두, 평균절대편차(일관성)·눌림 구간 거래대금만 유효 샘플 컬럼 1회 순회 (dict 복원 없음)
+          주의점: 점수 산식·임계값은 기존 그대로 — 부동소수 누적 차이로 속도(원/초) 정수 절삭이 ±1 달라질 수 있음
+                  _collect_execution_speed_* / _calc_execution_speed_price_context / _calc_execution_speed_bid_context 제거 (get_execution_speed_metrics 전용)
+
+- v177.28 (2026-10-18): WebSocket 수신/틱 처리 분리 (전용 워커 큐)
+    [#AQ] _ws_tick_enqueue / _ws_tick_worker_loop 신규 — _ws_on_message는 체결 프레임을 큐에 넣기만
+          이유: 수신 스레드에서 파싱 + _record_execution_snapshot(VI가 있으면 get_stock_price 동기 REST) 인라인 실행,
+                틱마다 대시보드 push 스레드 생성 → 수신 콜백 블로킹으로 PINGPONG 지연, 장초반 Broken pipe 재연결 의심
+          개선점: 한도 큐(WS_TICK_QUEUE_MAX=5000) + KIS-WS-Tick 워커가 최대 WS_TICK_BATCH_MAX(200)개씩 배치 처리,
+                  시장(KRX/NXT) 판별은 배치당 1회, 대시보드 push는 진행 중이면 추가 스레드 생성 안 함
+          주의점: 큐 가득 차면 가장 오래된 프레임 폐기 (최신 체결 우선)
+                  적체 최대치·폐기 수·처리 지연(ms)은 _ws_tick_stats → WebSocket 상태 요약에 표시
+                  VI 틱 업종·종목명은 링 업종명·공개 메타 캐시 사용, 없을 때만 백그라운드 KIS 풀 조회 (_note_vi_tick)
+                  틱 시각은 워커 처리 시각이 아닌 수신 시각(recv_ts) — 적체 시 elapsed_sec 압축·체결속도 과대 방지,
+                  실시간 링과 틱 저널 재생 시각 일치 (샤드 간 수신 역전은 링 마지막 시각으로 보정)
+
+- v177.27 (2026-10-18): 체결 스냅샷 링버퍼 (_execution_snapshots)
+    [#AP] _new_exec_snapshot_ring / _exec_ring_append / _exec_snap_last / _exec_snap_rows 신규
+          이유: 틱마다 약 20키 dict를 리스트에 추가하고 _prune_execution_snapshots가 매 틱 리스트 전체 재생성
+                → 피크 100+ 구독 시 웹소켓 스레드 할당·GC 부담
+          개선점: 종목별 고정 용량(EXEC_SNAPSHOT_RING_CAPACITY=80) 컬럼 배열(int64/float64 + 문자열 리스트),
+                  append는 가장 오래된 칸 덮어쓰기 O(1), 시간 창 밖 샘플은 시작 인덱스만 이동
+                  구간 조회(_exec_snap_rows since_ts)는 ts 이분 탐색
+          주의점: _get_snap / get_execution_speed_metrics / 대시보드 등 조회부는 기존과 같은 dict 형태로 복원해 사용
+                  종목별 lock으로 웹소켓 append와 조회 스레드 간 행 섞임 방지
+
+- v177.26 (2026-10-18): 후보군 수익률 상관행렬 (build_correlation_theme 행 조회)
+    [#AO] rebuild_correlation_matrix / get_correlated_peers / get_price_correlation 신규
+          이유: build_correlation_theme가 후보 최대 20개와 쌍별 calc_price_correlation(양쪽 일봉 재조회 + 순수 파이썬 피어슨)
+                + 쌍마다 time.sleep(0.05) → auto_update_theme 급등 1건당 수 초 블로킹
+          개선점: 세션당 1회 후보군 수익률을 평균 0·노름 1 벡터로 정규화해 상관행렬 구성 (상관계수 = 내적),
+                  피어 탐색은 행렬 행 상위 k 조회, 행렬 밖 종목만 기존 개별 계산 (sleep 제거 — REST 리미터가 간격 관리)
+                  calc_real_sector_score 상관계수 레이어도 행렬 조회 우선
+          주의점: 동적 후보군 갱신 스레드(_precompute_candidate_analytics)에서 지표 일괄 계산 직후 구성,
+                  CORR_LOOKBACK일 미만 이력 종목은 행렬 제외 → 기존 계산 폴백 (값 동일)
+
+- v177.25 (2026-10-18): 틱 기반 장중 지표 (RSI / 20일 괴리 / 볼린저 %B)
+    [#AN] _update_intraday_indicators / get_intraday_indicators 신규 — _record_execution_snapshot 틱마다 O(1) 갱신
+          이유: 장중 RSI / get_ma20_deviation / %B가 일봉 종가 기준 → _daily_cache 만료(최대 30분)까지 마지막 봉 정체
+          개선점: 전일까지 확정 종가 합계(RSI 상승·하락폭, 19일 합, BB 합·제곱합)를 종목별 1회 준비,
+                  틱 현재가를 당일 잠정 종가로 계산 → 신호가 수 초 내 반영, REST 추가 호출 없음
+                  calc_indicators(RSI·BB) / get_ma20_deviation 이 최근 틱(INTRADAY_INDICATOR_MAX_AGE_SEC) 있으면 우선 사용
+          주의점: 상태는 _daily_cache에 있는 일봉으로만 생성 (웹소켓 스레드 REST 금지), 이평 정배열 판정은 기존 일봉 기준 유지
+                  일봉 부족(invalid) 상태는 당일 고정하지 않고 _daily_cache 항목 갱신 시 또는 INTRADAY_INDICATOR_RETRY_SEC(300초) 후 재구성
+                  calc_bollinger 밴드 판정부를 _bollinger_result로 분리 (결과 동일)
+
+- v177.24 (2026-10-18): 후보군 일괄 지표 엔진 (세션 캐시)
+    [#AM] precompute_indicators_batch 신규 — refresh_dynamic_candidates 직후 후보군 전체 RSI/MA/BB/ATR 일괄 계산
+          이유: calc_indicators / get_atr가 스캔 사이클마다 종목별 종가 리스트 재구성 + 일봉 순차 조회
+                → 후보 200+ 채점 시 수백 회 반복 계산
+          개선점: 일봉은 별도 소형 KIS 풀(KIS_REST_BG_WORKERS=2, background 레인)로 병렬 조회, 결과는 _indicator_batch_cache 세션 캐시
+                  공용 FIFO 풀을 쓰면 ~200건이 진입감시 멀티시세·스캔 랭킹 요청 앞에 줄서 30초 gather 타임아웃 → 별도 풀로 분리
+                  _precompute_candidate_analytics 단일 실행 — 후보군 갱신이 겹치면 최신 후보군 1건만 보관 후 이어서 실행
+                  calc_indicators는 _get_indicator_snapshot 조회만, 미스 시 기존처럼 개별 계산 후 캐시
+          주의점: 세션 키 = 날짜 + 장전/정규장/장후 + 지표 파라미터, 정규장은 _daily_cache와 같은 30분 TTL
+                  NumPy 미의존 유지 — 계산식은 calc_rsi / calc_ma_trend / calc_bollinger 그대로 (결과 동일)
+
+- v177.23 (2026-10-18): 일봉 OHLCV 영속 컬럼 저장소 (증분 조회)
+    [#AL] get_daily_data → _get_daily_data_from_store — DATA_DIR/daily_ohlcv/<code>/{date,open,high,low,close,vol}.i64
+          이유: 30분 메모리 캐시 만료·재시작마다 종목당 60~70일 일봉(FHKST03010100) 재조회 → 전일과 같은 작업 반복으로 KIS 호출 한도 소모
+          개선점: 확정 봉만 컬럼별 int64 append 저장, 이후 마지막 저장일~오늘 구간만 조회
+                  get_atr / get_avg_volume / calc_volume_profile / calc_price_correlation 모두 로컬 데이터 사용
+                  장 시작 전(09:00 이전) 직전 거래일까지 저장돼 있으면 KIS 조회 생략
+          주의점: 겹쳐 조회한 마지막 봉 종가가 다르면(수정주가) 해당 종목 전체 재구성
+                  당일 봉은 15:40 이후에만 확정 저장, DAILY_STORE_ENABLED=false 시 기존 전체 조회
+
+- v177.22 (2026-10-18): KIS 기록 모드 + 로컬 재생 서버 (오프라인 벤치마크)
+    [#AK] KIS_RECORD_DIR 기록 모드 — _safe_get(_kis_session_get) REST 응답·지연시간, _ws_on_message 프레임을
+          rest_YYYYMMDD.jsonl / ws_YYYYMMDD.jsonl로 추가 저장
+          이유: KIS 실계정 없이는 run_scan / analyze / check_entry_watch / _push_dashboard_json 실행 불가
+                → 스캔 처리량·지연 측정과 성능 회귀 재현이 불가능
+          개선점: kis_replay_server.py 신규 — tokenP/Approval 더미 발급, 기록 GET 응답을 기록 지연(--latency-scale)으로 재생,
+                  WebSocket은 구독 종목 체결 프레임만 기록 간격(--speed 배속)으로 송신
+                  KIS_BASE_URL=http://127.0.0.1:<port> / WS_URL=ws://127.0.0.1:<ws-port> 로 선택
+          주의점: _validate_kis_oauth_config는 https 외에 로컬 http(127.0.0.1/localhost)만 추가 허용
+                  재생 서버는 파라미터 완전 일치 우선, 대체 조회는 같은 종목 파라미터(FID_INPUT_ISCD·PDNO 등) 기록만 — 없으면 404
+
+- v177.21 (2026-10-18): AIMD 적응형 KIS REST 한도
+    [#AJ] _kis_effective_rest_limit / _kis_note_rate_limited 신규 — 고정 KIS_REST_LIMIT_PER_SEC → 학습형 한도
+          이유: 초당 제한(EGW00201) 응답은 로그만 남기고 0.8×2^n 지수 backoff → 계좌 등급 실제 용량 미활용,
+                동시 재시도 시 retry storm 가능
+          개선점: 제한 응답 → 한도 ×KIS_AIMD_DECREASE(0.7) (1초 윈도우당 1회), KIS_AIMD_PROBE_SEC(30초)
+                  무제한 경과 + 그 사이 1초 윈도우가 현재 한도까지 찼을 때만 +1 탐색 (KIS_REST_LIMIT_MIN 4 ~ KIS_REST_LIMIT_MAX 20)
+                  탐색 상한 = 최근 제한 응답 한도(ceiling) - 1, KIS_AIMD_CEILING_HOLD_SEC(600초) 무제한이면 해제
+                  KIS_REST_LIMIT_MIN은 설정 KIS_REST_LIMIT_PER_SEC 이하로 제한, 학습 한도 저장은 write-behind 위임
+                  제한 응답 재시도는 1초 윈도우 + 지터 대기, 학습 한도는 전용 파일 kis_rest_limit.json 보존
+                  (토큰 상태 파일과 분리 → write-behind 기록이 그 사이 갱신된 접근 토큰을 덮지 않음)
+          주의점: kis_rest_limit.json 없으면 이전 kis_token_state.json rest_limit_learned 값으로 시작,
+                  탐색·감소는 _kis_rate_lock 안에서 갱신, KIS_AIMD_ENABLED=false면 기존 고정 한도
+
+- v177.20 (2026-10-18): KIS REST 우선순위 레인 + 선점
+    [#AI] _wait_for_kis_rest_slot: critical / scan / background 3개 레인 (스레드별 _with_kis_lane 데코레이터)
+          이유: 선착순 limiter → _push_dashboard_json 시세 보완 루프가 손절·진입가 도달 순간의
+                check_entry_watch / _run_tracking_results_cycle 호출을 굶길 수 있음
+          개선점: critical=check_entry_watch·_run_tracking_results_cycle / scan=_run_scan_body /
+                  background=_push_dashboard_json·_dashboard_realtime_loop·_refresh_premarket_sectors
+                  레인별 1초 윈도우 점유 상한(KIS_LANE_SCAN_SHARE 0.85, KIS_LANE_BACKGROUND_SHARE 0.5)
+                  + 상위 레인 대기 중이면 하위 레인 양보 → 경합 시 background부터 감속
+                  get_kis_lane_stats() 레인별 calls/wait_events/wait_sec/max_wait_sec, /status 표시
+          주의점: 레인 미지정 스레드는 scan, KIS 워커 풀 잡은 제출 스레드 레인 승계, 토큰 발급은 레인 미적용
+
+- v177.19 (2026-10-18): KIS TR별 응답 캐시 (선언형 TTL 정책)
+    [#AH] _safe_get 앞단 TR 캐시 — 키: tr_id + 정규화 params, 정책: KIS_TR_CACHE_TTL
+          이유: _daily_cache(30분)·_avg_volume_cache(1시간)·_dart_risk_cache(10분)·랭킹 함수별 소형 캐시 등
+                캐시가 함수마다 제각각 → 신선도/쿼터 trade-off를 한 곳에서 조정 불가
+          개선점: 시세 2초 / 랭킹 15초 / 일봉 "session"(다음 09:00·15:30 경계까지) / 기본정보 1일
+                  KIS_TR_CACHE_TTL_JSON으로 TR별 재정의, get_kis_tr_cache_stats() TR별 hit/miss + /status 적중률 표시
+          주의점: rt_cd=0 정상 200 응답만 저장, 적중 시 deepcopy 반환 (호출측 변형 격리)
+                  일봉 "session" 캐시는 확정 봉 응답만 — 정규장 중 당일 봉이 포함된 응답은
+                  KIS_TR_CACHE_LIVE_BAR_TTL_SEC(20초)만 캐시 (당일 봉이 09:00~15:30 내내 고정되지 않도록)
+                  기존 함수별 캐시는 유지 (Surgical Changes 원칙 — 점진 이관)
+
+- v177.18 (2026-10-18): KIS 동일 요청 single-flight 병합
+    [#AG] _safe_get: tr_id+URL+params(+return_meta) 동일 요청이 진행 중이면 선행 요청 결과를 공유
+          이유: _dashboard_realtime_loop / _vi_monitor_loop / run_scan / _run_surge_velocity_scan / 리더 잡이
+                같은 get_stock_price·get_fluctuation_rank를 동시에 호출 → 중복 호출마다 rate-limit 슬롯 소모
+          개선점: 후행 요청은 REST 없이 대기 후 결과 deepcopy 수신 → 진입감시 경로 큐 대기 감소
+                  기존 본체는 _safe_get_uncoalesced로 분리, 통계 _kis_single_flight_stats(leader/coalesced)
+          주의점: 선행 요청 60초 내 미완료 시 후행 요청은 단독 호출로 대체 (KIS_SINGLE_FLIGHT_ENABLED=false로 비활성)
+                  상위 레인(_current_kis_lane) 요청은 하위 레인 선행 요청에 합류하지 않고 새 선행 요청이 됨 (lane_split)
+
+- v177.17 (2026-10-18): KIS REST 병렬 실행기 도입
+    [#AF] _kis_submit / _kis_submit_call / _kis_gather / _kis_gather_calls 신규 — KIS_REST_WORKERS(기본 6) 워커 풀
+          이유: _safe_get이 호출 스레드에서 동기 실행 → run_scan이 초당 한도(KIS_REST_LIMIT_PER_SEC)보다
+                훨씬 적은 호출로 네트워크 왕복만 순차 대기
+          개선점: _safe_get 잡을 future로 제출 → 초당 예산은 기존 _wait_for_kis_rest_slot이 그대로 통제,
+                  대기 시간 동안 다른 요청이 슬롯 사용
+                  _scan_krx_market_candidates 랭킹 6종 / _scan_nxt_market_candidates overtime 4종 /
+                  get_stock_prices_batch 청크·단건 보완을 동시 조회 (결과 소비 순서는 기존과 동일)
+          주의점: 워커 내부 중첩 제출은 인라인 실행(풀 고갈 교착 방지), 실패/타임아웃 항목은 빈 결과로 대체
+
+- v177.16 (2026-10-18): 멀티종목 시세 배치 조회 도입
+    [#AE] get_stock_prices_batch() 신규 — 관심종목 멀티시세 FHKST11300006 (/quotations/intstock-multprice)
+          이유: 섹터 피어 8종목·진입감시 40+종목·추적 종목을 get_stock_price() 단건 REST로 순차 조회
+                → 종목 수만큼 _wait_for_kis_rest_slot 대기 누적, 스캔 지연의 최대 원인
+          개선점: 요청당 최대 30종목(KIS_MULTI_QUOTE_MAX) 배치 → get_stock_price()와 동일 키 payload 반환
+                  _collect_sector_momentum_results / check_entry_watch / _run_tracking_results_batch 선조회 적용
+          주의점: 멀티시세에는 업종·시총·거래정지 플래그 없음 → quote_source="multi" 표시,
+                  진입감시는 멀티시세 행으로 판단, 진입가 근접(ENTRY_WATCH_NEAR_ENTRY_PCT 1%) 종목만 단건 시세로 교체
+                  정지·VI 플래그는 단건 시세 응답 때 종목별 기록 → MARKET_FLAG_RECHECK_SEC(60초)마다만 단건 재확인
+                  (_is_trading_halt / _is_krx_vi_reference_mode 는 멀티시세 payload 에 기록 플래그만 덧씌움, REST 재조회 없음)
+                  — 멀티시세는 선필터로만 사용: 가격·누적거래량 변화 없으면 ENTRY_WATCH_FULL_RECHECK_SEC(20초) 동안 판단 보류
+                  NXT 단독 시간대·404 응답 시 단건 조회로 자동 대체 (KIS_MULTI_QUOTE_ENABLED=false로 비활성)
+
 - v177.15 (2026-05-20): NXT 시간대 대시보드 섹터 갱신 복구
     [#AD] _build_realtime_sectors_from_kis: is_market_open(KRX전용) → is_any_market_open(KRX+NXT)
           이유: KRX 15:30 마감 후 즉시 return → NXT 시간대(~20:00) 섹터 전혀 갱신 안됨
@@ -2825,6 +3102,8 @@ def _payload_hash(obj) -> str:
 def _read_state_json(file_path: str, default=None):
     if default is None:
         default = {}
+    if file_path in _state_dirty:  # v177.38 #BA: 지연 기록분 먼저 반영
+        _flush_dirty_state([file_path])
     try:
         with _file_lock:
             if not os.path.exists(file_path):
@@ -3127,7 +3406,7 @@ def _collect_intraday_capture_focus(leaders: list) -> list:
  
  
 def _collect_intraday_capture_detected_codes(today: str) -> set:
-     signal_log = _read_json_locked(SIGNAL_LOG_FILE) if os.path.exists(SIGNAL_LOG_FILE) else {}
+     signal_log = _signal_log_read()
      signal_log = signal_log if isinstance(signal_log, dict) else {}
      detected_codes = set()
      for rec in signal_log.values():
@@ -3546,38 +3825,107 @@ def _ensure_dir(path: str):
         os.makedirs(path, exist_ok=True)
     except Exception as e:
         _log_warn_msg(f"⚠️ DATA_DIR 생성 실패: {path} ({e})")
+# ============================================================
+# 🧩 백업 스냅샷 정책 (v177.39 #BB)
+# - 파일별 최소 간격: BACKUP_MIN_INTERVAL_SEC(기본 300초), BACKUP_POLICY="signal_log.json=900,foo.json=off" 로 재정의 (0=매번)
+# - 직전 백업과 크기·mtime 동일하거나 내용 해시 동일하면 생략
+# - BACKUP_MODE=link(기본): 원자적 교체(os.replace) 직전 파일을 하드링크 → 복사 없이 이전 inode 보존
+#   (하드링크 불가 파일시스템은 copy 로 자동 전환)
+# - 정리는 파일별 메모리 목록으로 (디렉터리 listdir·정렬은 파일별 첫 백업 시 1회)
+# ============================================================
+BACKUP_MIN_INTERVAL_SEC = float(os.getenv("BACKUP_MIN_INTERVAL_SEC", "300") or "300")
+BACKUP_MODE = os.getenv("BACKUP_MODE", "link").strip().lower()
+_BACKUP_POLICY = {}
+for _bp in os.getenv("BACKUP_POLICY", "").split(","):
+    _bk, _, _bv = _bp.partition("=")
+    if _bk.strip() and _bv.strip():
+        _bv = _bv.strip().lower()
+        _BACKUP_POLICY[_bk.strip()] = -1.0 if _bv == "off" else float(_bv or 0)
+_backup_state: dict = {}   # base → {"ts", "sig", "hash", "files": [backup name...]}
+_backup_lock = threading.Lock()
+_backup_stats = {"taken": 0, "linked": 0, "skipped_interval": 0, "skipped_same": 0}
+
+
+def _backup_min_interval(base: str) -> float:
+    return _BACKUP_POLICY.get(base, BACKUP_MIN_INTERVAL_SEC)
+
+
+def _backup_file_hash(file_path: str) -> str:
+    h = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
 def _snapshot_backup(file_path: str):
-    """기존 파일이 있으면 backups로 스냅샷 백업(최근 N개 유지)"""
+    """기존 파일이 있으면 backups로 스냅샷 백업(최근 N개 유지) — v177.39 #BB: 간격·중복 정책 적용"""
     try:
-        if not os.path.isfile(file_path):
-            return
-        _ensure_dir(_BACKUP_DIR)
-        ts = datetime.now().strftime("%Y%m%d_%H%M%S")
         base = os.path.basename(file_path)
-        backup_path = os.path.join(_BACKUP_DIR, f"{base}.{ts}.bak")
-        # copy (binary safe)
-        with open(file_path, "rb") as rf, open(backup_path, "wb") as wf:
-            wf.write(rf.read())
-        # prune old backups
-        backups = sorted(
-            [p for p in os.listdir(_BACKUP_DIR) if p.startswith(base + ".")],
-            reverse=True,
-        )
-        for old in backups[MAX_STATE_BACKUPS:]:
+        interval = _backup_min_interval(base)
+        if interval < 0:
+            return
+        with _backup_lock:
+            st = _backup_state.setdefault(base, {"ts": 0.0, "sig": None, "hash": "", "files": None})
+            now_ts = time.time()
+            if now_ts - st["ts"] < interval:
+                _backup_stats["skipped_interval"] += 1
+                return
             try:
-                os.remove(os.path.join(_BACKUP_DIR, old))
-            except Exception as e:
-                _swallow_exception(e)
+                fst = os.stat(file_path)
+            except FileNotFoundError:
+                return
+            sig = (fst.st_size, fst.st_mtime_ns)
+            if sig == st["sig"]:
+                _backup_stats["skipped_same"] += 1
+                return
+            digest = _backup_file_hash(file_path)
+            st["sig"] = sig
+            if digest == st["hash"]:
+                st["ts"] = now_ts
+                _backup_stats["skipped_same"] += 1
+                return
+            _ensure_dir(_BACKUP_DIR)
+            if st["files"] is None:
+                st["files"] = sorted(p for p in os.listdir(_BACKUP_DIR) if p.startswith(base + "."))
+            ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+            name = f"{base}.{ts}.bak"
+            backup_path = os.path.join(_BACKUP_DIR, name)
+            if os.path.exists(backup_path):
+                return
+            linked = False
+            if BACKUP_MODE == "link":
+                # 저장은 tmp → os.replace 라 원본 inode 는 다시 쓰이지 않음 → 하드링크가 곧 스냅샷
+                try:
+                    os.link(file_path, backup_path)
+                    linked = True
+                except OSError as e:
+                    _swallow_exception(e, "backup_link")
+            if not linked:
+                with open(file_path, "rb") as rf, open(backup_path, "wb") as wf:
+                    wf.write(rf.read())
+            st["ts"], st["hash"] = now_ts, digest
+            st["files"].append(name)
+            _backup_stats["taken"] += 1
+            _backup_stats["linked"] += int(linked)
+            # prune old backups
+            while len(st["files"]) > MAX_STATE_BACKUPS:
+                old = st["files"].pop(0)
+                try:
+                    os.remove(os.path.join(_BACKUP_DIR, old))
+                except Exception as e:
+                    _swallow_exception(e)
     except Exception as e:
         _log_warn_msg(f"⚠️ 백업 스냅샷 실패: {os.path.basename(file_path)} ({e})")
-def _atomic_write_bytes(file_path: str, data: bytes):
-    """tmp → fsync → os.replace 로 원자적 저장"""
+def _atomic_write_bytes(file_path: str, data: bytes, fsync: bool = True):
+    """tmp → fsync → os.replace 로 원자적 저장 (fsync=False: v177.38 #BA fast 수준)"""
     _ensure_dir(os.path.dirname(file_path))
     tmp_path = file_path + ".tmp"
     with open(tmp_path, "wb") as f:
         f.write(data)
         f.flush()
-        os.fsync(f.fileno())
+        if fsync:
+            os.fsync(f.fileno())
     os.replace(tmp_path, file_path)
 def _write_json_atomic_unlocked(file_path: str, obj, indent: int = 2):
     try:
@@ -3602,6 +3950,141 @@ def _read_json_locked(file_path: str, default=None):
     """v38.3-P1-6: Lock 보호 JSON 읽기 (스레드 안전)"""
     with _file_lock:
         return _read_json_unlocked(file_path, default=default)
+# ============================================================
+# 🧩 상태 파일 write-behind 저장 (v177.38 #BA)
+# - 저장 함수는 _mark_state_dirty(path, snapshot) 로 dirty 표시만 → "KIS-StateFlush" 스레드가
+#   STATE_FLUSH_INTERVAL_SEC 마다 파일별 최대 1회 기록 (스캔·진입감시 경로에서 디스크 I/O·fsync 제거)
+# - 파일별 안전 수준: sync(즉시 기록, 기존 동작) / fsync(지연 + fsync) / fast(지연 + fsync 생략, 원자적 교체는 유지)
+#   STATE_DURABILITY="trading_halt_state.json=sync,news_cooccur.json=fast" 로 파일별 재정의
+# - 종료(atexit / SIGTERM / SIGINT) 및 같은 파일 읽기 직전에 남은 dirty 즉시 기록
+# ============================================================
+STATE_FLUSH_INTERVAL_SEC = float(os.getenv("STATE_FLUSH_INTERVAL_SEC", "2.0") or "2.0")
+_STATE_DURABILITY_LEVELS = ("sync", "fsync", "fast")
+_STATE_DURABILITY_OVERRIDES = {
+    k.strip(): v.strip().lower()
+    for k, _, v in (p.partition("=") for p in os.getenv("STATE_DURABILITY", "").split(","))
+    if k.strip() and v.strip().lower() in _STATE_DURABILITY_LEVELS
+}
+_state_dirty: dict = {}   # path → {"snapshot", "durability", "backup", "since"}
+_state_dirty_lock = threading.Lock()
+_state_flush_event = threading.Event()
+_state_flush_thread: threading.Thread | None = None
+_state_flush_stats = {"marked": 0, "flushed": 0, "retried": 0, "errors": 0}
+_state_flush_shutdown = {"signum": 0}   # 신호 핸들러는 이 값만 기록 (잠금 없음) → 플러시 스레드가 처리
+
+
+def _state_durability(file_path: str, default: str) -> str:
+    return _STATE_DURABILITY_OVERRIDES.get(os.path.basename(file_path), default)
+
+
+def _write_state_snapshot(file_path: str, obj, durability: str, backup: bool, on_written=None) -> None:
+    payload = json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+    with _file_lock:
+        if backup:
+            _snapshot_backup(file_path)
+        _atomic_write_bytes(file_path, payload, fsync=durability != "fast")
+        if on_written is not None:
+            on_written()  # _file_lock 보유 상태로 호출
+
+
+def _mark_state_dirty(file_path: str, snapshot, durability: str = "fsync", backup: bool = True, on_written=None) -> None:
+    """snapshot() 결과를 file_path 에 지연 기록 — 같은 파일의 연속 표시는 1회 기록으로 병합.
+    _file_lock 보유 중에는 호출하지 말 것 (sync 수준은 즉시 기록)."""
+    durability = _state_durability(file_path, durability)
+    if durability == "sync":
+        _write_state_snapshot(file_path, snapshot(), durability, backup, on_written)
+        return
+    _state_flush_stats["marked"] += 1
+    with _state_dirty_lock:
+        prev = _state_dirty.get(file_path)
+        _state_dirty[file_path] = {
+            "snapshot": snapshot, "durability": durability, "backup": backup, "on_written": on_written,
+            "since": prev["since"] if prev else time.time(),
+        }
+    _state_flush_event.set()
+    if _state_flush_thread is None or not _state_flush_thread.is_alive():
+        _state_flusher_start()
+
+
+def _flush_dirty_state(paths=None) -> int:
+    """dirty 파일 기록 (paths=None 이면 전체). 직렬화 중 상태가 바뀌어 실패하면 다음 주기에 재시도."""
+    with _state_dirty_lock:
+        keys = list(_state_dirty) if paths is None else [p for p in paths if p in _state_dirty]
+        items = [(p, _state_dirty.pop(p)) for p in keys]
+    done = 0
+    for file_path, ent in items:
+        try:
+            _write_state_snapshot(file_path, ent["snapshot"](), ent["durability"], ent["backup"], ent.get("on_written"))
+            done += 1
+        except Exception as e:
+            # RuntimeError = dict changed size during iteration (스캔 스레드 갱신 중), 그 외 디스크 오류 — 모두 재표시
+            if isinstance(e, RuntimeError):
+                _state_flush_stats["retried"] += 1
+            else:
+                _state_flush_stats["errors"] += 1
+                ent["failures"] = ent.get("failures", 0) + 1
+                if ent["failures"] == 1 or ent["failures"] % 30 == 0:
+                    _log_warn_msg(f"⚠️ 상태 저장 실패({ent['failures']}회, 재시도): {os.path.basename(file_path)} ({e})")
+            with _state_dirty_lock:
+                _state_dirty.setdefault(file_path, ent)
+            _state_flush_event.set()
+    _state_flush_stats["flushed"] += done
+    return done
+
+
+def _state_flusher_start() -> None:
+    global _state_flush_thread
+    with _state_dirty_lock:
+        if _state_flush_thread and _state_flush_thread.is_alive():
+            return
+        _state_flush_thread = threading.Thread(target=_state_flusher_loop, name="KIS-StateFlush", daemon=True)
+        _state_flush_thread.start()
+
+
+def _state_flusher_loop() -> None:
+    last = 0.0
+    while True:
+        # 종료 신호 플래그 확인을 위해 0.5초 단위 대기
+        if not _state_flush_event.wait(0.5) and not _state_flush_shutdown["signum"]:
+            continue
+        remain = last + STATE_FLUSH_INTERVAL_SEC - time.time()
+        while remain > 0 and not _state_flush_shutdown["signum"]:
+            time.sleep(min(remain, 0.5))
+            remain = last + STATE_FLUSH_INTERVAL_SEC - time.time()
+        _state_flush_event.clear()
+        last = time.time()
+        try:
+            _flush_dirty_state()
+        except Exception as e:
+            _swallow_exception(e, "state_flusher")
+        signum = _state_flush_shutdown["signum"]
+        if signum:
+            # 핸들러가 이전 처리기로 되돌려 둠 → 같은 신호 재전달로 원래 종료 동작 수행
+            os.kill(os.getpid(), signum)
+            return
+
+
+def _install_state_flush_handlers() -> None:
+    """메인 스레드에서 1회 — 정상 종료·SIGTERM(배포 재시작)·SIGINT 시 남은 dirty 기록.
+    신호 핸들러는 메인 스레드가 _file_lock 등을 잡은 채 끼어들 수 있으므로 잠금·I/O 없이 플래그만 기록하고,
+    플러시 스레드가 기록 후 같은 신호를 다시 보내 원래 동작(종료/KeyboardInterrupt)을 수행."""
+    import atexit
+    import signal as _signal
+    atexit.register(_flush_dirty_state)
+    _state_flusher_start()
+
+    def _make_handler(signum, prev):
+        restore = prev if prev is not None else _signal.SIG_DFL
+        def _handler(sig, frame):
+            _signal.signal(signum, restore)
+            _state_flush_shutdown["signum"] = sig
+        return _handler
+
+    for signum in (_signal.SIGTERM, _signal.SIGINT):
+        try:
+            _signal.signal(signum, _make_handler(signum, _signal.getsignal(signum)))
+        except (ValueError, OSError) as e:
+            _swallow_exception(e, "state_flush_signal")
 def _backup_runtime_json_file(file_path: str, tag: str = "manual") -> str:
     _ensure_dir(_BACKUP_DIR)
     stamp = _now_kst().strftime("%Y%m%d_%H%M%S")
@@ -3731,6 +4214,7 @@ def _handle_reset_stats_command(raw: str):
             f"실행: <code>/reset_stats 확인</code>"
         )
         return
+    _signal_log_export_json(force=True)   # v177.36 #AY: SQLite 최신 상태를 JSON 으로 내보낸 뒤 백업
     backup = _backup_runtime_json_file(SIGNAL_LOG_FILE, tag="reset_stats")
     state = _load_stats_scope_state()
     stamp = _now_kst().strftime("%Y-%m-%d %H:%M:%S")
@@ -3821,12 +4305,164 @@ def _storage_diagnostics_once():
 # v40.0-#7: 메시지 차단 사유 내부 로그 (학습·개선 데이터)
 # ============================================================
 SUPPRESSED_LOG_FILE = _state_path("suppressed_alerts.json")
+# ============================================================
+# 🧩 차단·shadow 기록 JSONL 저널 (v177.37 #AZ)
+# - 일자별 추가 전용 세그먼트 {name}_YYYYMMDD.jsonl — 기록 1건 = 한 줄 append (전체 재작성·정렬 없음)
+# - 최근 N건(차단 500 / shadow 2000)은 메모리 tail(deque)로 유지
+# - 조회는 필요한 일자 세그먼트만 스트리밍 (_iter_today_records / stale replay / watchdog)
+# - 기존 JSON(suppressed_alerts.json / shadow_captures.json)은 첫 로드 시 세그먼트로 1회 이관 후 .migrated
+# ============================================================
+LOG_JOURNAL_DIR = _state_path("log_journal")
+LOG_JOURNAL_KEEP_DAYS = int(os.getenv("LOG_JOURNAL_KEEP_DAYS", "14") or "14")
+
+
+def _new_log_journal(name: str, tail_max: int, legacy_path: str) -> dict:
+    return {
+        "name": name, "legacy": legacy_path, "lock": threading.Lock(),
+        "tail": deque(maxlen=tail_max), "loaded": False, "day": "",
+        "appended": 0, "errors": 0,
+    }
+
+
+_suppressed_journal = _new_log_journal("suppressed_alerts", 500, SUPPRESSED_LOG_FILE)
+_shadow_journal = _new_log_journal("shadow_captures", 2000, SHADOW_CAPTURE_FILE)
+_LOG_JOURNALS = {SUPPRESSED_LOG_FILE: _suppressed_journal, SHADOW_CAPTURE_FILE: _shadow_journal}
+
+
+def _log_journal_path(j: dict, day: str) -> str:
+    return os.path.join(LOG_JOURNAL_DIR, f"{j['name']}_{day}.jsonl")
+
+
+def _log_journal_days(j: dict) -> list:
+    prefix = j["name"] + "_"
+    try:
+        names = os.listdir(LOG_JOURNAL_DIR)
+    except OSError:
+        return []
+    days = []
+    for fn in names:
+        day = fn[len(prefix):-6] if fn.startswith(prefix) and fn.endswith(".jsonl") else ""
+        if len(day) == 8 and day.isdigit():
+            days.append(day)
+    return sorted(days)
+
+
+def _log_journal_read_day(j: dict, day: str):
+    """세그먼트 1개의 (key, rec) 순회 — 비정상 종료로 잘린 마지막 줄은 건너뜀."""
+    try:
+        f = open(_log_journal_path(j, day), encoding="utf-8")
+    except OSError:
+        return
+    with f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except ValueError:
+                continue
+            rec = row.get("rec") if isinstance(row, dict) else None
+            if isinstance(rec, dict):
+                yield str(row.get("key") or ""), rec
+
+
+def _log_journal_record_day(rec: dict) -> str:
+    d = str(rec.get("date") or rec.get("detect_date") or "")
+    if len(d) == 8 and d.isdigit():
+        return d
+    d = str(rec.get("time") or "")[:10].replace("-", "")
+    return d if len(d) == 8 and d.isdigit() else _now_kst().strftime("%Y%m%d")
+
+
+def _log_journal_migrate_legacy(j: dict) -> None:
+    path = j["legacy"]
+    if not os.path.exists(path) or _log_journal_days(j):
+        return
+    data = _read_json_locked(path)
+    rows = sorted(
+        ((str(k), v) for k, v in (data.items() if isinstance(data, dict) else []) if isinstance(v, dict)),
+        key=lambda kv: (str(kv[1].get("time") or ""), kv[0]),
+    )
+    by_day: dict = {}
+    for key, rec in rows:
+        by_day.setdefault(_log_journal_record_day(rec), []).append(
+            json.dumps({"key": key, "rec": rec}, ensure_ascii=False) + "\n"
+        )
+    _ensure_dir(LOG_JOURNAL_DIR)
+    for day, lines in by_day.items():
+        with open(_log_journal_path(j, day), "a", encoding="utf-8") as f:
+            f.writelines(lines)
+    os.replace(path, path + ".migrated")
+    _log_info_msg(f"✅ {j['name']} JSON → JSONL 저널 이관: {len(rows)}건")
+
+
+def _log_journal_load(j: dict) -> None:
+    """lock 보유 상태에서 호출 — 첫 사용 시 레거시 이관 + 최근 세그먼트로 tail 복원."""
+    if j["loaded"]:
+        return
+    j["loaded"] = True
+    try:
+        _log_journal_migrate_legacy(j)
+    except Exception as e:
+        _swallow_exception(e, "log_journal_migrate")
+    tail = j["tail"]
+    chunks = []
+    need = tail.maxlen
+    for day in reversed(_log_journal_days(j)):
+        rows = list(_log_journal_read_day(j, day))
+        chunks.append(rows[-need:])
+        need -= len(chunks[-1])
+        if need <= 0:
+            break
+    for rows in reversed(chunks):
+        tail.extend(rows)
+
+
+def _log_journal_cleanup(j: dict, today: str) -> None:
+    cutoff = (datetime.strptime(today, "%Y%m%d") - timedelta(days=max(1, LOG_JOURNAL_KEEP_DAYS))).strftime("%Y%m%d")
+    for day in _log_journal_days(j):
+        if day < cutoff:
+            try:
+                os.remove(_log_journal_path(j, day))
+            except OSError as e:
+                _swallow_exception(e, "log_journal_cleanup")
+
+
+def _log_journal_append(j: dict, key: str, rec: dict) -> None:
+    line = json.dumps({"key": key, "rec": rec}, ensure_ascii=False) + "\n"
+    today = _now_kst().strftime("%Y%m%d")
+    with j["lock"]:
+        _log_journal_load(j)
+        if j["day"] != today:
+            _ensure_dir(LOG_JOURNAL_DIR)
+            j["day"] = today
+            _log_journal_cleanup(j, today)
+        with open(_log_journal_path(j, today), "a", encoding="utf-8") as f:
+            f.write(line)
+        j["tail"].append((key, rec))
+        j["appended"] += 1
+
+
+def _log_journal_tail(j: dict) -> dict:
+    """최근 tail_max건 {key: rec} (기존 JSON 파일과 같은 모양)."""
+    with j["lock"]:
+        _log_journal_load(j)
+        return dict(j["tail"])
+
+
+def _log_journal_iter(j: dict, days=None, since_day: str = ""):
+    """세그먼트 스트리밍 — days 지정 시 해당 일자만, since_day 지정 시 그 일자 이후만."""
+    with j["lock"]:
+        _log_journal_load(j)
+    wanted = set(days) if days is not None else None
+    for day in _log_journal_days(j):
+        if (wanted is not None and day not in wanted) or (since_day and day < since_day):
+            continue
+        for _key, rec in _log_journal_read_day(j, day):
+            yield day, rec
+
+
 def _log_suppressed_alert(code: str, name: str, reason: str, signal_type: str = "", extra: dict = None):
     """알림 차단 시 내부 로그에 기록 (사용자 알림 없음, 학습용)."""
     try:
-        data = _read_json_locked(SUPPRESSED_LOG_FILE) if os.path.exists(SUPPRESSED_LOG_FILE) else {}
-        if not isinstance(data, dict):
-            data = {}
         now_s = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         key = f"{code}_{datetime.now().strftime('%Y%m%d%H%M%S')}"
         entry = {
@@ -3835,13 +4471,7 @@ def _log_suppressed_alert(code: str, name: str, reason: str, signal_type: str =
         }
         if extra and isinstance(extra, dict):
             entry.update(extra)
-        data[key] = entry
-        # 최대 500건 유지
-        if len(data) > 500:
-            sorted_keys = sorted(data.keys())
-            for old_k in sorted_keys[:len(data) - 500]:
-                data.pop(old_k, None)
-        _write_json_atomic(SUPPRESSED_LOG_FILE, data, indent=2)
+        _log_journal_append(_suppressed_journal, key, entry)  # v177.37 #AZ: 한 줄 append (최근 500건 tail)
         _log_info_msg(f"  🚫 차단: {name}({code}) — {reason}")
     except Exception as e:
         _log_warn_msg(f"⚠️ 차단 로그 기록 오류: {e}")
@@ -3993,13 +4623,9 @@ def load_stale_replay_penalty_profile() -> dict:
         _log_warn_msg(f"⚠️ stale replay penalty 로드 오류: {e}")
         _stale_replay_penalty_profile = {"generated_date": "", "code_penalty": {}, "theme_penalty": {}, "source_dates": [], "date_pressure": {}}
     return _stale_replay_penalty_profile
-def _load_stale_replay_penalty_sources() -> tuple[dict, dict]:
+def _load_stale_replay_penalty_sources() -> dict:
     raw_audit = _read_json_locked(SELF_AUDIT_FILE) if os.path.exists(SELF_AUDIT_FILE) else {}
-    raw_shadow = _read_json_locked(SHADOW_CAPTURE_FILE) if os.path.exists(SHADOW_CAPTURE_FILE) else {}
-    return (
-        raw_audit if isinstance(raw_audit, dict) else {},
-        raw_shadow if isinstance(raw_shadow, dict) else {},
-    )
+    return raw_audit if isinstance(raw_audit, dict) else {}
 def _collect_stale_replay_date_pressure(raw_audit: dict, lookback_days: int) -> tuple[dict, list[str]]:
     audit_rows = [v for v in raw_audit.values() if isinstance(v, dict)]
     audit_rows.sort(key=lambda x: str(x.get("date", "")))
@@ -4026,12 +4652,11 @@ def _collect_stale_replay_date_pressure(raw_audit: dict, lookback_days: int) ->
     if lookback_days > 0:
         source_dates = source_dates[-lookback_days:]
     return date_pressure, source_dates
-def _collect_stale_replay_penalty_rows(raw_shadow: dict, date_pressure: dict) -> tuple[dict, dict]:
+def _collect_stale_replay_penalty_rows(date_pressure: dict) -> tuple[dict, dict]:
     code_rows: dict[str, dict] = {}
     theme_rows: dict[str, dict] = {}
-    for rec in raw_shadow.values():
-        if not isinstance(rec, dict):
-            continue
+    # v177.37 #AZ: pressure 일자 shadow 세그먼트만 스트리밍
+    for _day, rec in _log_journal_iter(_shadow_journal, days=list(date_pressure)):
         date_key = str(rec.get("date", "") or "")
         if not date_key or date_key not in date_pressure:
             continue
@@ -4107,9 +4732,9 @@ def _build_stale_replay_penalty_payload(date_pressure: dict, source_dates: list[
 def _build_stale_replay_penalty_profile(lookback_days: int | None = None) -> dict:
     lookback_days = int(lookback_days or STALE_REPLAY_LOOKBACK_DAYS or 5)
     try:
-        raw_audit, raw_shadow = _load_stale_replay_penalty_sources()
+        raw_audit = _load_stale_replay_penalty_sources()
         date_pressure, source_dates = _collect_stale_replay_date_pressure(raw_audit, lookback_days)
-        code_rows, theme_rows = _collect_stale_replay_penalty_rows(raw_shadow, date_pressure)
+        code_rows, theme_rows = _collect_stale_replay_penalty_rows(date_pressure)
         payload = _build_stale_replay_penalty_payload(date_pressure, source_dates, code_rows, theme_rows)
         _write_json_atomic(STALE_REPLAY_PENALTY_FILE, payload, indent=2)
         load_stale_replay_penalty_profile()
@@ -4139,11 +4764,7 @@ def _load_intraday_stale_shadow_counts(force: bool = False) -> dict:
     codes = {}
     themes = {}
     try:
-        obj = _read_json_locked(SHADOW_CAPTURE_FILE) if os.path.exists(SHADOW_CAPTURE_FILE) else {}
-        obj = obj if isinstance(obj, dict) else {}
-        for rec in obj.values():
-            if not isinstance(rec, dict):
-                continue
+        for rec in _iter_today_records(SHADOW_CAPTURE_FILE, today):  # v177.37 #AZ: 당일 세그먼트만
             if str(rec.get("date", "") or "") != today:
                 continue
             sig = str(rec.get("signal_type", "") or "").upper()
@@ -4316,7 +4937,7 @@ def _load_tracking_priority_hints(force: bool = False) -> dict:
         return cache.get("rows") or {}
     rows: dict = {}
     try:
-        data = _read_json_locked(SIGNAL_LOG_FILE) if os.path.exists(SIGNAL_LOG_FILE) else {}
+        data = _signal_log_read()
     except Exception as e:
         _swallow_exception(e)  # v105 structured silent-exception log
         data = {}
@@ -5112,9 +5733,6 @@ def _apply_stale_pullback_quota(alerts: list, stage: str = "") -> list:
 def _record_shadow_capture(code: str, name: str, reason: str, signal_type: str = "", stage: str = "", extra: dict | None = None):
     """외부 알림/실행으로 이어지지 못한 강세 후보를 내부 shadow 기록으로 남긴다."""
     try:
-        data = _read_json_locked(SHADOW_CAPTURE_FILE) if os.path.exists(SHADOW_CAPTURE_FILE) else {}
-        if not isinstance(data, dict):
-            data = {}
         now = _now_kst()
         key = f"{normalize_stock_code(code) or code}_{now.strftime('%Y%m%d%H%M%S%f')}"
         rec = {
@@ -5129,15 +5747,18 @@ def _record_shadow_capture(code: str, name: str, reason: str, signal_type: str =
         }
         if isinstance(extra, dict):
             rec.update(extra)
-        data[key] = rec
-        if len(data) > 2000:
-            for old_k in sorted(data.keys())[:len(data) - 2000]:
-                data.pop(old_k, None)
-        _write_json_atomic(SHADOW_CAPTURE_FILE, data, indent=2)
+        _log_journal_append(_shadow_journal, key, rec)  # v177.37 #AZ: 한 줄 append (최근 2000건 tail)
     except Exception as e:
         _log_warn_msg(f"⚠️ shadow capture 기록 오류: {e}")
 def _iter_today_records(path: str, date_key: str) -> list:
     try:
+        journal = _LOG_JOURNALS.get(path)
+        if journal is not None:
+            # v177.37 #AZ: 해당 일자 세그먼트만 스트리밍 (date 없는 차단 기록은 세그먼트 일자 기준)
+            return [
+                rec for day, rec in _log_journal_iter(journal, days=[date_key])
+                if str(rec.get("date") or rec.get("detect_date") or day) == date_key
+            ]
         obj = _read_json_locked(path) if os.path.exists(path) else {}
         if not isinstance(obj, dict):
             return []
@@ -5163,7 +5784,7 @@ def _load_daily_self_audit_leaders(stage: str) -> list:
             uniq.append(row)
     return uniq[:15]
 def _load_daily_self_audit_detected(today: str) -> dict:
-    signal_log = _read_json_locked(SIGNAL_LOG_FILE) if os.path.exists(SIGNAL_LOG_FILE) else {}
+    signal_log = _signal_log_read()
     signal_log = signal_log if isinstance(signal_log, dict) else {}
     today_detected = {}
     for rec in signal_log.values():
@@ -5773,12 +6394,13 @@ def _watchdog_collect_block_reasons(since_ts: float) -> dict:
     """shadow_capture에서 since_ts 이후 차단 사유 집계"""
     counts: dict = {}
     try:
-        data = _read_json_safe(SHADOW_CAPTURE_FILE, {})
-        if not isinstance(data, dict):
-            return counts
-        for rec in data.values():
-            if not isinstance(rec, dict):
-                continue
+        # v177.37 #AZ: 메모리 tail이 since_ts 이전까지 덮으면 tail만, 아니면 세그먼트 스트리밍
+        recent = list(_log_journal_tail(_shadow_journal).values())
+        since_s = datetime.fromtimestamp(since_ts).strftime("%Y-%m-%d %H:%M:%S")
+        if len(recent) >= _shadow_journal["tail"].maxlen and str(recent[0].get("time") or "") >= since_s:
+            since_day = datetime.fromtimestamp(since_ts - 86400).strftime("%Y%m%d")  # 서버 TZ 여유 1일
+            recent = (rec for _day, rec in _log_journal_iter(_shadow_journal, since_day=since_day))
+        for rec in recent:
             try:
                 rec_ts = datetime.strptime(
                     str(rec.get("time") or ""), "%Y-%m-%d %H:%M:%S"
@@ -6072,7 +6694,7 @@ def _purge_stale_entry_watch_hits(notify: bool = False) -> int:
         return 0
     try:
         now_ts = time.time()
-        siglog_data = _read_json_safe(SIGNAL_LOG_FILE, {})
+        siglog_data = _signal_log_read()
         latest_by_code = _build_latest_tracking_by_code(siglog_data)
         today_str = datetime.now().strftime("%Y%m%d")
         purged = []
@@ -7759,7 +8381,7 @@ def _collect_and_save_today_sector_results() -> dict:
     global _today_sector_results
     try:
         today = _now_kst().strftime("%Y%m%d")
-        siglog = _read_json_safe(SIGNAL_LOG_FILE, {})
+        siglog = _signal_log_read()
         sector_map: dict = {}
         for rec in siglog.values():
             if not isinstance(rec, dict):
@@ -8047,6 +8669,7 @@ _token_expires      = 0
 _session            = requests.Session()
 _session.headers.update({"User-Agent": "Mozilla/5.0"})
 KIS_TOKEN_STATE_FILE = _state_path("kis_token_state.json")
+KIS_REST_LIMIT_STATE_FILE = _state_path("kis_rest_limit.json")   # AIMD 학습 한도 (토큰 상태와 분리 — write-behind 기록이 토큰을 덮지 않도록)
 KIS_TOKEN_RETRY_BLOCK_SEC = int(os.getenv("KIS_TOKEN_RETRY_BLOCK_SEC", "65") or "65")
 _kis_token_retry_block_until = 0.0
 # 디버그: 어떤 KIS 서버로 붙는지 1회 출력(환경 혼동 방지)
@@ -8188,6 +8811,9 @@ _sector_first_react_ts: dict = {}
 # 섹터별 VI 발동 순서 (sector_key → [{code, name, vi_price, ts}])
 # vi_price > 0 이 기록될 때마다 순서대로 쌓음
 _vi_sector_tracker: dict = {}
+# 당일 VI 틱 처리한 종목 (틱 워커 중복 조회 방지) / 백그라운드 종목명·업종 조회 진행 중
+_vi_tick_seen: dict = {"date": "", "codes": set()}
+_vi_lookup_pending: set = set()
 # 코스피 등락 스냅샷 — 장중 시간별 기록 [(ts, kospi_chg), ...]
 # 회복력(Recovery) 계산용: 지수 하락 구간에서 개별 종목 등락을 비교
 _index_dip_snapshots: list = []
@@ -8555,29 +9181,181 @@ def _get_time_risk_profile() -> str:
 # ============================================================
 # 🔐 KIS API
 # ============================================================
+# v177.21 #AJ: AIMD 적응형 REST 한도 — 서버 초당 제한(EGW00201) 응답 시 곱셈 감소,
+# 제한 없이 KIS_AIMD_PROBE_SEC 경과 + 그 사이 1초 윈도우가 현재 한도까지 찼을 때만 +1 가산 탐색
+# (최근 제한 응답 한도 ceiling 미만까지, KIS_AIMD_CEILING_HOLD_SEC 지나면 해제). 학습 한도는 kis_rest_limit.json에 보존.
+# 하한은 설정 KIS_REST_LIMIT_PER_SEC를 넘지 않음 (제한 응답이 오히려 한도를 올리지 않도록).
+KIS_REST_LIMIT_MIN = max(1, min(int(os.getenv("KIS_REST_LIMIT_MIN", "4") or "4"), int(KIS_REST_LIMIT_PER_SEC or 1)))
+KIS_REST_LIMIT_MAX = max(KIS_REST_LIMIT_MIN, int(os.getenv("KIS_REST_LIMIT_MAX", "20") or "20"))
+KIS_AIMD_DECREASE = float(os.getenv("KIS_AIMD_DECREASE", "0.7") or "0.7")
+KIS_AIMD_PROBE_SEC = float(os.getenv("KIS_AIMD_PROBE_SEC", "30") or "30")
+KIS_AIMD_CEILING_HOLD_SEC = float(os.getenv("KIS_AIMD_CEILING_HOLD_SEC", "600") or "600")
+KIS_AIMD_ENABLED = os.getenv("KIS_AIMD_ENABLED", "true").strip().lower() in ("true", "1", "yes")
+_KIS_RATE_LIMIT_CODES = ("EGW00201",)
+_kis_aimd_state = {
+    "limit": float(KIS_REST_LIMIT_PER_SEC),
+    "ceiling": 0.0,             # 최근 제한 응답을 받은 한도 (탐색 상한 참고)
+    "last_throttle_ts": 0.0,
+    "last_probe_ts": time.monotonic(),
+    "saturated_ts": 0.0,        # 1초 윈도우가 현재 한도까지 찬 마지막 시각 (_wait_for_kis_rest_slot)
+    "throttle_events": 0,
+    "loaded": False,
+    "saved_ts": 0.0,
+}
+def _kis_effective_rest_limit() -> int:
+    if not KIS_AIMD_ENABLED:
+        return max(1, int(KIS_REST_LIMIT_PER_SEC or 1))
+    st = _kis_aimd_state
+    learned = 0.0
+    if not st["loaded"]:
+        try:   # 파일 읽기는 잠금 밖, 반영은 잠금 안에서 1회만
+            learned = _load_kis_rest_limit_learned()
+        except Exception as e:
+            _swallow_exception(e)
+    probed = False
+    with _kis_rate_lock:   # _kis_note_rate_limited 감소와 동시 가산/덮어쓰기 방지
+        if not st["loaded"]:
+            st["loaded"] = True
+            if learned > 0:
+                st["limit"] = max(KIS_REST_LIMIT_MIN, min(KIS_REST_LIMIT_MAX, learned))
+        now = time.monotonic()
+        if now - max(st["last_probe_ts"], st["last_throttle_ts"]) >= KIS_AIMD_PROBE_SEC:
+            if st["ceiling"] and now - st["last_throttle_ts"] >= KIS_AIMD_CEILING_HOLD_SEC:
+                st["ceiling"] = 0.0
+            cap = float(KIS_REST_LIMIT_MAX)
+            if st["ceiling"]:
+                cap = min(cap, max(float(KIS_REST_LIMIT_MIN), st["ceiling"] - 1.0))
+            # 트래픽 없이 시간만 지난 경우(윈도우 미포화)는 증거 없음 → 탐색 보류
+            if st["saturated_ts"] > st["last_probe_ts"] and st["limit"] < cap:
+                st["limit"] = min(cap, st["limit"] + 1.0)
+                st["last_probe_ts"] = now
+                probed = True
+        limit = st["limit"]
+    if probed:
+        _persist_kis_rest_limit()
+    return max(1, int(limit))
+def _kis_note_rate_limited() -> None:
+    """서버 초당 제한 응답 → 한도 곱셈 감소 + 1초 윈도우 비우기."""
+    st = _kis_aimd_state
+    with _kis_rate_lock:
+        now = time.monotonic()
+        if now - st["last_throttle_ts"] < 1.0:
+            return   # 같은 윈도우 연속 응답은 1회만 감소
+        st["ceiling"] = st["limit"]
+        st["limit"] = max(float(KIS_REST_LIMIT_MIN), st["limit"] * KIS_AIMD_DECREASE)
+        st["last_throttle_ts"] = now
+        st["throttle_events"] += 1
+        prev_limit, new_limit = st["ceiling"], st["limit"]
+    _log_warn_msg(f"⚠️ KIS 초당 제한 응답 → REST 한도 {prev_limit:.1f}→{new_limit:.1f}/s")
+    _persist_kis_rest_limit(force=True)
+def _is_kis_rate_limit_body(text: str) -> bool:
+    body = str(text or "")
+    return any(code in body for code in _KIS_RATE_LIMIT_CODES) or "초당 거래건수" in body
+def _load_kis_rest_limit_learned() -> float:
+    """학습 한도 읽기 — 전용 파일 없으면 이전 버전(kis_token_state.json rest_limit_learned) 값 사용."""
+    state = _read_json_locked(KIS_REST_LIMIT_STATE_FILE, default={})
+    if not isinstance(state, dict) or "rest_limit_learned" not in state:
+        state = _load_kis_token_state()
+    return float(state.get("rest_limit_learned") or 0)
+def _kis_rest_limit_state_snapshot() -> dict:
+    """전용 파일 전체를 메모리 값으로 구성 — 파일 재읽기 없이 기록 (다른 상태와 읽기-수정-쓰기 경합 없음)."""
+    return {
+        "rest_limit_learned": round(float(_kis_aimd_state["limit"]), 2),
+        "rest_limit_saved_at": int(time.time()),
+    }
+def _persist_kis_rest_limit(force: bool = False) -> None:
+    """학습 한도 보존 — REST 슬롯 대기 경로에서 호출되므로 기록은 write-behind 스레드에 위임."""
+    st = _kis_aimd_state
+    now = time.time()
+    if not force and now - st["saved_ts"] < 300:
+        return
+    st["saved_ts"] = now
+    try:
+        _mark_state_dirty(KIS_REST_LIMIT_STATE_FILE, _kis_rest_limit_state_snapshot, backup=False)
+    except Exception as e:
+        _swallow_exception(e)
+# v177.20 #AI: KIS REST 우선순위 레인 — critical(진입감시/추적 청산) > scan > background(대시보드/장전섹터)
+# 레인별 1초 윈도우 점유 상한(비율)과 상위 레인 대기 시 하위 레인 양보(preemption)로 경합 시 하위부터 감속.
+KIS_LANES = ("critical", "scan", "background")
+KIS_LANE_SHARE = {
+    "critical": 1.0,
+    "scan": float(os.getenv("KIS_LANE_SCAN_SHARE", "0.85") or "0.85"),
+    "background": float(os.getenv("KIS_LANE_BACKGROUND_SHARE", "0.5") or "0.5"),
+}
+_kis_lane_local = threading.local()
+_kis_lane_waiting = {lane: 0 for lane in KIS_LANES}
+_kis_lane_stats = {lane: {"calls": 0, "wait_events": 0, "wait_sec": 0.0, "max_wait_sec": 0.0} for lane in KIS_LANES}
+def _current_kis_lane() -> str:
+    lane = getattr(_kis_lane_local, "lane", "") or "scan"
+    return lane if lane in KIS_LANES else "scan"
+def _with_kis_lane(lane: str):
+    """함수 실행 동안 현재 스레드의 KIS REST 레인을 지정하는 데코레이터."""
+    def _decorator(fn):
+        def _wrapped(*args, **kwargs):
+            prev = getattr(_kis_lane_local, "lane", "")
+            _kis_lane_local.lane = lane
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _kis_lane_local.lane = prev
+        _wrapped.__name__ = fn.__name__
+        _wrapped.__doc__ = fn.__doc__
+        return _wrapped
+    return _decorator
+def get_kis_lane_stats() -> dict:
+    with _kis_rate_lock:
+        return {lane: dict(v, waiting=_kis_lane_waiting.get(lane, 0)) for lane, v in _kis_lane_stats.items()}
 def _wait_for_kis_rest_slot(kind: str = "rest") -> None:
-    """실전 KIS REST burst를 1초 윈도우 내부 상한으로 평탄화한다."""
-    limit = KIS_TOKEN_LIMIT_PER_SEC if kind == "token" else KIS_REST_LIMIT_PER_SEC
+    """실전 KIS REST burst를 1초 윈도우 내부 상한으로 평탄화한다.
+    v177.20: REST는 호출 스레드 레인(_current_kis_lane) 기준 우선순위 적용."""
+    limit = KIS_TOKEN_LIMIT_PER_SEC if kind == "token" else _kis_effective_rest_limit()
     limit = max(1, int(limit or 1))
     window = 1.0
     min_sleep = 0.01
     dq = _kis_token_call_times if kind == "token" else _kis_rest_call_times
     stat_wait_key = "token_wait_sec" if kind == "token" else "rest_wait_sec"
     stat_evt_key = "token_wait_events" if kind == "token" else "rest_wait_events"
-    while True:
-        sleep_for = 0.0
-        with _kis_rate_lock:
-            now = time.monotonic()
-            while dq and now - dq[0] >= window:
-                dq.popleft()
-            if len(dq) < limit:
-                dq.append(now)
-                return
-            oldest = dq[0] if dq else now
-            sleep_for = max(min_sleep, window - (now - oldest) + 0.005)
-            _kis_rate_stats[stat_evt_key] = int(_kis_rate_stats.get(stat_evt_key, 0)) + 1
-            _kis_rate_stats[stat_wait_key] = float(_kis_rate_stats.get(stat_wait_key, 0.0)) + float(sleep_for)
-        time.sleep(sleep_for)
+    lane = _current_kis_lane() if kind != "token" else ""
+    lane_rank = KIS_LANES.index(lane) if lane else 0
+    lane_cap = max(1, int(limit * max(0.0, min(1.0, KIS_LANE_SHARE.get(lane, 1.0))))) if lane else limit
+    started = time.monotonic()
+    waiting = False
+    try:
+        while True:
+            sleep_for = 0.0
+            with _kis_rate_lock:
+                now = time.monotonic()
+                while dq and now - dq[0] >= window:
+                    dq.popleft()
+                if kind != "token" and len(dq) + 1 >= limit:
+                    _kis_aimd_state["saturated_ts"] = now   # AIMD 탐색 근거: 현재 한도까지 수요 도달
+                higher_waiting = bool(lane) and any(_kis_lane_waiting[l] > 0 for l in KIS_LANES[:lane_rank])
+                if len(dq) < lane_cap and not higher_waiting:
+                    dq.append(now)
+                    if lane:
+                        waited = now - started
+                        st = _kis_lane_stats[lane]
+                        st["calls"] += 1
+                        if waited > 0:
+                            st["wait_sec"] = round(st["wait_sec"] + waited, 4)
+                            st["max_wait_sec"] = max(st["max_wait_sec"], round(waited, 4))
+                    return
+                if lane and not waiting:
+                    waiting = True
+                    _kis_lane_waiting[lane] += 1
+                    _kis_lane_stats[lane]["wait_events"] += 1
+                oldest = dq[0] if dq else now
+                if higher_waiting and len(dq) < lane_cap:
+                    sleep_for = min_sleep * 2   # 상위 레인 양보 후 재확인
+                else:
+                    sleep_for = max(min_sleep, window - (now - oldest) + 0.005)
+                _kis_rate_stats[stat_evt_key] = int(_kis_rate_stats.get(stat_evt_key, 0)) + 1
+                _kis_rate_stats[stat_wait_key] = float(_kis_rate_stats.get(stat_wait_key, 0.0)) + float(sleep_for)
+            time.sleep(sleep_for)
+    finally:
+        if waiting:
+            with _kis_rate_lock:
+                _kis_lane_waiting[lane] = max(0, _kis_lane_waiting[lane] - 1)
 def _load_kis_token_state() -> dict:
     state = _read_json_locked(KIS_TOKEN_STATE_FILE, default={})
     return state if isinstance(state, dict) else {}
@@ -8633,10 +9411,14 @@ def _restore_kis_token_from_state() -> str:
     _token_expires = expires_at
     _log_info_msg(f"♻️ KIS 토큰 캐시 복원 ({datetime.now().strftime('%H:%M:%S')})")
     return token
+def _is_local_kis_base_url(url: str) -> bool:
+    """v177.22: kis_replay_server.py 등 로컬 대체 서버(http://127.0.0.1, http://localhost)."""
+    u = str(url or "")
+    return u.startswith("http://127.0.0.1") or u.startswith("http://localhost")
 def _validate_kis_oauth_config() -> None:
     if not KIS_APP_KEY or not KIS_APP_SECRET:
         raise RuntimeError("KIS_APP_KEY 또는 KIS_APP_SECRET 누락")
-    if not KIS_BASE_URL.startswith("https://"):
+    if not KIS_BASE_URL.startswith("https://") and not _is_local_kis_base_url(KIS_BASE_URL):
         raise RuntimeError(f"KIS_BASE_URL 형식 오류: {KIS_BASE_URL}")
 def _kis_http_error_body_snippet(resp) -> str:
     try:
@@ -8709,16 +9491,227 @@ def _headers(tr_id: str) -> dict:
             "Authorization":f"Bearer {get_token()}",
             "appkey":KIS_APP_KEY,"appsecret":KIS_APP_SECRET,
             "tr_id":tr_id,"custtype":"P"}
+# v177.19 #AH: TR별 응답 캐시 — tr_id + 정규화 params 키, TR별 TTL 선언형 정책
+# 값: 초(float) 또는 "session"(다음 KRX 세션 경계 09:00/15:30까지). 0/미등록 TR은 캐시 안 함.
+# KIS_TR_CACHE_TTL_JSON='{"FHKST01010100": 1, "FHPST01700000": 30}' 로 TR별 재정의.
+# "session" 일봉이라도 정규장 중 당일(미확정) 봉이 포함된 응답은 KIS_TR_CACHE_LIVE_BAR_TTL_SEC만 캐시.
+KIS_TR_CACHE_LIVE_BAR_TTL_SEC = float(os.getenv("KIS_TR_CACHE_LIVE_BAR_TTL_SEC", "20") or "20")
+KIS_TR_CACHE_ENABLED = os.getenv("KIS_TR_CACHE_ENABLED", "true").strip().lower() in ("true", "1", "yes")
+KIS_TR_CACHE_MAX_ENTRIES = int(os.getenv("KIS_TR_CACHE_MAX_ENTRIES", "4000") or "4000")
+KIS_TR_CACHE_TTL = {
+    # 시세
+    "FHKST01010100": 2,        # inquire-price
+    "FHKST11300006": 2,        # intstock-multprice
+    "FHKST01010200": 2,        # inquire-asking-price-exp-ccn
+    # 랭킹
+    "FHPST01700000": 15,       # ranking/fluctuation
+    "FHPST01710000": 15,       # quotations/volume-rank
+    "FHPST01680000": 15,       # ranking/volume-power
+    "FHPST01870000": 15,       # ranking/near-new-highlow
+    "FHPST01820000": 15,       # ranking/exp-trans-updown
+    "FHPST02340000": 15,       # ranking/overtime-fluctuation
+    "FHPST02350000": 15,       # ranking/overtime-volume
+    "FHKST130000C0": 15,       # capture-uplowprice
+    # 일봉
+    "FHKST03010100": "session",  # inquire-daily-itemchartprice
+    # 기본정보
+    "CTPF1002R": 86400,        # search-stock-info
+}
+try:
+    _ttl_override = json.loads(os.getenv("KIS_TR_CACHE_TTL_JSON", "") or "{}")
+    if isinstance(_ttl_override, dict):
+        KIS_TR_CACHE_TTL.update({str(k): v for k, v in _ttl_override.items()})
+except Exception as _ttl_e:
+    _log_warn_msg(f"⚠️ KIS_TR_CACHE_TTL_JSON 파싱 실패 → 기본 정책 사용 ({_ttl_e})")
+_kis_tr_cache: dict = {}   # key → {"expires": ts, "value": (data, status, ct, body)}
+_kis_tr_cache_lock = threading.Lock()
+_kis_tr_cache_stats: dict = defaultdict(lambda: {"hit": 0, "miss": 0})
+def _kis_next_session_boundary_ts(now: datetime | None = None) -> float:
+    now = now or _now_kst()
+    for hh, mm in ((9, 0), (15, 30)):
+        b = now.replace(hour=hh, minute=mm, second=0, microsecond=0)
+        if b > now:
+            return b.timestamp()
+    nxt = (now + timedelta(days=1)).replace(hour=9, minute=0, second=0, microsecond=0)
+    return nxt.timestamp()
+def _kis_response_has_live_bar(data, now: datetime) -> bool:
+    """정규장(09:00~15:30) 중 응답 output2에 오늘 날짜 봉이 있으면 True (장중 계속 바뀌는 봉)."""
+    if not (dtime(9, 0) <= now.time() < dtime(15, 30)):
+        return False
+    rows = data.get("output2") if isinstance(data, dict) else None
+    if not isinstance(rows, list):
+        return False
+    today = now.strftime("%Y%m%d")
+    return any(isinstance(r, dict) and r.get("stck_bsop_date") == today for r in rows)
+def _kis_tr_cache_expires_at(tr_id: str, data=None) -> float:
+    policy = KIS_TR_CACHE_TTL.get(str(tr_id or ""))
+    if policy == "session":
+        now = _now_kst()
+        if _kis_response_has_live_bar(data, now):
+            return time.time() + KIS_TR_CACHE_LIVE_BAR_TTL_SEC if KIS_TR_CACHE_LIVE_BAR_TTL_SEC > 0 else 0.0
+        return _kis_next_session_boundary_ts(now)
+    try:
+        ttl = float(policy or 0)
+    except Exception:
+        ttl = 0.0
+    return time.time() + ttl if ttl > 0 else 0.0
+def _kis_tr_cache_get(key: tuple):
+    tr_id = key[0]
+    if not KIS_TR_CACHE_ENABLED or not KIS_TR_CACHE_TTL.get(tr_id):
+        return None
+    with _kis_tr_cache_lock:
+        ent = _kis_tr_cache.get(key)
+        if ent and ent["expires"] > time.time():
+            _kis_tr_cache_stats[tr_id]["hit"] += 1
+            value = ent["value"]
+        else:
+            if ent:
+                _kis_tr_cache.pop(key, None)
+            _kis_tr_cache_stats[tr_id]["miss"] += 1
+            return None
+    import copy
+    return copy.deepcopy(value)
+def _kis_tr_cache_put(key: tuple, value: tuple) -> None:
+    if not KIS_TR_CACHE_ENABLED:
+        return
+    data, status = value[0], value[1]
+    if status != 200 or not isinstance(data, dict) or not data:
+        return
+    if str(data.get("rt_cd", "0") or "0") != "0":
+        return
+    expires = _kis_tr_cache_expires_at(key[0], data)
+    if expires <= time.time():
+        return
+    with _kis_tr_cache_lock:
+        if len(_kis_tr_cache) >= KIS_TR_CACHE_MAX_ENTRIES:
+            now_ts = time.time()
+            for k in [k for k, v in _kis_tr_cache.items() if v["expires"] <= now_ts]:
+                _kis_tr_cache.pop(k, None)
+            if len(_kis_tr_cache) >= KIS_TR_CACHE_MAX_ENTRIES:
+                for k, _v in sorted(_kis_tr_cache.items(), key=lambda kv: kv[1]["expires"])[:max(1, KIS_TR_CACHE_MAX_ENTRIES // 10)]:
+                    _kis_tr_cache.pop(k, None)
+        _kis_tr_cache[key] = {"expires": expires, "value": value}
+def _kis_tr_cache_invalidate(tr_id: str | None = None) -> None:
+    with _kis_tr_cache_lock:
+        if tr_id is None:
+            _kis_tr_cache.clear()
+            return
+        for k in [k for k in _kis_tr_cache if k[0] == tr_id]:
+            _kis_tr_cache.pop(k, None)
+def get_kis_tr_cache_stats() -> dict:
+    """TR별 hit/miss 카운터 + 전체 hit율."""
+    with _kis_tr_cache_lock:
+        per_tr = {tr: dict(v) for tr, v in _kis_tr_cache_stats.items()}
+        entries = len(_kis_tr_cache)
+    hits = sum(v["hit"] for v in per_tr.values())
+    misses = sum(v["miss"] for v in per_tr.values())
+    return {"entries": entries, "hit": hits, "miss": misses,
+            "hit_rate": round(hits / (hits + misses), 3) if (hits + misses) else 0.0, "per_tr": per_tr}
+# v177.18 #AG: 동일 요청(single-flight) 병합 — tr_id+URL+params가 같은 요청이 진행 중이면
+# 새 REST 호출 없이 선행 요청 결과를 공유 (대시보드/VI/스캔/리더 잡 동시 조회 중복 제거)
+KIS_SINGLE_FLIGHT_ENABLED = os.getenv("KIS_SINGLE_FLIGHT_ENABLED", "true").strip().lower() in ("true", "1", "yes")
+_kis_inflight: dict = {}
+_kis_inflight_lock = threading.Lock()
+_kis_single_flight_stats = {"leader": 0, "coalesced": 0, "lane_split": 0}
+def _kis_request_key(url: str, tr_id: str, params: dict | None) -> tuple:
+    items = tuple(sorted((str(k), str(v)) for k, v in (params or {}).items()))
+    return (str(tr_id or ""), str(url or ""), items)
 def _safe_get(url: str, tr_id: str, params: dict, *, return_meta: bool = False):
     """v38.3-P1-8: KIS GET with retry/backoff. Never raises.
     return_meta=True → (data, status, ct, body_snippet) 4-tuple.
     return_meta=False(기본) → dict만 반환.
-    """
+    v177.18: 동일 요청이 진행 중이면 그 결과를 복사해 반환 (호출 1회로 병합).
+    v177.19: KIS_TR_CACHE_TTL 정책 TR은 유효 캐시를 먼저 반환.
+    """
+    cache_key = _kis_request_key(url, tr_id, params)
+    cached = _kis_tr_cache_get(cache_key)
+    if cached is not None:
+        return cached if return_meta else cached[0]
+    if not KIS_SINGLE_FLIGHT_ENABLED:
+        return _safe_get_cached_call(cache_key, url, tr_id, params, return_meta=return_meta)
+    # return_meta 여부에 따라 재시도 정책이 다르므로 키에 포함
+    key = cache_key + (bool(return_meta),)
+    lane_rank = KIS_LANES.index(_current_kis_lane())
+    with _kis_inflight_lock:
+        slot = _kis_inflight.get(key)
+        # 상위 레인은 하위 레인 선행 요청에 합류하지 않음 (하위 레인 속도로 대기하는 우선순위 역전 방지)
+        # → 새 선행 요청이 되어 이후 후행 요청은 상위 레인 요청에 합류
+        leader = slot is None or lane_rank < slot["rank"]
+        if leader:
+            if slot is not None:
+                _kis_single_flight_stats["lane_split"] += 1
+            slot = {"event": threading.Event(), "result": None, "rank": lane_rank}
+            _kis_inflight[key] = slot
+            _kis_single_flight_stats["leader"] += 1
+        else:
+            _kis_single_flight_stats["coalesced"] += 1
+    if leader:
+        result = None
+        try:
+            result = _safe_get_cached_call(cache_key, url, tr_id, params, return_meta=return_meta)
+            return result
+        finally:
+            slot["result"] = result
+            with _kis_inflight_lock:
+                if _kis_inflight.get(key) is slot:
+                    _kis_inflight.pop(key, None)
+            slot["event"].set()
+    slot["event"].wait(timeout=60)
+    result = slot.get("result")
+    if result is None:
+        return _safe_get_uncoalesced(url, tr_id, params, return_meta=return_meta)
+    import copy
+    return copy.deepcopy(result)
+# v177.22 #AK: 기록 모드 — KIS_RECORD_DIR 지정 시 REST 응답/WebSocket 프레임을 일자별 JSONL로 저장
+# kis_replay_server.py가 같은 디렉터리를 읽어 KIS_BASE_URL/WS_URL 대체 서버로 재생 (오프라인 벤치마크)
+KIS_RECORD_DIR = os.getenv("KIS_RECORD_DIR", "").strip()
+_kis_record_lock = threading.Lock()
+def _kis_record_append(kind: str, row: dict) -> None:
+    if not KIS_RECORD_DIR:
+        return
+    try:
+        row = dict(row, ts=round(time.time(), 4))
+        line = json.dumps(row, ensure_ascii=False) + "\n"
+        path = os.path.join(KIS_RECORD_DIR, f"{kind}_{_now_kst().strftime('%Y%m%d')}.jsonl")
+        with _kis_record_lock:
+            os.makedirs(KIS_RECORD_DIR, exist_ok=True)
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(line)
+    except Exception as e:
+        _swallow_exception(e, "kis_record")
+def _kis_session_get(url: str, tr_id: str, params: dict):
+    """KIS REST GET 단일 시도 (기록 모드면 응답·지연시간 저장)."""
+    started = time.monotonic()
+    resp = _session.get(url, headers=_headers(tr_id), params=params, timeout=15)
+    if KIS_RECORD_DIR:
+        _kis_record_append("rest", {
+            "tr_id": tr_id,
+            "path": requests.utils.urlparse(url).path,
+            "params": {str(k): str(v) for k, v in (params or {}).items()},
+            "status": getattr(resp, "status_code", None),
+            "content_type": ((getattr(resp, "headers", {}) or {}).get("Content-Type", "") or ""),
+            "latency_ms": int((time.monotonic() - started) * 1000),
+            "body": getattr(resp, "text", "") or "",
+        })
+    return resp
+def _safe_get_cached_call(cache_key: tuple, url: str, tr_id: str, params: dict, *, return_meta: bool = False):
+    result = _safe_get_uncoalesced(url, tr_id, params, return_meta=return_meta)
+    try:
+        if return_meta:
+            _kis_tr_cache_put(cache_key, result)
+        elif result:
+            _kis_tr_cache_put(cache_key, (result, 200, "application/json", ""))
+    except Exception as e:
+        _swallow_exception(e)
+    return result
+def _safe_get_uncoalesced(url: str, tr_id: str, params: dict, *, return_meta: bool = False):
+    """_safe_get 본체 (재시도/토큰 재발급/오류 로그)."""
     last_exc = None; last_status = None; last_ct = ""; last_body_snip = ""; last_url = url
     for attempt in range(3):
+        rate_limited = False
         try:
             _wait_for_kis_rest_slot("rest")
-            resp = _session.get(url, headers=_headers(tr_id), params=params, timeout=15)
+            resp = _kis_session_get(url, tr_id, params)
             last_status = getattr(resp, "status_code", None)
             last_ct = ((getattr(resp, "headers", {}) or {}).get("Content-Type", "") or "")
             last_url = getattr(resp, "url", url) or url
@@ -8728,7 +9721,7 @@ def _safe_get(url: str, tr_id: str, params: dict, *, return_meta: bool = False):
                 _token_expires = 0
                 _clear_kis_token_state()
                 _wait_for_kis_rest_slot("rest")
-                resp = _session.get(url, headers=_headers(tr_id), params=params, timeout=15)
+                resp = _kis_session_get(url, tr_id, params)
                 last_status = getattr(resp, "status_code", None)
                 last_ct = ((getattr(resp, "headers", {}) or {}).get("Content-Type", "") or "")
                 last_url = getattr(resp, "url", url) or url
@@ -8741,7 +9734,7 @@ def _safe_get(url: str, tr_id: str, params: dict, *, return_meta: bool = False):
                         _clear_kis_token_state()
                         _log_warn_msg(f"⚠️ KIS 토큰만료(EGW00123) 감지 — 재발급 후 재시도")
                         _wait_for_kis_rest_slot("rest")
-                        resp = _session.get(url, headers=_headers(tr_id), params=params, timeout=15)
+                        resp = _kis_session_get(url, tr_id, params)
                         last_status = getattr(resp, "status_code", None)
                         last_ct = ((getattr(resp, "headers", {}) or {}).get("Content-Type", "") or "")
                         last_url = getattr(resp, "url", url) or url
@@ -8756,6 +9749,10 @@ def _safe_get(url: str, tr_id: str, params: dict, *, return_meta: bool = False):
             except Exception as e:
                 _swallow_exception(e)  # v105 structured silent-exception log
                 last_body_snip = ""
+            # v177.21 #AJ: 초당 제한 응답 → AIMD 감소 후 1초 윈도우 경과 뒤 재시도 (지수 backoff 대신)
+            rate_limited = _is_kis_rate_limit_body(last_body_snip)
+            if rate_limited:
+                _kis_note_rate_limited()
             if return_meta:
                 break
             j = safe_json_response(resp)
@@ -8770,7 +9767,7 @@ def _safe_get(url: str, tr_id: str, params: dict, *, return_meta: bool = False):
         if _is_kis_token_retry_block_error(last_exc):
             break
         try:
-            time.sleep(0.8 * (2 ** attempt))
+            time.sleep((1.0 + random.uniform(0.0, 0.3)) if rate_limited else 0.8 * (2 ** attempt))
         except Exception as e:
             _swallow_exception(e)
     try:
@@ -8788,32 +9785,266 @@ def _safe_get_meta(url: str, tr_id: str, params: dict):
     """v38.3: _safe_get 래퍼 (하위 호환)"""
     return _safe_get(url, tr_id, params, return_meta=True)
 # ============================================================
+# ⚡ KIS REST 병렬 실행기 (v177.17 #AF)
+# - 워커 풀 크기로 동시 in-flight 요청을 제한하고, 실제 초당 호출 수는
+#   _wait_for_kis_rest_slot(_kis_rest_call_times)이 그대로 통제한다.
+# - 네트워크 대기 중에도 초당 한도를 채우도록 _safe_get 잡을 future로 제출.
+# ============================================================
+KIS_REST_WORKERS = max(1, int(os.getenv("KIS_REST_WORKERS", "6") or "6"))
+KIS_REST_GATHER_TIMEOUT_SEC = float(os.getenv("KIS_REST_GATHER_TIMEOUT_SEC", "30") or "30")
+# 일괄 선계산(지표/상관행렬 일봉 팬아웃)은 별도 소형 풀 — 공용 FIFO 풀 앞을 막지 않도록
+KIS_REST_BG_WORKERS = max(1, int(os.getenv("KIS_REST_BG_WORKERS", "2") or "2"))
+KIS_REST_BG_GATHER_TIMEOUT_SEC = float(os.getenv("KIS_REST_BG_GATHER_TIMEOUT_SEC", "300") or "300")
+_KIS_REST_WORKER_PREFIX = "KIS-REST"
+_KIS_REST_BG_WORKER_PREFIX = "KIS-REST-BG"   # KIS-REST 접두 공유 → 중첩 제출은 인라인
+_kis_rest_executor = None
+_kis_rest_bg_executor = None
+_kis_rest_executor_lock = threading.Lock()
+_kis_rest_executor_stats = {"submitted": 0, "completed": 0, "failed": 0, "inline": 0, "inflight": 0, "queue_wait_sec": 0.0,
+                            "bg_submitted": 0}
+def _get_kis_rest_executor(background: bool = False):
+    global _kis_rest_executor, _kis_rest_bg_executor
+    if background:
+        if _kis_rest_bg_executor is None:
+            with _kis_rest_executor_lock:
+                if _kis_rest_bg_executor is None:
+                    from concurrent.futures import ThreadPoolExecutor
+                    _kis_rest_bg_executor = ThreadPoolExecutor(max_workers=KIS_REST_BG_WORKERS, thread_name_prefix=_KIS_REST_BG_WORKER_PREFIX)
+        return _kis_rest_bg_executor
+    if _kis_rest_executor is None:
+        with _kis_rest_executor_lock:
+            if _kis_rest_executor is None:
+                from concurrent.futures import ThreadPoolExecutor
+                _kis_rest_executor = ThreadPoolExecutor(max_workers=KIS_REST_WORKERS, thread_name_prefix=_KIS_REST_WORKER_PREFIX)
+    return _kis_rest_executor
+def _in_kis_rest_worker() -> bool:
+    return threading.current_thread().name.startswith(_KIS_REST_WORKER_PREFIX)
+def _kis_submit_call(fn, *args, **kwargs):
+    """KIS 호출 함수를 워커 풀에 제출하고 Future 반환.
+    워커 내부에서 다시 제출하면(중첩) 풀 고갈 교착을 막기 위해 즉시 인라인 실행한 완료 Future를 돌려준다."""
+    return _kis_submit_call_to(False, fn, *args, **kwargs)
+def _kis_submit_call_to(background: bool, fn, *args, **kwargs):
+    """_kis_submit_call 본체. background=True → 일괄 선계산 전용 풀(KIS_REST_BG_WORKERS)."""
+    from concurrent.futures import Future
+    if _in_kis_rest_worker():
+        fut = Future()
+        with _kis_rate_lock:
+            _kis_rest_executor_stats["inline"] += 1
+        try:
+            fut.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            fut.set_exception(e)
+        return fut
+    submitted_at = time.monotonic()
+    lane = _current_kis_lane()
+    def _job():
+        _kis_lane_local.lane = lane   # v177.20: 제출 스레드 레인 승계
+        with _kis_rate_lock:
+            _kis_rest_executor_stats["inflight"] += 1
+            _kis_rest_executor_stats["queue_wait_sec"] += max(0.0, time.monotonic() - submitted_at)
+        ok = False
+        try:
+            result = fn(*args, **kwargs)
+            ok = True
+            return result
+        finally:
+            with _kis_rate_lock:
+                _kis_rest_executor_stats["inflight"] -= 1
+                _kis_rest_executor_stats["completed" if ok else "failed"] += 1
+    with _kis_rate_lock:
+        _kis_rest_executor_stats["bg_submitted" if background else "submitted"] += 1
+    return _get_kis_rest_executor(background).submit(_job)
+def _kis_submit(url: str, tr_id: str, params: dict, *, return_meta: bool = False):
+    """_safe_get 잡 제출 → Future (결과는 _safe_get 반환값과 동일)."""
+    return _kis_submit_call(_safe_get, url, tr_id, params, return_meta=return_meta)
+def _kis_gather(futures: list, default=None, timeout: float | None = None) -> list:
+    """Future 목록을 제출 순서대로 회수. 실패/타임아웃 항목은 default로 대체."""
+    deadline = time.monotonic() + float(timeout if timeout is not None else KIS_REST_GATHER_TIMEOUT_SEC)
+    out = []
+    for fut in futures:
+        try:
+            out.append(fut.result(timeout=max(0.0, deadline - time.monotonic())))
+        except Exception as e:
+            _swallow_exception(e, "kis_gather")
+            out.append(default() if callable(default) else default)
+    return out
+def _kis_gather_calls(calls: list, default=list, timeout: float | None = None, background: bool = False) -> list:
+    """[(fn, args...), ...] 를 병렬 실행하고 순서대로 결과 반환.
+    background=True → 별도 소형 풀에서 실행 (대량 일괄 조회가 스캔/진입감시 요청 앞에 줄서지 않도록)."""
+    futures = [_kis_submit_call_to(background, c[0], *c[1:]) for c in calls]
+    if background and timeout is None:
+        timeout = KIS_REST_BG_GATHER_TIMEOUT_SEC
+    return _kis_gather(futures, default=default, timeout=timeout)
+# ============================================================
 # 📊 일봉 데이터 (공통 사용)
 # ============================================================
 _daily_cache = {}  # code → {items, ts}
 _atr_cache   = {}  # code → {atr, date}  하루 1회 갱신
+# ============================================================
+# 🗄 일봉 OHLCV 영속 컬럼 저장소 (v177.23 #AL)
+# - daily_ohlcv/<code>/{date,open,high,low,close,vol}.i64 : 컬럼별 int64 append-only 파일
+# - 확정 봉(당일 장마감 전 봉 제외)만 저장, 이후엔 마지막 저장일 이후 구간만 KIS 조회
+# - 마지막 저장 봉 종가가 재조회 값과 다르면(수정주가 반영) 해당 종목 저장소 재구성
+# ============================================================
+import array as _array
+DAILY_STORE_ENABLED = os.getenv("DAILY_STORE_ENABLED", "true").strip().lower() in ("true", "1", "yes")
+DAILY_STORE_DIR = _state_path("daily_ohlcv")
+_DAILY_STORE_COLUMNS = ("date", "open", "high", "low", "close", "vol")
+_daily_store_lock = threading.Lock()
+_daily_store_mem: dict = {}   # code → {"cols": {col: array('q')}, "covered_from": "YYYYMMDD"}
+_daily_store_stats = {"hit": 0, "incremental": 0, "full": 0, "rebuild": 0}
+def _daily_store_code_dir(code: str) -> str:
+    return os.path.join(DAILY_STORE_DIR, code)
+def _daily_store_load(code: str) -> dict:
+    ent = _daily_store_mem.get(code)
+    if ent is not None:
+        return ent
+    cols = {}
+    sizes = {}
+    d = _daily_store_code_dir(code)
+    itemsize = _array.array("q").itemsize
+    broken = False
+    for col in _DAILY_STORE_COLUMNS:
+        arr = _array.array("q")
+        path = os.path.join(d, f"{col}.i64")
+        try:
+            with open(path, "rb") as f:
+                raw = f.read()
+            sizes[col] = len(raw)
+            arr.frombytes(raw[:len(raw) - len(raw) % itemsize])   # 잘린 마지막 레코드 제외
+        except FileNotFoundError:
+            sizes[col] = 0
+        except Exception as e:
+            broken = True
+            _swallow_exception(e, f"daily_store_load:{code}")
+        cols[col] = arr
+    # 중간에 끊긴 append 보정 — 가장 짧은 컬럼 길이에 맞추고 디스크 파일도 같은 길이로 잘라 이후 append 정렬 유지
+    # 읽기 실패 컬럼이 있으면 전체 비움 (covered_from 초기화 → 다음 조회 시 재구성)
+    n = 0 if broken else min(len(a) for a in cols.values())
+    for col, arr in cols.items():
+        if len(arr) > n:
+            del arr[n:]
+        if sizes.get(col, 0) != n * itemsize:
+            try:
+                os.truncate(os.path.join(d, f"{col}.i64"), n * itemsize)
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                broken = True
+                _swallow_exception(e, f"daily_store_truncate:{code}")
+    if broken:
+        for arr in cols.values():
+            del arr[:]
+    meta = _read_json_locked(os.path.join(d, "meta.json"), default={}) if os.path.isdir(d) and n and not broken else {}
+    ent = {"cols": cols, "covered_from": str((meta or {}).get("covered_from", "") or "")}
+    _daily_store_mem[code] = ent
+    return ent
+def _daily_store_rows(ent: dict, start: str = "") -> list:
+    cols = ent["cols"]
+    start_i = int(start) if start else 0
+    out = []
+    for idx, dt in enumerate(cols["date"]):
+        if dt < start_i:
+            continue
+        out.append({
+            "date": str(dt),
+            "open": cols["open"][idx], "high": cols["high"][idx], "low": cols["low"][idx],
+            "close": cols["close"][idx], "vol": cols["vol"][idx],
+        })
+    return out
+def _daily_store_write(code: str, rows: list, *, reset: bool = False, covered_from: str = "") -> None:
+    ent = _daily_store_load(code)
+    d = _daily_store_code_dir(code)
+    os.makedirs(d, exist_ok=True)
+    mode = "wb" if reset else "ab"
+    if reset:
+        for arr in ent["cols"].values():
+            del arr[:]
+    for col in _DAILY_STORE_COLUMNS:
+        vals = _array.array("q", [int(r["date"]) if col == "date" else int(r.get(col, 0) or 0) for r in rows])
+        with open(os.path.join(d, f"{col}.i64"), mode) as f:
+            vals.tofile(f)
+        ent["cols"][col].extend(vals)
+    if covered_from and (reset or not ent["covered_from"] or covered_from < ent["covered_from"]):
+        ent["covered_from"] = covered_from
+        _write_json_atomic(os.path.join(d, "meta.json"), {"covered_from": covered_from})
+def _fetch_daily_chart_rows(code: str, start: str, end: str) -> list:
+    url   = f"{KIS_BASE_URL}/uapi/domestic-stock/v1/quotations/inquire-daily-itemchartprice"
+    params = {"FID_COND_MRKT_DIV_CODE":"J","FID_INPUT_ISCD":code,
+              "FID_INPUT_DATE_1":start,"FID_INPUT_DATE_2":end,
+              "FID_PERIOD_DIV_CODE":"D","FID_ORG_ADJ_PRC":"0"}
+    resp_json = _safe_get(url, "FHKST03010100", params)
+    items = resp_json.get("output2", []) if isinstance(resp_json, dict) else []
+    return sorted([{
+        "date":  i.get("stck_bsop_date",""),
+        "open":  int(i.get("stck_oprc",0)),
+        "high":  int(i.get("stck_hgpr",0)),
+        "low":   int(i.get("stck_lwpr",0)),
+        "close": int(i.get("stck_clpr",0)),
+        "vol":   int(i.get("acml_vol",0)),
+    } for i in items if i.get("stck_bsop_date")], key=lambda x: x["date"])
+def _prev_business_day(date_str: str) -> str:
+    d = datetime.strptime(date_str, "%Y%m%d")
+    for _ in range(15):
+        d -= timedelta(days=1)
+        if not is_holiday(d.strftime("%Y%m%d")):
+            break
+    return d.strftime("%Y%m%d")
+def _get_daily_data_from_store(code: str, start: str, end: str) -> list:
+    now = datetime.now()
+    # 당일 봉은 KRX 마감(15:30) 후 정리 시간까지 지난 뒤에만 확정으로 저장
+    today_final = is_holiday(end) or now.time() >= dtime(15, 40)
+    with _daily_store_lock:
+        ent = _daily_store_load(code)
+        dates = ent["cols"]["date"]
+        last = str(dates[-1]) if len(dates) else ""
+        covered = bool(last) and bool(ent["covered_from"]) and ent["covered_from"] <= start
+        if covered and (last >= end or (last == _prev_business_day(end) and (now.time() < dtime(9, 0) or is_holiday(end)))):
+            _daily_store_stats["hit"] += 1
+            return _daily_store_rows(ent, start)
+    if covered:
+        fetched = _fetch_daily_chart_rows(code, last, end)   # 마지막 저장 봉 1개 겹쳐 조회
+        if not fetched:
+            with _daily_store_lock:
+                return _daily_store_rows(_daily_store_load(code), start)
+        with _daily_store_lock:
+            ent = _daily_store_load(code)
+            # 조회 중 같은 종목 다른 호출이 봉을 추가했을 수 있음 → 잠금 재획득 후 마지막 봉 다시 읽기
+            dates = ent["cols"]["date"]
+            last = str(dates[-1]) if len(dates) else ""
+            stored_last_close = ent["cols"]["close"][-1] if len(ent["cols"]["close"]) else 0
+            overlap = next((r for r in fetched if r["date"] == last), None) if last else None
+            # 겹침 봉이 없으면(조회 창보다 큰 공백 등) 연속성 확인 불가 → 재구성
+            if overlap is not None and overlap["close"] == stored_last_close:
+                new_rows = [r for r in fetched if r["date"] > last]
+                final_rows = [r for r in new_rows if r["date"] < end or today_final]
+                if final_rows:
+                    _daily_store_write(code, final_rows)
+                _daily_store_stats["incremental"] += 1
+                merged = _daily_store_rows(ent, start)
+                merged.extend(r for r in new_rows if r not in final_rows)
+                return merged
+            _daily_store_stats["rebuild"] += 1
+    fetched = _fetch_daily_chart_rows(code, start, end)
+    if fetched:
+        with _daily_store_lock:
+            final_rows = [r for r in fetched if r["date"] < end or today_final]
+            _daily_store_write(code, final_rows, reset=True, covered_from=start)
+            _daily_store_stats["full"] += 1
+    return fetched
 def get_daily_data(code: str, days: int = 60) -> list:
-    """일봉 데이터 조회 (캐시 30분)"""
+    """일봉 데이터 조회 (캐시 30분)
+    v177.23: 확정 봉은 영속 컬럼 저장소에서 읽고 누락 거래일만 KIS 조회."""
     cached = _daily_cache.get(code)
     if cached and time.time() - cached["ts"] < 1800:
         return cached["items"]
     try:
         end   = datetime.now().strftime("%Y%m%d")
         start = (datetime.now() - timedelta(days=days+10)).strftime("%Y%m%d")
-        url   = f"{KIS_BASE_URL}/uapi/domestic-stock/v1/quotations/inquire-daily-itemchartprice"
-        params = {"FID_COND_MRKT_DIV_CODE":"J","FID_INPUT_ISCD":code,
-                  "FID_INPUT_DATE_1":start,"FID_INPUT_DATE_2":end,
-                  "FID_PERIOD_DIV_CODE":"D","FID_ORG_ADJ_PRC":"0"}
-        resp_json = _safe_get(url, "FHKST03010100", params)
-        items = resp_json.get("output2", []) if isinstance(resp_json, dict) else []
-        items = sorted([{
-            "date":  i.get("stck_bsop_date",""),
-            "open":  int(i.get("stck_oprc",0)),
-            "high":  int(i.get("stck_hgpr",0)),
-            "low":   int(i.get("stck_lwpr",0)),
-            "close": int(i.get("stck_clpr",0)),
-            "vol":   int(i.get("acml_vol",0)),
-        } for i in items if i.get("stck_bsop_date")], key=lambda x: x["date"])
+        if DAILY_STORE_ENABLED and normalize_stock_code(code):
+            items = _get_daily_data_from_store(code, start, end)
+        else:
+            items = _fetch_daily_chart_rows(code, start, end)
         _daily_cache[code] = {"items": items, "ts": time.time()}
         return items
     except Exception as e:
@@ -8879,9 +10110,10 @@ def calc_bollinger(items: list, period: int = None, k: float = 2.0) -> dict:
     window = closes[-period:]
     mid    = sum(window) / period
     std    = (sum((c - mid) ** 2 for c in window) / period) ** 0.5
+    return _bollinger_result(mid, std, closes[-1], k)
+def _bollinger_result(mid: float, std: float, cur: int, k: float = 2.0) -> dict:
     upper  = int(mid + k * std)
     lower  = int(mid - k * std)
-    cur    = closes[-1]
     pct_b  = round((cur - lower) / (upper - lower), 2) if upper != lower else 0.5
     breakout = cur >= upper
     if breakout:
@@ -8894,19 +10126,200 @@ def calc_bollinger(items: list, period: int = None, k: float = 2.0) -> dict:
         desc = f"밴드 중간 ({pct_b*100:.0f}%)"
     return {"upper": upper, "mid": int(mid), "lower": lower,
             "pct_b": pct_b, "breakout": breakout, "desc": desc}
+# ============================================================
+# 🧮 후보군 일괄 지표 엔진 (v177.24 #AM)
+# - 동적 후보군 갱신 직후 일봉을 워커 풀로 병렬 조회 → RSI/MA/BB/ATR 한 번에 계산해 세션 캐시
+# - calc_indicators / get_atr 는 캐시 조회 → 스캔 사이클마다 종목별 재계산 제거
+# - 세션 키: 날짜 + 장전/정규장/장후 + 지표 파라미터(_dynamic). 정규장은 _daily_cache와 같은 30분 TTL
+# ============================================================
+INDICATOR_BATCH_ENABLED = os.getenv("INDICATOR_BATCH_ENABLED", "true").strip().lower() in ("true", "1", "yes")
+INDICATOR_BATCH_REGULAR_TTL_SEC = 1800
+_indicator_batch_cache: dict = {}   # code → {"key", "ts", "rsi", "ma", "bb", "short"}
+_indicator_batch_lock = threading.Lock()
+_indicator_batch_stats = {"runs": 0, "codes": 0, "hit": 0, "miss": 0, "last_sec": 0.0}
+def _session_phase_key() -> str:
+    now = datetime.now()
+    t = now.time()
+    phase = "pre" if t < dtime(9, 0) else ("regular" if t < dtime(15, 30) else "post")
+    return f"{now.strftime('%Y%m%d')}:{phase}"
+def _indicator_session_key() -> str:
+    params = ",".join(str(int(_dynamic.get(k, d))) for k, d in (
+        ("rsi_period", 14), ("ma_short", 5), ("ma_mid", 20), ("ma_long", 60), ("bb_period", 20)))
+    return f"{_session_phase_key()}:{params}"
+def _indicator_snapshot_fresh(ent: dict | None, key: str) -> bool:
+    if not ent or ent.get("key") != key:
+        return False
+    if ":regular:" in key:
+        return time.time() - float(ent.get("ts", 0) or 0) < INDICATOR_BATCH_REGULAR_TTL_SEC
+    return True
+def _build_indicator_snapshot(code: str, items: list, key: str) -> dict:
+    if len(items) < 20:
+        ent = {"key": key, "ts": time.time(), "short": True}
+    else:
+        ent = {"key": key, "ts": time.time(), "short": False,
+               "rsi": calc_rsi(items), "ma": calc_ma_trend(items), "bb": calc_bollinger(items)}
+    today = datetime.now().strftime("%Y%m%d")
+    if (_atr_cache.get(code) or {}).get("date") != today:
+        trs = [i["high"] - i["low"] for i in items[-ATR_PERIOD:] if i["high"] and i["low"]]
+        if trs:
+            _atr_cache[code] = {"atr": sum(trs) / len(trs), "date": today}
+    with _indicator_batch_lock:
+        _indicator_batch_cache[code] = ent
+    return ent
+def _get_indicator_snapshot(code: str) -> dict:
+    key = _indicator_session_key()
+    with _indicator_batch_lock:
+        ent = _indicator_batch_cache.get(code)
+    if _indicator_snapshot_fresh(ent, key):
+        _indicator_batch_stats["hit"] += 1
+        return ent
+    _indicator_batch_stats["miss"] += 1
+    return _build_indicator_snapshot(code, get_daily_data(code, 70), key)
+@_with_kis_lane("background")
+def precompute_indicators_batch(codes: list) -> int:
+    """후보군 전체 지표 일괄 계산 → 세션 캐시. 새로 계산한 종목 수 반환."""
+    if not INDICATOR_BATCH_ENABLED:
+        return 0
+    key = _indicator_session_key()
+    todo = []
+    with _indicator_batch_lock:
+        for c in dict.fromkeys(normalize_stock_code(c) for c in (codes or [])):
+            if c and not _indicator_snapshot_fresh(_indicator_batch_cache.get(c), key):
+                todo.append(c)
+    if not todo:
+        return 0
+    t0 = time.monotonic()
+    item_lists = _kis_gather_calls([(get_daily_data, c, 70) for c in todo], default=list, background=True)
+    done = 0
+    for code, items in zip(todo, item_lists):
+        if items:   # 조회 실패/타임아웃은 캐시하지 않음 → calc_indicators에서 개별 재시도
+            _build_indicator_snapshot(code, items, key)
+            done += 1
+    _indicator_batch_stats["runs"] += 1
+    _indicator_batch_stats["codes"] += done
+    _indicator_batch_stats["last_sec"] = round(time.monotonic() - t0, 2)
+    return done
+# ============================================================
+# ⚡ 틱 기반 장중 지표 (v177.25 #AN)
+# - 전일까지 확정 종가 합계(RSI 상승/하락폭, 20일 합, BB 합·제곱합)를 종목별로 1회 준비
+# - _record_execution_snapshot 틱마다 현재가만 갱신(O(1)) → 현재가를 당일 잠정 종가로 RSI / 20일 괴리 / %B 계산
+# - 상태는 _daily_cache에 이미 있는 일봉으로만 생성 (웹소켓 스레드 REST 호출 없음)
+# ============================================================
+INTRADAY_INDICATOR_ENABLED = os.getenv("INTRADAY_INDICATOR_ENABLED", "true").strip().lower() in ("true", "1", "yes")
+INTRADAY_INDICATOR_MAX_AGE_SEC = int(os.getenv("INTRADAY_INDICATOR_MAX_AGE_SEC", "120") or "120")
+INTRADAY_INDICATOR_RETRY_SEC = int(os.getenv("INTRADAY_INDICATOR_RETRY_SEC", "300") or "300")   # invalid 상태 재시도 간격
+_intraday_ind_state: dict = {}   # code → {"date", "params", 합계들..., "price", "ts"}
+def _intraday_ind_params() -> tuple:
+    return int(_dynamic.get("rsi_period", 14)), int(_dynamic.get("bb_period", 20))
+def _build_intraday_ind_state(items: list, today: str, params: tuple) -> dict:
+    rsi_p, bb_p = params
+    closes = [i["close"] for i in items if i.get("close") and i.get("date") != today]
+    if len(closes) < max(rsi_p, bb_p - 1, 19):
+        return {"date": today, "params": params, "invalid": True}
+    gain = loss = 0
+    tail = closes[-rsi_p:]
+    for a, b in zip(tail, tail[1:]):
+        if b > a:
+            gain += b - a
+        else:
+            loss += a - b
+    bb_win = closes[-(bb_p - 1):] if bb_p > 1 else []
+    return {
+        "date": today, "params": params, "invalid": False,
+        "last_close": closes[-1], "rsi_gain": gain, "rsi_loss": loss,
+        "ma20_sum19": sum(closes[-19:]),
+        "bb_sum": sum(bb_win), "bb_sumsq": sum(c * c for c in bb_win),
+        "price": 0, "ts": 0.0,
+    }
+def _update_intraday_indicators(code: str, price: int, ts: float) -> None:
+    if not INTRADAY_INDICATOR_ENABLED:
+        return
+    st = _intraday_ind_state.get(code)
+    today = datetime.fromtimestamp(ts).strftime("%Y%m%d")
+    params = _intraday_ind_params()
+    # invalid(일봉 부족) 상태는 _daily_cache 항목이 바뀌었거나 INTRADAY_INDICATOR_RETRY_SEC 지나면 재구성
+    if (st is None or st["date"] != today or st["params"] != params
+            or (st["invalid"] and (ts - st.get("built_ts", 0.0) >= INTRADAY_INDICATOR_RETRY_SEC
+                                   or (_daily_cache.get(code) or {}).get("ts") != st.get("src_ts")))):
+        cached = _daily_cache.get(code)
+        if not cached:
+            return
+        st = _build_intraday_ind_state(cached.get("items") or [], today, params)
+        st["src_ts"] = cached.get("ts")
+        st["built_ts"] = ts
+        _intraday_ind_state[code] = st
+    if st["invalid"]:
+        return
+    st["price"] = price
+    st["ts"] = ts
+def get_intraday_indicators(code: str, max_age_sec: float | None = None) -> dict:
+    """틱 현재가를 당일 잠정 종가로 본 RSI / 20일 괴리율 / 볼린저. 최근 틱 없으면 {}."""
+    st = _intraday_ind_state.get(normalize_stock_code(code))
+    if not st or st.get("invalid") or not st.get("price"):
+        return {}
+    max_age = INTRADAY_INDICATOR_MAX_AGE_SEC if max_age_sec is None else max_age_sec
+    if time.time() - st["ts"] > max_age or st["date"] != datetime.now().strftime("%Y%m%d"):
+        return {}
+    price = st["price"]
+    rsi_p, bb_p = st["params"]
+    diff = price - st["last_close"]
+    gain = st["rsi_gain"] + (diff if diff > 0 else 0)
+    loss = st["rsi_loss"] + (-diff if diff < 0 else 0)
+    rsi = 100.0 if loss == 0 else round(100 - (100 / (1 + gain / loss)), 1)
+    ma20 = (st["ma20_sum19"] + price) / 20
+    mid = (st["bb_sum"] + price) / bb_p
+    var = (st["bb_sumsq"] + price * price) / bb_p - mid * mid
+    return {
+        "price": price, "ts": st["ts"], "rsi": rsi,
+        "ma20_dev": round((price - ma20) / ma20 * 100, 2) if ma20 else 0.0,
+        "bb": _bollinger_result(mid, max(var, 0.0) ** 0.5, price),
+    }
+_candidate_analytics_lock = threading.Lock()
+_candidate_analytics_state = {"running": False, "pending": None, "coalesced": 0}
+@_with_kis_lane("background")
+def _precompute_candidate_analytics(codes: list) -> None:
+    """단일 실행 — 진행 중에 들어온 갱신은 최신 후보군 1건만 보관했다가 끝난 뒤 이어서 실행."""
+    with _candidate_analytics_lock:
+        if _candidate_analytics_state["running"]:
+            _candidate_analytics_state["pending"] = list(codes or [])
+            _candidate_analytics_state["coalesced"] += 1
+            return
+        _candidate_analytics_state["running"] = True
+    try:
+        while True:
+            try:
+                precompute_indicators_batch(codes)
+                rebuild_correlation_matrix(codes)
+            except Exception as e:
+                _swallow_exception(e, "precompute_candidate_analytics")
+            with _candidate_analytics_lock:
+                codes = _candidate_analytics_state["pending"]
+                _candidate_analytics_state["pending"] = None
+                if codes is None:
+                    _candidate_analytics_state["running"] = False
+                    return
+    except BaseException:
+        with _candidate_analytics_lock:
+            _candidate_analytics_state["running"] = False
+        raise
 def calc_indicators(code: str) -> dict:
     """
     RSI + MA + 볼린저밴드 한 번에 계산.
     get_daily_data 캐시 활용 → API 추가 호출 없음.
+    v177.24: precompute_indicators_batch 세션 캐시 우선 조회.
     반환: {"rsi": float, "ma": dict, "bb": dict, "filter_pass": bool, "score_adj": int, "summary": str}
     """
     try:
-        items = get_daily_data(code, 70)
-        if len(items) < 20:
+        snap = _get_indicator_snapshot(code)
+        if snap.get("short"):
             return {"rsi": 50, "ma": {}, "bb": {}, "filter_pass": True, "score_adj": 0, "summary": ""}
-        rsi = calc_rsi(items)
-        ma  = calc_ma_trend(items)
-        bb  = calc_bollinger(items)
+        rsi = snap["rsi"]
+        ma  = snap["ma"]
+        bb  = snap["bb"]
+        live = get_intraday_indicators(code)   # v177.25 #AN: 장중엔 틱 현재가 기준 RSI/%B
+        if live:
+            rsi = live["rsi"]
+            bb  = live["bb"]
         score_adj   = 0
         filter_pass = True
         reasons     = []
@@ -9076,7 +10489,7 @@ def _load_signal_history() -> dict:
     if time.time() - _history_cache["ts"] < 300 and _history_cache["data"]:
         return _history_cache["data"]
     try:
-        data = _read_json_locked(SIGNAL_LOG_FILE)
+        data = _signal_log_read()
         if isinstance(data, dict):
             _normalize_signal_log_pnl_fields(data)
         _history_cache["data"] = data
@@ -9651,6 +11064,9 @@ def _clear_all_cache():
 # ============================================================
 def get_ma20_deviation(code: str) -> float:
     """현재가 기준 20일 이평 대비 괴리율 (%) — 음수면 이평 아래"""
+    live = get_intraday_indicators(code)   # v177.25 #AN
+    if live:
+        return live["ma20_dev"]
     items = get_daily_data(code, 30)
     if len(items) < 20:
         return 0.0
@@ -10012,12 +11428,14 @@ def _get_sector_react_rank(code: str, sector: str) -> int:
     return 0
 
 
-def _update_vi_sector_tracker(code: str, name: str, sector: str, vi_price: int) -> None:
+def _update_vi_sector_tracker(code: str, name: str, sector: str, vi_price: int, ts: float | None = None) -> None:
     """VI 발동 종목을 섹터별 순서대로 기록한다.
-    vi_price > 0 일 때만 호출된다. 당일 기준 중복 코드는 무시."""
+    vi_price > 0 일 때만 호출된다. 당일 기준 중복 코드는 무시.
+    ts = VI 틱 시각 (백그라운드 조회로 늦게 기록돼도 발동 순서 유지)."""
     global _vi_sector_tracker
     if vi_price <= 0:
         return
+    ts = time.time() if ts is None else float(ts)
     key = _normalize_sector_key(sector)
     today = _now_kst().strftime("%Y%m%d")
     bucket = _vi_sector_tracker.setdefault(key, {"date": today, "members": []})
@@ -10027,8 +11445,49 @@ def _update_vi_sector_tracker(code: str, name: str, sector: str, vi_price: int)
     existing = [m["code"] for m in bucket["members"]]
     if code not in existing:
         bucket["members"].append({
-            "code": code, "name": name, "vi_price": vi_price, "ts": time.time()
+            "code": code, "name": name, "vi_price": vi_price, "ts": ts
         })
+        bucket["members"].sort(key=lambda m: m.get("ts", 0.0))
+
+
+def _note_vi_tick(code: str, vi_price: int, sector: str, ts: float) -> None:
+    """틱 워커용 VI 기록 — REST 호출 없이 링 업종명·공개 메타 캐시만 사용.
+    종목명·업종을 모르면 조회는 백그라운드 KIS 풀에 위임 (틱 워커 정지·틱 유실 방지)."""
+    today = datetime.fromtimestamp(ts).strftime("%Y%m%d")
+    if _vi_tick_seen["date"] != today:
+        _vi_tick_seen["date"] = today
+        _vi_tick_seen["codes"] = set()
+    if code in _vi_tick_seen["codes"]:
+        return
+    meta = (_PUBLIC_STOCK_META_MEM.get("items") or {}).get(code) or {}
+    sector = sector or str(meta.get("sector", "") or "")
+    name = str(meta.get("name", "") or "")
+    if sector and name:
+        _vi_tick_seen["codes"].add(code)
+        _update_vi_sector_tracker(code, name, sector, vi_price, ts)
+        return
+    if code in _vi_lookup_pending:
+        return
+    _vi_lookup_pending.add(code)
+    try:
+        _kis_submit_call_to(True, _vi_sector_lookup_job, code, vi_price, ts)
+    except Exception as e:
+        _vi_lookup_pending.discard(code)
+        _swallow_exception(e)
+
+
+@_with_kis_lane("background")
+def _vi_sector_lookup_job(code: str, vi_price: int, ts: float) -> None:
+    try:
+        info = get_stock_price(code) or {}
+        sector = str(info.get("bstp_name", "") or info.get("sector", "") or "")
+        name = str(info.get("name", code) or code)
+        _update_vi_sector_tracker(code, name, sector, vi_price, ts)
+        _vi_tick_seen["codes"].add(code)
+    except Exception as e:
+        _swallow_exception(e)
+    finally:
+        _vi_lookup_pending.discard(code)
 
 
 def _get_vi_rank_in_sector(code: str, sector: str) -> int:
@@ -10896,6 +12355,8 @@ _preclose_gap_entry_watch: dict = {}
 _pullback_wait_watch: dict = {}  # v165.23: 눌림 대기 감시 {code: {entry_price, stop_loss, target_price, name, stage, deadline_ts, alerted}}
 _UNIVERSE_RANK_TTL_SEC = int(os.getenv("UNIVERSE_RANK_TTL_SEC", "45") or "45")  # reuse if set
 def _read_json_safe(path: str, default):
+    if path in _state_dirty:  # v177.38 #BA: 지연 기록분 먼저 반영
+        _flush_dirty_state([path])
     try:
         if not os.path.isfile(path):
             return default
@@ -10904,11 +12365,57 @@ def _read_json_safe(path: str, default):
     except Exception as e:
         _warn_json_default_once(path, e)
         return default
+# v177.40 #BC: runtime_state_bundle 메모리 캐시
+# - 파일 (mtime_ns, size) 가 캐시 시점과 같으면 재파싱 없이 메모리 dict 사용 (다른 프로세스가 쓰면 재로드)
+# - _runtime_state_set/delete 는 키 단위 dirty(세대 번호) 표시 후 write-behind 기록 (_mark_state_dirty)
+#   재로드 시 아직 기록 안 된 dirty 키는 메모리 값 유지 → 다른 프로세스 기록과 병합
+_runtime_bundle_cache = {"data": None, "sig": None, "dirty": {}, "gen": 0, "flushing": {}, "parsed": 0}
+def _runtime_bundle_sig():
+    try:
+        st = os.stat(RUNTIME_STATE_BUNDLE_FILE)
+        return (st.st_mtime_ns, st.st_size)
+    except OSError:
+        return None
 def _load_runtime_state_bundle_unlocked() -> dict:
-    raw = _read_json_unlocked(RUNTIME_STATE_BUNDLE_FILE, default={})
-    return raw if isinstance(raw, dict) else {}
+    c = _runtime_bundle_cache
+    sig = _runtime_bundle_sig()
+    if c["data"] is None or sig != c["sig"]:
+        raw = _read_json_unlocked(RUNTIME_STATE_BUNDLE_FILE, default={})
+        data = raw if isinstance(raw, dict) else {}
+        old = c["data"] or {}
+        for key in c["dirty"]:
+            if key in old:
+                data[key] = old[key]
+            else:
+                data.pop(key, None)
+        c["data"], c["sig"] = data, sig
+        c["parsed"] += 1
+    return c["data"]
 def _save_runtime_state_bundle_unlocked(bundle: dict) -> None:
-    _write_json_atomic_unlocked(RUNTIME_STATE_BUNDLE_FILE, bundle if isinstance(bundle, dict) else {}, indent=2)
+    c = _runtime_bundle_cache
+    bundle = bundle if isinstance(bundle, dict) else {}
+    _write_json_atomic_unlocked(RUNTIME_STATE_BUNDLE_FILE, bundle, indent=2)
+    c["data"], c["sig"] = bundle, _runtime_bundle_sig()
+    c["dirty"].clear()
+def _runtime_bundle_touch(key: str) -> None:
+    c = _runtime_bundle_cache
+    c["gen"] += 1
+    c["dirty"][key] = c["gen"]
+def _runtime_bundle_snapshot() -> dict:
+    with _file_lock:
+        c = _runtime_bundle_cache
+        data = _load_runtime_state_bundle_unlocked()
+        c["flushing"] = dict(c["dirty"])
+        return dict(data)
+def _runtime_bundle_written() -> None:
+    c = _runtime_bundle_cache
+    c["sig"] = _runtime_bundle_sig()
+    for key, gen in c["flushing"].items():
+        if c["dirty"].get(key) == gen:
+            c["dirty"].pop(key, None)
+    c["flushing"] = {}
+def _runtime_bundle_mark_dirty() -> None:
+    _mark_state_dirty(RUNTIME_STATE_BUNDLE_FILE, _runtime_bundle_snapshot, on_written=_runtime_bundle_written)
 def _load_runtime_state_bundle() -> dict:
     with _file_lock:
         return _load_runtime_state_bundle_unlocked()
@@ -10919,9 +12426,12 @@ def _read_legacy_state_json(path: str, default=None):
     default = {} if default is None else default
     return _read_json_safe(path, default)
 def _runtime_state_get(key: str, default=None, legacy_path: str | None = None):
-    bundle = _load_runtime_state_bundle()
-    if key in bundle:
-        value = bundle.get(key)
+    import copy
+    with _file_lock:
+        bundle = _load_runtime_state_bundle_unlocked()
+        found = key in bundle
+        value = copy.deepcopy(bundle.get(key)) if found else None  # 캐시 공유 방지
+    if found:
         return default if value is None else value
     if legacy_path:
         legacy = _read_legacy_state_json(legacy_path, default)
@@ -10931,32 +12441,36 @@ def _runtime_state_set(key: str, value, *, legacy_path: str | None = None) -> No
     with _file_lock:
         bundle = _load_runtime_state_bundle_unlocked()
         bundle[key] = value
-        _save_runtime_state_bundle_unlocked(bundle)
+        _runtime_bundle_touch(key)
         if legacy_path and os.path.exists(legacy_path):
             try:
                 os.remove(legacy_path)
             except Exception as e:
                 _swallow_exception(e)
+    _runtime_bundle_mark_dirty()
 def _runtime_state_delete(key: str, *, legacy_path: str | None = None) -> None:
     with _file_lock:
         bundle = _load_runtime_state_bundle_unlocked()
-        if key in bundle:
+        changed = key in bundle
+        if changed:
             bundle.pop(key, None)
-            _save_runtime_state_bundle_unlocked(bundle)
+            _runtime_bundle_touch(key)
         if legacy_path and os.path.exists(legacy_path):
             try:
                 os.remove(legacy_path)
             except Exception as e:
                 _swallow_exception(e)
+    if changed:
+        _runtime_bundle_mark_dirty()
 def _save_preclose_gap_entry_watch() -> None:
     try:
-        _write_json_atomic(PRECLOSE_GAP_ENTRY_WATCH_FILE, _preclose_gap_entry_watch if isinstance(_preclose_gap_entry_watch, dict) else {}, indent=2)
+        _mark_state_dirty(PRECLOSE_GAP_ENTRY_WATCH_FILE, lambda: _preclose_gap_entry_watch if isinstance(_preclose_gap_entry_watch, dict) else {})
     except Exception as e:
         _swallow_exception(e)
 def _save_pullback_wait_watch() -> None:
     """v165.23: 눌림 대기 감시 상태 파일 저장."""
     try:
-        _write_json_atomic(PULLBACK_WAIT_WATCH_FILE, _pullback_wait_watch if isinstance(_pullback_wait_watch, dict) else {}, indent=2)
+        _mark_state_dirty(PULLBACK_WAIT_WATCH_FILE, lambda: _pullback_wait_watch if isinstance(_pullback_wait_watch, dict) else {})
     except Exception as e:
         _swallow_exception(e)
 
@@ -11019,7 +12533,7 @@ def _load_preclose_gap_entry_watch() -> None:
             return
         now_ts = time.time()
         restored = {}
-        siglog_data = _read_json_safe(SIGNAL_LOG_FILE, {})
+        siglog_data = _signal_log_read()
         latest_by_code = _build_latest_tracking_by_code(siglog_data)
         for key, watch in raw.items():
             if not isinstance(watch, dict):
@@ -11250,7 +12764,7 @@ def _prune_entry_watch_store(raw: dict, keep_days: int) -> dict:
     return out
 def _save_entry_watch_active() -> None:
     try:
-        _write_json_atomic(ENTRY_WATCH_ACTIVE_FILE, _entry_watch if isinstance(_entry_watch, dict) else {}, indent=2)
+        _mark_state_dirty(ENTRY_WATCH_ACTIVE_FILE, lambda: _entry_watch if isinstance(_entry_watch, dict) else {})
     except Exception as e:
         _swallow_exception(e)
 def _load_entry_watch_active() -> None:
@@ -11261,7 +12775,7 @@ def _load_entry_watch_active() -> None:
             _entry_watch = {}
             return
         now_ts = time.time()
-        siglog_data = _read_json_safe(SIGNAL_LOG_FILE, {})
+        siglog_data = _signal_log_read()
         latest_by_code = _build_latest_tracking_by_code(siglog_data)
         restored = {}
         for key, watch in raw.items():
@@ -11387,8 +12901,214 @@ EXEC_SPEED_PREWARM_MAX_SEC   = int(os.getenv("EXEC_SPEED_PREWARM_MAX_SEC",   "12
 EXEC_SPEED_PREWARM_MAX_CODES = int(os.getenv("EXEC_SPEED_PREWARM_MAX_CODES", "8")    or "8")     # 동시 워밍 최대 종목 수 (API 부담 제한)
 EXEC_SPEED_RECENT_WINDOW_SEC = int(os.getenv("EXEC_SPEED_RECENT_WINDOW_SEC", "30") or "30")
 EXEC_SPEED_STALE_WARN_SEC = int(os.getenv("EXEC_SPEED_STALE_WARN_SEC", "45") or "45")
-_execution_snapshots: dict = {}
+_execution_snapshots: dict = {}        # code → 체결 스냅샷 링버퍼 (v177.27 #AP, _new_exec_snapshot_ring)
 _exec_speed_prewarm: dict = {}          # code → registered_ts, 포착 직후 스냅샷 사전 누적용
+# ============================================================
+# 🔁 체결 스냅샷 링버퍼 (v177.27 #AP)
+# - 종목별 고정 용량 컬럼 배열(int64/float64) + 문자열 컬럼 리스트 → 틱당 O(1) 덮어쓰기, 리스트 재생성 없음
+# - 조회는 _exec_snap_last / _exec_snap_rows 가 기존과 같은 dict 형태로 복원
+# ============================================================
+EXEC_SNAPSHOT_RING_CAPACITY = 80
+_EXEC_SNAP_INT_FIELDS = ("price", "today_vol", "ask_qty", "bid_qty", "vol_delta", "trade_value_delta",
+                         "weighted_avg", "exec_vol", "acml_tr_pbmn", "high", "low", "vi_price")
+_EXEC_SNAP_FLOAT_FIELDS = ("ts", "change_rate", "elapsed_sec", "trade_value_per_sec", "exec_strength")
+_EXEC_SNAP_STR_FIELDS = ("market", "bstp_name")
+# v177.29 #AR: 체결속도 누적합 컬럼 — 칸마다 "이 샘플 직전까지의 누적값"(배타적 prefix) 저장, 총합은 ring["tot"]
+#   구간 합 = (끝 prefix 또는 총합) - 시작 prefix → 창 크기와 무관하게 O(1)
+_EXEC_AGG_FIELDS = ("pos", "valid", "amt", "rate", "bid", "bid_n")
+def _new_exec_snapshot_ring(cap: int = EXEC_SNAPSHOT_RING_CAPACITY) -> dict:
+    return {
+        "cap": cap, "start": 0, "count": 0, "seq": 0, "lock": threading.Lock(),
+        "i": {f: _array.array("q", [0]) * cap for f in _EXEC_SNAP_INT_FIELDS},
+        "f": {f: _array.array("d", [0.0]) * cap for f in _EXEC_SNAP_FLOAT_FIELDS},
+        "b": _array.array("b", [0]) * cap,   # micro_trade
+        "s": {f: [""] * cap for f in _EXEC_SNAP_STR_FIELDS},
+        "p": {f: _array.array("d", [0.0]) * cap for f in _EXEC_AGG_FIELDS},
+        "tot": {f: 0.0 for f in _EXEC_AGG_FIELDS},
+        "last_valid_ts": _array.array("d", [0.0]) * cap,   # 이 샘플까지 마지막 유효체결 ts
+        "peak": deque(),   # 창 최고가용 단조 감소 (seq, price)
+    }
+def _exec_ring_drop_oldest(ring: dict) -> None:
+    first_seq = ring["seq"] - ring["count"]
+    peak = ring["peak"]
+    while peak and peak[0][0] <= first_seq:
+        peak.popleft()
+    ring["start"] = (ring["start"] + 1) % ring["cap"]
+    ring["count"] -= 1
+def _exec_ring_append(ring: dict, sample: dict) -> None:
+    _exec_ring_write(
+        ring,
+        tuple(int(sample.get(f, 0) or 0) for f in _EXEC_SNAP_INT_FIELDS),
+        tuple(float(sample.get(f, 0.0) or 0.0) for f in _EXEC_SNAP_FLOAT_FIELDS),
+        bool(sample.get("micro_trade")),
+        tuple(str(sample.get(f, "") or "") for f in _EXEC_SNAP_STR_FIELDS),
+    )
+def _exec_ring_write(ring: dict, ints: tuple, floats: tuple, micro: bool, strs: tuple) -> None:
+    """필드 순서(_EXEC_SNAP_*_FIELDS) 그대로의 값 튜플을 한 칸에 기록 (v177.30: 틱 fast path는 dict 없이 직접 호출)."""
+    with ring["lock"]:
+        cap = ring["cap"]
+        if ring["count"] >= cap:   # 가득 참 → 가장 오래된 칸 덮어쓰기
+            _exec_ring_drop_oldest(ring)
+        slot = (ring["start"] + ring["count"]) % cap
+        prev_slot = (slot - 1) % cap
+        prev_last_valid = ring["last_valid_ts"][prev_slot] if ring["count"] else 0.0
+        ring["count"] += 1
+        for col, v in zip(ring["i"].values(), ints):
+            col[slot] = v
+        for col, v in zip(ring["f"].values(), floats):
+            col[slot] = v
+        ring["b"][slot] = 1 if micro else 0
+        for col, v in zip(ring["s"].values(), strs):
+            col[slot] = v
+        # 체결속도 기여분 (get_execution_speed_metrics 정의와 동일)
+        pos = 1 if ring["i"]["vol_delta"][slot] > 0 else 0
+        valid = 1 if pos and not ring["b"][slot] else 0
+        amt = rate = bid = 0.0
+        bid_n = 0
+        if valid:
+            amt = float(ring["i"]["trade_value_delta"][slot])
+            elapsed = ring["f"]["elapsed_sec"][slot]
+            rate = amt / max(elapsed, 1.0) if elapsed > 0 else 0.0
+            ask_qty, bid_qty = ring["i"]["ask_qty"][slot], ring["i"]["bid_qty"][slot]
+            if ask_qty > 0 and bid_qty > 0:
+                bid = min(bid_qty / ask_qty, COMMON_THRESHOLD_3P0)
+                bid_n = 1
+        tot = ring["tot"]
+        for f, v in (("pos", pos), ("valid", valid), ("amt", amt), ("rate", rate), ("bid", bid), ("bid_n", bid_n)):
+            ring["p"][f][slot] = tot[f]
+            tot[f] += v
+        ts = ring["f"]["ts"][slot]
+        ring["last_valid_ts"][slot] = ts if valid else prev_last_valid
+        price = ring["i"]["price"][slot]
+        seq = ring["seq"]
+        ring["seq"] = seq + 1
+        if price > 0:
+            peak = ring["peak"]
+            while peak and peak[-1][1] <= price:
+                peak.pop()
+            peak.append((seq, price))
+def _exec_ring_evict_before(ring: dict, cutoff_ts: float) -> None:
+    with ring["lock"]:
+        ts_col = ring["f"]["ts"]
+        while ring["count"] and ts_col[ring["start"]] < cutoff_ts:
+            _exec_ring_drop_oldest(ring)
+def _exec_ring_lower_bound(ring: dict, since_ts: float, lo: int = 0) -> int:
+    """ts >= since_ts 인 첫 논리 위치 (ts 단조 증가 → 이분 탐색). lock 보유 상태에서 호출."""
+    cap, start, ts_col = ring["cap"], ring["start"], ring["f"]["ts"]
+    hi = ring["count"]
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if ts_col[(start + mid) % cap] < since_ts:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+def _exec_ring_range_sum(ring: dict, field: str, lo: int, hi: int) -> float:
+    if lo >= hi:
+        return 0.0
+    cap, start = ring["cap"], ring["start"]
+    col = ring["p"][field]
+    end = ring["tot"][field] if hi >= ring["count"] else col[(start + hi) % cap]
+    return end - col[(start + lo) % cap]
+def _exec_ring_window_stats(ring: dict, since_ts: float, recent_since_ts: float, min_pullback_pct: float) -> dict:
+    """체결속도 창 집계 — 누적합 O(1) + 최고가 단조 덱.
+    평균절대편차(일관성)·눌림 구간 거래대금만 창 내 유효 샘플 컬럼 1회 순회 (dict 복원 없음)."""
+    with ring["lock"]:
+        count = ring["count"]
+        lo = _exec_ring_lower_bound(ring, since_ts)
+        out = {"window_samples": count - lo}
+        if count - lo < 2:
+            return out
+        mid = _exec_ring_lower_bound(ring, recent_since_ts, lo)
+        cap, start = ring["cap"], ring["start"]
+        last_slot = (start + count - 1) % cap
+        for f in _EXEC_AGG_FIELDS:
+            out[f] = _exec_ring_range_sum(ring, f, lo, count)
+        out["recent_valid"] = int(_exec_ring_range_sum(ring, "valid", mid, count))
+        out["recent_rate"] = _exec_ring_range_sum(ring, "rate", mid, count)
+        out["prior_valid"] = int(_exec_ring_range_sum(ring, "valid", lo, mid))
+        out["prior_rate"] = _exec_ring_range_sum(ring, "rate", lo, mid)
+        lv = ring["last_valid_ts"][last_slot]
+        out["last_valid_ts"] = lv if lv >= ring["f"]["ts"][(start + lo) % cap] else 0.0
+        out["last_price"] = ring["i"]["price"][last_slot]
+        first_seq = ring["seq"] - count + lo
+        out["peak_price"] = next((p for sq, p in ring["peak"] if sq >= first_seq), 0)
+        valid_n = int(out["valid"])
+        mean_amount = out["amt"] / max(valid_n, 1)
+        dip_price = int(out["peak_price"] * (1 - min_pullback_pct / 100.0)) if out["peak_price"] > 0 else 0
+        abs_dev = dip_amt = 0.0
+        dip_n = 0
+        if valid_n:
+            price_col, vd_col, tvd_col, micro_col = ring["i"]["price"], ring["i"]["vol_delta"], ring["i"]["trade_value_delta"], ring["b"]
+            for k in range(lo, count):
+                slot = (start + k) % cap
+                if vd_col[slot] <= 0 or micro_col[slot]:
+                    continue
+                v = tvd_col[slot]
+                abs_dev += abs(v - mean_amount)
+                if dip_price and price_col[slot] <= dip_price:
+                    dip_amt += v
+                    dip_n += 1
+        out["mean_abs_dev"] = abs_dev / max(valid_n, 1)
+        out["dip_n"] = dip_n
+        out["dip_mean"] = dip_amt / max(dip_n, 1)
+        return out
+def _exec_ring_row(ring: dict, slot: int) -> dict:
+    row = {f: col[slot] for f, col in ring["f"].items()}
+    for f, col in ring["i"].items():
+        row[f] = col[slot]
+    row["micro_trade"] = bool(ring["b"][slot])
+    for f, col in ring["s"].items():
+        row[f] = col[slot]
+    return row
+def _exec_ring_last_core(ring: dict) -> tuple:
+    """마지막 샘플 (ts, price, today_vol, bstp_name) — 없으면 (0.0, 0, 0, "")."""
+    with ring["lock"]:
+        if not ring["count"]:
+            return 0.0, 0, 0, ""
+        slot = (ring["start"] + ring["count"] - 1) % ring["cap"]
+        return (ring["f"]["ts"][slot], ring["i"]["price"][slot], ring["i"]["today_vol"][slot],
+                ring["s"]["bstp_name"][slot])
+def _exec_ring_field(ring: dict, field: str, default=0):
+    """마지막 샘플의 단일 필드 (dict 복원 없이)."""
+    with ring["lock"]:
+        if not ring["count"]:
+            return default
+        slot = (ring["start"] + ring["count"] - 1) % ring["cap"]
+        for group in (ring["i"], ring["f"], ring["s"]):
+            if field in group:
+                return group[field][slot]
+        return default
+def _exec_snap_count(code: str) -> int:
+    ring = _execution_snapshots.get(code)
+    return ring["count"] if ring else 0
+def _exec_snap_last(code: str) -> dict:
+    """최신 체결 스냅샷 dict (없으면 {})."""
+    ring = _execution_snapshots.get(code)
+    if not ring:
+        return {}
+    with ring["lock"]:
+        if not ring["count"]:
+            return {}
+        return _exec_ring_row(ring, (ring["start"] + ring["count"] - 1) % ring["cap"])
+def _exec_snap_rows(code: str, since_ts: float | None = None) -> list:
+    """체결 스냅샷 dict 목록 (오래된 순). since_ts 지정 시 ts >= since_ts 만."""
+    ring = _execution_snapshots.get(code)
+    if not ring:
+        return []
+    with ring["lock"]:
+        cap, start, count = ring["cap"], ring["start"], ring["count"]
+        ts_col = ring["f"]["ts"]
+        lo, hi = 0, count
+        if since_ts is not None:   # ts 단조 증가 → 이분 탐색
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if ts_col[(start + mid) % cap] < since_ts:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            hi = count
+        return [_exec_ring_row(ring, (start + k) % cap) for k in range(lo, hi)]
 # ════════════════════════════════════════════════════════════════
 # v162: KIS WebSocket 실시간 체결 데이터 수신 레이어
 # ════════════════════════════════════════════════════════════════
@@ -11400,9 +13120,67 @@ _ws_approval_key: str = ""
 _ws_approval_key_ts: float = 0.0
 _ws_connected: bool = False             # WebSocket 연결 상태 플래그
 _ws_last_recv_ts: float = 0.0           # 마지막 데이터 수신 시각
-_ws_last_sync_ts: float = 0.0           # 마지막 구독 동기화 시각
 _ws_reconnect_count: int = 0
 _ws_stats = {"recv_count": 0, "parse_errors": 0, "reconnects": 0, "subscribe_ok": 0, "subscribe_fail": 0}
+# ============================================================
+# 🧩 WebSocket 다중 연결 샤드 (v177.31 #AT)
+# - WS_SHARD_COUNT개 세션에 구독을 분산 (세션당 WS_MAX_SUBSCRIPTIONS) → REST 폴링 종목 감소
+# - WS_SHARD_CREDENTIALS='[{"app_key": "...", "app_secret": "..."}]' : 샤드 1번부터 별도 앱키(approval_key) 사용
+#   KIS는 앱키당 WS 세션 1개 → 샤드 수는 1 + 유효 자격증명 수로 제한 (기본 앱키 공유 샤드는 만들지 않음)
+# - _ws_subscribed_codes 는 전체 샤드 구독 합집합 (기존 조회부 호환), _ws_code_shard 가 종목 → 샤드 배정
+# ============================================================
+WS_SHARD_COUNT = max(1, int(os.environ.get("WS_SHARD_COUNT", "1") or "1"))
+def _ws_load_shard_credentials() -> list:
+    try:
+        rows = json.loads(os.environ.get("WS_SHARD_CREDENTIALS", "") or "[]")
+        return [r for r in rows if isinstance(r, dict)] if isinstance(rows, list) else []
+    except ValueError:
+        _log_warn_msg("⚠️ WS_SHARD_CREDENTIALS JSON 파싱 실패 — 기본 앱키 공유")
+        return []
+_ws_shard_creds = [c for c in _ws_load_shard_credentials()
+                   if str(c.get("app_key", "") or "").strip() and str(c.get("app_secret", "") or "").strip()]
+if WS_SHARD_COUNT > 1 + len(_ws_shard_creds):
+    _log_warn_msg(f"⚠️ WS_SHARD_COUNT={WS_SHARD_COUNT} → {1 + len(_ws_shard_creds)} "
+                  f"(샤드 1번부터 WS_SHARD_CREDENTIALS 앱키 필요, 앱키당 WS 세션 1개)")
+    WS_SHARD_COUNT = 1 + len(_ws_shard_creds)
+_ws_shards: list = [
+    {
+        "idx": i, "ws": None, "connected": False, "thread": None, "last_sync_ts": 0.0, "subs": {}, "ob_subs": {},
+        "app_key": str(((_ws_shard_creds[i - 1] if 0 < i <= len(_ws_shard_creds) else {}) or {}).get("app_key", "") or "").strip(),
+        "app_secret": str(((_ws_shard_creds[i - 1] if 0 < i <= len(_ws_shard_creds) else {}) or {}).get("app_secret", "") or "").strip(),
+        "approval_key": "", "approval_key_ts": 0.0,
+    }
+    for i in range(WS_SHARD_COUNT)
+]
+_ws_code_shard: dict = {}               # code → shard idx (배정 결과)
+_ws_last_plan_ts: float = 0.0
+_ws_shard_stats = {"planned": 0, "overflow": 0, "swapped": 0, "released": 0, "held": 0, "deferred": 0}
+# ============================================================
+# 🧩 구독 우선순위 스케줄러 (v177.32 #AU)
+# - 대상별 점수: 진입 감시(+진입가 근접도·등급) / 진입 후 추적 노출 / 셋업 감시 / 프리웜(경과 감쇠)
+# - 최소 유지: 배정 후 WS_SUB_MIN_HOLD_SEC 동안은 대상에서 빠져도 구독 유지 (틱 이력 공백 방지)
+# - 교체: 빈 슬롯이 없으면 유지시간 지난 최저 점수 종목보다 WS_SUB_SWAP_MARGIN 이상 높을 때만
+# - 예산: 배정 1회당 교체·해제 메시지 WS_SUB_CHURN_BUDGET 개까지 (빈 슬롯 신규 구독은 미포함)
+# ============================================================
+WS_SUB_MIN_HOLD_SEC = int(os.environ.get("WS_SUB_MIN_HOLD_SEC", "120") or "120")
+WS_SUB_SWAP_MARGIN = float(os.environ.get("WS_SUB_SWAP_MARGIN", "15") or "15")
+WS_SUB_CHURN_BUDGET = max(0, int(os.environ.get("WS_SUB_CHURN_BUDGET", "6") or "6"))
+WS_SUB_PROXIMITY_PCT = float(os.environ.get("WS_SUB_PROXIMITY_PCT", "5.0") or "5.0")   # 진입가 ±N% 밖이면 근접 가점 0
+_ws_code_since: dict = {}               # code → 배정 시각 (최소 유지 판정)
+_ws_code_score: dict = {}               # code → 마지막 배정 시 점수 (구독 순서·상태 표시)
+# ============================================================
+# 🧩 실시간 호가 스트림 H0STASP0 (v177.33 #AV)
+# - WS_ORDERBOOK_ENABLED=1 : 점수 상위 WS_ORDERBOOK_TOP_N 종목에 호가 구독 추가 (체결 구독과 같은 샤드)
+# - 호가 구독도 세션 상한(H0STCNT0+H0STASP0 합산)을 쓰므로 체결 배정 후 남는 슬롯에서만 배정
+# - _ws_orderbook[code] = (수신 ts, array('q') 40칸 [매도호가1~10, 매수호가1~10, 매도잔량1~10, 매수잔량1~10])
+#   튜플 통째 교체 → 조회부는 잠금 없이 일관된 스냅샷
+# ============================================================
+WS_ORDERBOOK_ENABLED = os.environ.get("WS_ORDERBOOK_ENABLED", "0") == "1"
+WS_ORDERBOOK_TOP_N = max(0, int(os.environ.get("WS_ORDERBOOK_TOP_N", "8") or "8"))
+WS_ORDERBOOK_MAX_AGE_SEC = float(os.environ.get("WS_ORDERBOOK_MAX_AGE_SEC", "5") or "5")
+_ws_orderbook: dict = {}                # code → (ts, levels)
+_ws_code_orderbook: dict = {}           # code → shard idx (호가 구독 배정)
+_ws_orderbook_stats = {"frames": 0, "planned": 0, "hit": 0, "stale": 0}
 
 # H0STCNT0 체결 데이터 필드 순서 (KIS API 공식 명세)
 _WS_H0STCNT0_FIELDS = [
@@ -11455,38 +13233,46 @@ _WS_H0STCNT0_FIELDS = [
 ]
 
 
-def _ws_get_approval_key() -> str:
-    """KIS WebSocket 전용 approval_key 발급 (REST token과 별도)."""
+def _ws_get_approval_key(shard: dict | None = None) -> str:
+    """KIS WebSocket 전용 approval_key 발급 (REST token과 별도).
+    v177.31: 별도 앱키가 지정된 샤드는 샤드별로 발급·보관, 그 외는 기본 키 공유."""
     global _ws_approval_key, _ws_approval_key_ts
+    own = bool(shard and shard.get("app_key"))
+    cur_key = shard["approval_key"] if own else _ws_approval_key
+    cur_ts = shard["approval_key_ts"] if own else _ws_approval_key_ts
     now = time.time()
     # approval_key는 24시간 유효하지만 안전하게 12시간마다 갱신
-    if _ws_approval_key and (now - _ws_approval_key_ts) < 43200:
-        return _ws_approval_key
+    if cur_key and (now - cur_ts) < 43200:
+        return cur_key
     try:
         url = f"{KIS_BASE_URL}/oauth2/Approval"
         body = {
             "grant_type": "client_credentials",
-            "appkey": KIS_APP_KEY,
-            "secretkey": KIS_APP_SECRET,
+            "appkey": shard["app_key"] if own else KIS_APP_KEY,
+            "secretkey": shard["app_secret"] if own else KIS_APP_SECRET,
         }
         resp = requests.post(url, json=body, timeout=10)
         resp.raise_for_status()
         key = resp.json().get("approval_key", "")
         if key:
-            _ws_approval_key = key
-            _ws_approval_key_ts = now
-            _log_info_msg(f"🔑 WebSocket approval_key 발급 완료")
+            if own:
+                shard["approval_key"] = key
+                shard["approval_key_ts"] = now
+            else:
+                _ws_approval_key = key
+                _ws_approval_key_ts = now
+            _log_info_msg(f"🔑 WebSocket approval_key 발급 완료" + (f" (샤드 {shard['idx']})" if own else ""))
         return key
     except Exception as e:
         _log_error_msg(f"❌ WebSocket approval_key 발급 실패: {e}")
         return ""
 
 
-def _ws_build_subscribe_msg(tr_id: str, tr_key: str, tr_type: str = "1") -> str:
+def _ws_build_subscribe_msg(tr_id: str, tr_key: str, tr_type: str = "1", approval_key: str | None = None) -> str:
     """KIS WebSocket 구독/해제 메시지 생성."""
     return json.dumps({
         "header": {
-            "approval_key": _ws_approval_key,
+            "approval_key": approval_key if approval_key is not None else _ws_approval_key,
             "custtype": "P",
             "tr_type": tr_type,
             "content-type": "utf-8",
@@ -11501,7 +13287,8 @@ def _ws_build_subscribe_msg(tr_id: str, tr_key: str, tr_type: str = "1") -> str:
 
 
 def _ws_parse_execution_data(raw_data: str) -> list[dict]:
-    """H0STCNT0 체결 데이터 파싱 → _record_execution_snapshot 호환 dict 리스트 반환."""
+    """H0STCNT0 체결 데이터 파싱 → _record_execution_snapshot 호환 dict 리스트 반환.
+    벤치마크 기준 전용 (_ws_parser_benchmark) — 실시간 경로는 _ws_iter_h0stcnt0 / _ws_ingest_h0stcnt0."""
     results = []
     try:
         parts = raw_data.split("|")
@@ -11553,35 +13340,221 @@ def _ws_parse_execution_data(raw_data: str) -> list[dict]:
     return results
 
 
+# ============================================================
+# 📥 체결 틱 처리 큐 (v177.28 #AQ)
+# - 수신 스레드는 프레임을 큐에 넣기만 → PINGPONG/recv 지연 방지
+# - KIS-WS-Tick 워커가 최대 WS_TICK_BATCH_MAX 프레임씩 꺼내 파싱·_record_execution_snapshot
+# - 큐 가득 차면 가장 오래된 프레임 폐기 (최신 체결 우선), 적체·폐기·지연은 _ws_tick_stats
+# ============================================================
+import queue as _queue
+WS_TICK_QUEUE_MAX = int(os.getenv("WS_TICK_QUEUE_MAX", "5000") or "5000")
+WS_TICK_BATCH_MAX = int(os.getenv("WS_TICK_BATCH_MAX", "200") or "200")
+_ws_tick_queue: _queue.Queue = _queue.Queue(maxsize=max(WS_TICK_QUEUE_MAX, 100))
+_ws_tick_worker_thread: threading.Thread | None = None
+_ws_tick_worker_lock = threading.Lock()
+_ws_tick_stats = {"enqueued": 0, "dropped": 0, "processed": 0, "batches": 0,
+                  "max_depth": 0, "last_batch": 0, "last_lag_ms": 0.0, "max_lag_ms": 0.0}
+def _ws_tick_enqueue(data: str, recv_ts: float) -> None:
+    item = (recv_ts, data)
+    try:
+        _ws_tick_queue.put_nowait(item)
+    except _queue.Full:
+        try:
+            _ws_tick_queue.get_nowait()
+        except _queue.Empty:
+            pass
+        _ws_tick_stats["dropped"] += 1
+        try:
+            _ws_tick_queue.put_nowait(item)
+        except _queue.Full:
+            _ws_tick_stats["dropped"] += 1
+            return
+    _ws_tick_stats["enqueued"] += 1
+    depth = _ws_tick_queue.qsize()
+    if depth > _ws_tick_stats["max_depth"]:
+        _ws_tick_stats["max_depth"] = depth
+    _ws_tick_worker_start()
+def _ws_process_tick_batch(batch: list) -> None:
+    # 시장 판별은 배치당 1회: NXT 시간대이고 KRX 미개장이면 NXT
+    market = "KRX"
+    if not is_market_open() and is_nxt_open():
+        market = "NXT"
+    journal = [] if TICK_JOURNAL_ENABLED else None   # v177.34 #AW: 배치 단위 1회 기록
+    for _recv_ts, data in batch:
+        if data.startswith("0|H0STASP0"):
+            _ws_stats["recv_count"] += _ws_ingest_h0stasp0(data, _recv_ts)   # v177.33 #AV: 호가 스트림
+            continue
+        _ws_stats["recv_count"] += _ws_ingest_h0stcnt0(data, market, _recv_ts, journal)   # v177.30 #AS: fast parser → 링버퍼 직접 기록
+    if journal:
+        _tick_journal_write(journal)
+    lag_ms = round((time.time() - batch[0][0]) * 1000, 1)
+    _ws_tick_stats["processed"] += len(batch)
+    _ws_tick_stats["batches"] += 1
+    _ws_tick_stats["last_batch"] = len(batch)
+    _ws_tick_stats["last_lag_ms"] = lag_ms
+    if lag_ms > _ws_tick_stats["max_lag_ms"]:
+        _ws_tick_stats["max_lag_ms"] = lag_ms
+    # v169.9: 틱 수신 즉시 대시보드 갱신 — v177.35 #AX: 발행 스레드에 dirty 통지만 (윈도우 단위 병합)
+    _mark_dashboard_dirty()
+def _ws_tick_worker_loop() -> None:
+    while True:
+        try:
+            first = _ws_tick_queue.get(timeout=1.0)
+        except _queue.Empty:
+            continue
+        batch = [first]
+        while len(batch) < WS_TICK_BATCH_MAX:
+            try:
+                batch.append(_ws_tick_queue.get_nowait())
+            except _queue.Empty:
+                break
+        try:
+            _ws_process_tick_batch(batch)
+        except Exception as e:
+            _swallow_exception(e, "ws_tick_worker")
+def _ws_tick_worker_start() -> None:
+    global _ws_tick_worker_thread
+    if _ws_tick_worker_thread and _ws_tick_worker_thread.is_alive():
+        return
+    with _ws_tick_worker_lock:
+        if _ws_tick_worker_thread and _ws_tick_worker_thread.is_alive():
+            return
+        _ws_tick_worker_thread = threading.Thread(target=_ws_tick_worker_loop, name="KIS-WS-Tick", daemon=True)
+        _ws_tick_worker_thread.start()
+_WS_H0STCNT0_FIELD_COUNT = len(_WS_H0STCNT0_FIELDS)
+def _ws_iter_h0stcnt0(raw_data: str):
+    """H0STCNT0 fast path (v177.30 #AS) — 레코드별 리스트 슬라이스·payload dict 없이 필요한 필드만 인덱스로 변환.
+    yield (code, price, acml_vol, change_rate, ask_qty, bid_qty, weighted_avg, exec_vol, exec_strength,
+           acml_tr_pbmn, high, low, vi_price) — _ws_parse_execution_data 와 같은 검증 규칙."""
+    parts = raw_data.split("|", 3)
+    if len(parts) < 4 or parts[1] != "H0STCNT0":
+        return
+    try:
+        data_cnt = int(parts[2])
+    except ValueError:
+        _ws_stats["parse_errors"] += 1
+        return
+    v = parts[3].split("^")
+    n = _WS_H0STCNT0_FIELD_COUNT
+    for o in range(0, min(data_cnt, len(v) // n) * n, n):
+        code = v[o].strip()
+        if len(code) != 6 or not code.isdigit():
+            continue
+        try:
+            price = int(v[o + 2])
+            acml_vol = int(v[o + 13])
+            if price <= 0 or acml_vol <= 0:
+                continue
+            f = v[o + 5];  change_rate = float(f) if f else 0.0
+            f = v[o + 36]; ask_qty = int(f) if f else 0
+            f = v[o + 37]; bid_qty = int(f) if f else 0
+            f = v[o + 6];  weighted_avg = int(float(f)) if f else 0
+            f = v[o + 12]; exec_vol = int(f) if f else 0
+            f = v[o + 18]; exec_strength = float(f) if f else 0.0
+            f = v[o + 14]; acml_tr_pbmn = int(f) if f else 0
+            f = v[o + 8];  high = int(f) if f else 0
+            f = v[o + 9];  low = int(f) if f else 0
+            f = v[o + 45]; vi_price = int(float(f)) if f else 0
+        except ValueError:
+            _ws_stats["parse_errors"] += 1
+            continue
+        yield (code, price, acml_vol, change_rate, ask_qty, bid_qty, weighted_avg, exec_vol,
+               exec_strength, acml_tr_pbmn, high, low, vi_price)
+def _ws_ingest_h0stcnt0(raw_data: str, market: str, recv_ts: float = 0.0, journal: list | None = None) -> int:
+    cnt = 0
+    for rec in _ws_iter_h0stcnt0(raw_data):
+        if journal is not None:
+            _tick_journal_pack(journal, recv_ts, market, rec)
+        try:
+            _record_execution_tick(rec[0], market, *rec[1:], recv_ts=recv_ts)
+            cnt += 1
+        except Exception as e:
+            _swallow_exception(e)
+    return cnt
+def _ws_ingest_h0stasp0(raw_data: str, recv_ts: float) -> int:
+    """H0STASP0 호가 프레임 → _ws_orderbook (v177.33 #AV). 필드 3~42 = 매도호가1~10, 매수호가1~10, 매도잔량1~10, 매수잔량1~10."""
+    parts = raw_data.split("|", 3)
+    if len(parts) < 4 or parts[1] != "H0STASP0":
+        return 0
+    v = parts[3].split("^")
+    try:
+        data_cnt = int(parts[2])
+    except ValueError:
+        _ws_stats["parse_errors"] += 1
+        return 0
+    # 레코드당 필드 수는 프레임에서 역산 (명세 59개, 앞 43개만 사용)
+    n = len(v) // data_cnt if data_cnt > 0 else 0
+    if n < 43:
+        return 0
+    cnt = 0
+    for o in range(0, data_cnt * n, n):
+        code = v[o].strip()
+        if len(code) != 6 or not code.isdigit():
+            continue
+        try:
+            levels = _array.array("q", [int(f) if f else 0 for f in v[o + 3:o + 43]])
+        except ValueError:
+            _ws_stats["parse_errors"] += 1
+            continue
+        _ws_orderbook[code] = (recv_ts, levels)
+        cnt += 1
+    _ws_orderbook_stats["frames"] += 1
+    return cnt
+def get_ws_orderbook_snapshot(code: str, max_age_sec: float | None = None) -> dict:
+    """실시간 호가 스트림 기반 호가 요약 (v177.33 #AV) — get_orderbook_depth_snapshot 과 같은 필드 + ask_qty1/bid_qty1.
+    수신 없거나 max_age_sec(기본 WS_ORDERBOOK_MAX_AGE_SEC) 초과면 {} → 호출부는 기존 REST/체결 필드로 폴백."""
+    book = _ws_orderbook.get(normalize_stock_code(code)) if WS_ORDERBOOK_ENABLED else None
+    if not book:
+        return {}
+    ts, levels = book
+    if time.time() - ts > (WS_ORDERBOOK_MAX_AGE_SEC if max_age_sec is None else max_age_sec):
+        _ws_orderbook_stats["stale"] += 1
+        return {}
+    out = _orderbook_depth_summary(levels[20:30], levels[30:40])
+    if not out:
+        return {}
+    _ws_orderbook_stats["hit"] += 1
+    out.update({"ask_price1": levels[0], "bid_price1": levels[10], "ask_qty1": levels[20], "bid_qty1": levels[30],
+                "source": "ws", "age_sec": round(time.time() - ts, 2)})
+    return out
+def _ws_parser_benchmark(records_per_frame: int = 3, frames: int = 20000) -> dict:
+    """기존 _ws_parse_execution_data vs _ws_iter_h0stcnt0 파싱 시간 비교 (python stock_alert.py --bench-ws-parser)."""
+    rec = ["005930", "090012", "71500", "2", "1200", "1.71", "71320.55", "70500", "71800", "70300",
+           "71600", "71500", "37", "8123456", "580123456789", "12034", "15012", "2978", "123.45",
+           "3210456", "4012345", "1", "55.12", "134.2", "090000", "2", "1000", "091512", "5", "-300",
+           "090301", "2", "1200", "20261019", "20", "N", "14523", "23111", "812345", "954321",
+           "0.14", "6012345", "135.12", "0", "N", "0"]
+    assert len(rec) == _WS_H0STCNT0_FIELD_COUNT
+    raw = f"0|H0STCNT0|{records_per_frame:03d}|" + "^".join(rec * records_per_frame)
+    t0 = time.perf_counter()
+    for _ in range(frames):
+        _ws_parse_execution_data(raw)
+    t_legacy = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for _ in range(frames):
+        for _rec in _ws_iter_h0stcnt0(raw):
+            pass
+    t_fast = time.perf_counter() - t0
+    n = frames * records_per_frame
+    return {"records": n,
+            "legacy_us_per_record": round(t_legacy / n * 1e6, 3),
+            "fast_us_per_record": round(t_fast / n * 1e6, 3),
+            "speedup": round(t_legacy / t_fast, 2) if t_fast > 0 else 0.0}
 def _ws_on_message(data: str) -> None:
-    """WebSocket 수신 메시지 처리 — 체결 데이터면 _record_execution_snapshot 호출."""
+    """WebSocket 수신 메시지 처리 — 체결 데이터면 틱 큐에 적재 (v177.28: 처리는 KIS-WS-Tick 워커)."""
     global _ws_last_recv_ts
     _ws_last_recv_ts = time.time()
 
     if not data:
         return
+    if KIS_RECORD_DIR:
+        _kis_record_append("ws", {"raw": data})  # v177.22 #AK: 기록 모드
 
     first_char = data[0] if data else ""
 
     # 실시간 데이터 (0=일반, 1=암호화)
     if first_char == "0":
-        parsed = _ws_parse_execution_data(data)
-        for item in parsed:
-            try:
-                # 시장 판별: NXT 시간대이고 KRX 미개장이면 NXT
-                market = "KRX"
-                if not is_market_open() and is_nxt_open():
-                    market = "NXT"
-                _record_execution_snapshot(item["code"], item["payload"], market=market)
-                _ws_stats["recv_count"] += 1
-            except Exception as e:
-                _swallow_exception(e)
-        # v169.9: 틱 수신 즉시 대시보드 갱신 (3초 쓰로틀)
-        try:
-            if time.time() - _WEB_DASHBOARD_LAST_PUSH >= _WEB_DASHBOARD_THROTTLE_SEC:
-                threading.Thread(target=_push_dashboard_json, daemon=True).start()
-        except Exception:
-            pass
+        _ws_tick_enqueue(data, _ws_last_recv_ts)
         return
 
     # JSON 응답 (구독 확인, 에러, PINGPONG)
@@ -11603,16 +13576,22 @@ def _ws_on_message(data: str) -> None:
         pass
 
 
-def _ws_subscribe(ws, code: str) -> bool:
-    """종목 체결가 구독 등록."""
+def _ws_shard_approval_key(shard: dict) -> str:
+    return shard["approval_key"] if shard.get("app_key") else _ws_approval_key
+
+
+def _ws_subscribe(shard: dict, code: str) -> bool:
+    """종목 체결가 구독 등록 (v177.31: 샤드 연결 단위)."""
     # v163.12 [#1]: 연결 끊긴 상태에서 send 시도 차단 → Broken pipe 무한반복 방지
-    if not _ws_connected:
+    if not shard["connected"] or shard["ws"] is None:
         return False
     try:
-        msg = _ws_build_subscribe_msg("H0STCNT0", code, "1")
-        ws.send(msg)
+        msg = _ws_build_subscribe_msg("H0STCNT0", code, "1", _ws_shard_approval_key(shard))
+        shard["ws"].send(msg)
         with _ws_lock:
-            _ws_subscribed_codes[code] = time.time()
+            now = time.time()
+            shard["subs"][code] = now
+            _ws_subscribed_codes[code] = now
         return True
     except Exception as e:
         # v165.6 [#6]: Broken pipe 반복 WARNING 억제 — 종목별 최초 3회만 WARNING, 이후 무시
@@ -11629,20 +13608,26 @@ _ws_unsubscribe_fail_count: dict = {}  # v163.6: 구독해제 실패 횟수 추
 _ws_subscribe_fail_count:   dict = {}  # v165.6 [#6]: 구독 실패 횟수 — Broken pipe 반복 WARNING 억제
 _nxt_eligible_cache: dict = {}         # v165.14: code → bool, NXT 거래가능 종목 캐시 (당일 유지)
 
-def _ws_unsubscribe(ws, code: str) -> bool:
-    """종목 체결가 구독 해제."""
+def _ws_drop_shard_sub(shard: dict, code: str) -> None:
+    """_ws_lock 보유 상태에서 호출."""
+    shard["subs"].pop(code, None)
+    if _ws_code_shard.get(code) == shard["idx"] or code not in _ws_code_shard:
+        _ws_subscribed_codes.pop(code, None)
+    _ws_unsubscribe_fail_count.pop(code, None)
+
+
+def _ws_unsubscribe(shard: dict, code: str) -> bool:
+    """종목 체결가 구독 해제 (v177.31: 샤드 연결 단위)."""
     # v163.12 [#1]: 연결 끊긴 상태에서 send 시도 차단 → Broken pipe 무한반복 방지
-    if not _ws_connected:
+    if not shard["connected"] or shard["ws"] is None:
         with _ws_lock:
-            _ws_subscribed_codes.pop(code, None)
-            _ws_unsubscribe_fail_count.pop(code, None)
+            _ws_drop_shard_sub(shard, code)
         return False
     try:
-        msg = _ws_build_subscribe_msg("H0STCNT0", code, "2")
-        ws.send(msg)
+        msg = _ws_build_subscribe_msg("H0STCNT0", code, "2", _ws_shard_approval_key(shard))
+        shard["ws"].send(msg)
         with _ws_lock:
-            _ws_subscribed_codes.pop(code, None)
-            _ws_unsubscribe_fail_count.pop(code, None)
+            _ws_drop_shard_sub(shard, code)
         return True
     except Exception as e:
         # v163.6: 실패 횟수 카운트 — 3회 초과 시 경고 없이 구독 목록에서 강제 제거
@@ -11653,92 +13638,258 @@ def _ws_unsubscribe(ws, code: str) -> bool:
                 _log_warn_msg(f"⚠️ WebSocket 구독해제 실패 [{code}]: {e}")
             else:
                 # 3회 초과: 조용히 목록에서 제거하고 포기
-                _ws_subscribed_codes.pop(code, None)
-                _ws_unsubscribe_fail_count.pop(code, None)
+                _ws_drop_shard_sub(shard, code)
         return False
 
 
-def _ws_get_target_codes() -> list[str]:
-    """현재 구독 대상 종목 코드 리스트 반환 — _entry_watch + _exec_speed_prewarm 기반."""
-    targets = set()
-    # 1순위: entry_watch 활성 종목
+def _ws_orderbook_subscribe(shard: dict, code: str, subscribe: bool = True) -> bool:
+    """종목 호가(H0STASP0) 구독/해제 (v177.33 #AV). 실패 시 목록만 정리하고 다음 동기화에서 재시도."""
+    if not shard["connected"] or shard["ws"] is None:
+        with _ws_lock:
+            shard["ob_subs"].pop(code, None)
+        return False
     try:
-        for key, watch in dict(_entry_watch).items():
-            code = normalize_stock_code(watch.get("code"))
-            if code:
-                targets.add(code)
-    except Exception:
-        pass
-    # 2순위: prewarm 대상 종목
+        shard["ws"].send(_ws_build_subscribe_msg("H0STASP0", code, "1" if subscribe else "2", _ws_shard_approval_key(shard)))
+        with _ws_lock:
+            if subscribe:
+                shard["ob_subs"][code] = time.time()
+            else:
+                shard["ob_subs"].pop(code, None)
+        return True
+    except Exception as e:
+        with _ws_lock:
+            shard["ob_subs"].pop(code, None)
+        _swallow_exception(e, "ws_orderbook_subscribe")
+        return False
+
+
+def _ws_proximity_score(code: str, entry_price) -> float:
+    """최근 체결가가 진입가에 가까울수록 0~1 (체결 이력 없거나 ±WS_SUB_PROXIMITY_PCT 밖이면 0)."""
+    entry = safe_int(entry_price, 0)
+    ring = _execution_snapshots.get(code)
+    if entry <= 0 or not ring or WS_SUB_PROXIMITY_PCT <= 0:
+        return 0.0
+    price = _exec_ring_last_core(ring)[1]
+    if price <= 0:
+        return 0.0
+    gap_pct = abs(price - entry) / entry * 100.0
+    return max(0.0, 1.0 - gap_pct / WS_SUB_PROXIMITY_PCT)
+
+
+def _ws_score_targets() -> dict:
+    """구독 대상 code → 우선순위 점수 (v177.32 #AU). 여러 출처에 걸친 종목은 최고 점수 사용."""
+    scores = {}
+    now = time.time()
+
+    def _put(code, score):
+        code = normalize_stock_code(code)
+        if code and score > scores.get(code, -1.0):
+            scores[code] = score
+
+    # entry_watch: 진입 후 추적(entry_hit) 노출 최우선, 미진입은 진입가 근접도·등급 가점
     try:
-        for code in list(_exec_speed_prewarm.keys()):
-            code = normalize_stock_code(code)
-            if code:
-                targets.add(code)
-    except Exception:
-        pass
-    # 3순위: execution_setup_watch 종목
+        for watch in list(_entry_watch.values()):
+            if not isinstance(watch, dict):
+                continue
+            score = 50.0
+            if watch.get("entry_hit") or watch.get("entry_hit_locked"):
+                score += 40.0
+            else:
+                score += 30.0 * _ws_proximity_score(normalize_stock_code(watch.get("code")), watch.get("entry_price"))
+            score += 4.0 * _entry_grade_rank(watch.get("execution_grade") or watch.get("grade") or "")
+            _put(watch.get("code"), score)
+    except Exception as e:
+        _swallow_exception(e)
+    # execution_setup_watch: 셋업 대기 — 계획 진입가 근접도
     try:
-        for code in list(_execution_setup_watch.keys()):
-            code = normalize_stock_code(code)
-            if code:
-                targets.add(code)
-    except Exception:
-        pass
-    return list(targets)
+        for code, setup in list(_execution_setup_watch.items()):
+            setup = setup if isinstance(setup, dict) else {}
+            entry = setup.get("planned_entry_price") or setup.get("entry_price")
+            _put(code, 30.0 + 25.0 * _ws_proximity_score(normalize_stock_code(code), entry))
+    except Exception as e:
+        _swallow_exception(e)
+    # prewarm: 포착 직후 워밍 — 경과에 따라 20 → 5 감쇠
+    try:
+        for code, reg_ts in list(_exec_speed_prewarm.items()):
+            age = max(0.0, now - float(reg_ts or now))
+            _put(code, 5.0 + 15.0 * max(0.0, 1.0 - age / max(1, EXEC_SPEED_PREWARM_MAX_SEC)))
+    except Exception as e:
+        _swallow_exception(e)
+    return scores
 
 
-def _ws_sync_subscriptions(ws) -> None:
-    """구독 대상을 현재 _entry_watch/_exec_speed_prewarm과 동기화."""
-    global _ws_last_sync_ts
+def _ws_get_target_codes() -> list[str]:
+    """현재 구독 대상 종목 코드 리스트 — 우선순위 점수 내림차순 (v177.32 #AU)."""
+    scores = _ws_score_targets()
+    return sorted(scores, key=lambda c: (-scores[c], c))
+
+
+def _ws_plan_shards() -> None:
+    """구독 대상 → 연결된 샤드 배정 (v177.31 #AT, v177.32 #AU 점수·유지시간·교체 예산).
+    기존 배정은 유지(재구독 최소화), 신규 종목은 점수 순으로 여유 슬롯이 가장 많은 샤드에,
+    슬롯이 없으면 유지시간 지난 최저 점수 종목과 교체(마진·예산 내), 나머지는 REST 폴링 유지."""
+    global _ws_last_plan_ts
     now = time.time()
-    if now - _ws_last_sync_ts < WS_SYNC_INTERVAL_SEC:
+    if now - _ws_last_plan_ts < WS_SYNC_INTERVAL_SEC:
         return
-    _ws_last_sync_ts = now
-
-    target_codes = _ws_get_target_codes()
+    _ws_last_plan_ts = now
+    scores = _ws_score_targets()
     with _ws_lock:
-        current_codes = set(_ws_subscribed_codes.keys())
+        live = {sh["idx"] for sh in _ws_shards if sh["connected"]}
+        # 끊긴 샤드 배정은 메시지 없이 정리 (다음 배정에서 재구독)
+        for code in list(_ws_code_shard.keys()):
+            if _ws_code_shard[code] not in live:
+                _ws_code_shard.pop(code, None)
+                _ws_code_since.pop(code, None)
+        load = {i: 0 for i in live}
+        for i in _ws_code_shard.values():
+            load[i] += 1
+
+        def _held(code):
+            return now - _ws_code_since.get(code, 0.0) < WS_SUB_MIN_HOLD_SEC
+
+        def _assign(code, i):
+            _ws_code_shard[code] = i
+            _ws_code_since[code] = now
+            load[i] += 1
+
+        def _release(code):
+            load[_ws_code_shard.pop(code)] -= 1
+            _ws_code_since.pop(code, None)
+
+        budget = WS_SUB_CHURN_BUDGET
+        overflow = deferred = 0
+        for code in sorted((c for c in scores if c not in _ws_code_shard), key=lambda c: (-scores[c], c)):
+            free = [(WS_MAX_SUBSCRIPTIONS - n, -i) for i, n in load.items() if n < WS_MAX_SUBSCRIPTIONS]
+            if free:
+                _assign(code, -max(free)[1])
+                continue
+            # 교체 후보: 유지시간 지난 종목 중 대상 이탈(점수 없음) 우선, 그다음 최저 점수
+            victims = [c for c in _ws_code_shard if not _held(c)]
+            if not victims:
+                overflow += 1
+                continue
+            victim = min(victims, key=lambda c: (c in scores, scores.get(c, 0.0), c))
+            if victim in scores and scores[code] < scores[victim] + WS_SUB_SWAP_MARGIN:
+                overflow += 1
+                continue
+            if budget < 2:
+                overflow += 1
+                deferred += 1
+                continue
+            i = _ws_code_shard[victim]
+            _release(victim)
+            _assign(code, i)
+            budget -= 2
+            _ws_shard_stats["swapped"] += 1
+        # 대상에서 빠진 종목: 유지시간 경과분만 남은 예산 안에서 해제 (오래된 배정부터)
+        held = 0
+        for code in sorted((c for c in _ws_code_shard if c not in scores), key=lambda c: _ws_code_since.get(c, 0.0)):
+            if _held(code):
+                held += 1
+            elif budget >= 1:
+                _release(code)
+                budget -= 1
+                _ws_shard_stats["released"] += 1
+            else:
+                deferred += 1
+        _ws_code_score.clear()
+        _ws_code_score.update({c: scores.get(c, 0.0) for c in _ws_code_shard})
+        _ws_plan_orderbook(load)
+        _ws_shard_stats["overflow"] = overflow
+        _ws_shard_stats["held"] = held
+        _ws_shard_stats["deferred"] = deferred
+        _ws_shard_stats["planned"] = len(_ws_code_shard)
+
+
+def _ws_plan_orderbook(load: dict) -> None:
+    """호가 구독 배정 (v177.33 #AV) — _ws_lock 보유 상태에서 호출.
+    체결 배정 종목 중 점수 상위 WS_ORDERBOOK_TOP_N, 체결 배정 후 남는 슬롯에서만 (기존 호가 구독은 교체 마진 가점)."""
+    if not WS_ORDERBOOK_ENABLED or WS_ORDERBOOK_TOP_N <= 0:
+        _ws_code_orderbook.clear()
+        _ws_orderbook_stats["planned"] = 0
+        return
+    prev = dict(_ws_code_orderbook)
+    _ws_code_orderbook.clear()
+    ranked = sorted(_ws_code_shard, key=lambda c: (-(_ws_code_score.get(c, 0.0)
+                                                    + (WS_SUB_SWAP_MARGIN if prev.get(c) == _ws_code_shard[c] else 0.0)), c))
+    for code in ranked:
+        if len(_ws_code_orderbook) >= WS_ORDERBOOK_TOP_N:
+            break
+        i = _ws_code_shard[code]
+        if load.get(i, WS_MAX_SUBSCRIPTIONS) < WS_MAX_SUBSCRIPTIONS:
+            _ws_code_orderbook[code] = i
+            load[i] += 1
+    _ws_orderbook_stats["planned"] = len(_ws_code_orderbook)
 
-    target_set = set(target_codes)
 
-    # 구독 해제: 더 이상 필요 없는 종목
+def _ws_sync_subscriptions(shard: dict) -> None:
+    """샤드 구독을 배정 결과(_ws_code_shard)와 동기화 (v177.31: 샤드별 실행)."""
+    now = time.time()
+    if now - shard["last_sync_ts"] < WS_SYNC_INTERVAL_SEC:
+        return
+    shard["last_sync_ts"] = now
+    _ws_plan_shards()
+    with _ws_lock:
+        current_codes = set(shard["subs"].keys())
+        target_set = {c for c, i in _ws_code_shard.items() if i == shard["idx"]}
+        current_ob = set(shard["ob_subs"].keys())
+        target_ob = {c for c, i in _ws_code_orderbook.items() if i == shard["idx"]}
+
+    # 구독 해제: 더 이상 필요 없거나 다른 샤드로 재배정된 종목 (호가 먼저 → 체결 슬롯 확보)
+    for code in current_ob - target_ob:
+        _ws_orderbook_subscribe(shard, code, subscribe=False)
     for code in current_codes - target_set:
-        _ws_unsubscribe(ws, code)
+        _ws_unsubscribe(shard, code)
 
-    # 신규 구독: 아직 구독 안 된 종목
-    available_slots = WS_MAX_SUBSCRIPTIONS - len(_ws_subscribed_codes)
-    codes_to_add = list(target_set - current_codes)
-
-    if len(codes_to_add) > available_slots:
-        # LRU 방식: 가장 오래된 구독 해제 후 새 종목 추가
-        with _ws_lock:
-            sorted_current = sorted(
-                [(c, ts) for c, ts in _ws_subscribed_codes.items() if c not in target_set],
-                key=lambda x: x[1]
-            )
-        evict_count = len(codes_to_add) - available_slots
-        for c, _ in sorted_current[:evict_count]:
-            _ws_unsubscribe(ws, c)
-        codes_to_add = codes_to_add[:WS_MAX_SUBSCRIPTIONS - len(_ws_subscribed_codes)]
-
-    # v165.32 [#4]: 동시 구독 Broken pipe 방지 — 딜레이 0.05→0.2/0.3초, _ws_connected 재확인
+    # v165.32 [#4]: 동시 구독 Broken pipe 방지 — 딜레이 0.05→0.2/0.3초, 연결 상태 재확인
     # 이유: 2026-04-27 09:06-09:09 복수 종목 동시 포착 시 ws.send() 집중 → KIS pipe 한도 초과
-    for _ws_idx, code in enumerate(codes_to_add):
-        if len(_ws_subscribed_codes) >= WS_MAX_SUBSCRIPTIONS:
+    # v177.32 #AU: 점수 높은 종목부터 구독
+    for _ws_idx, code in enumerate(sorted(target_set - current_codes, key=lambda c: (-_ws_code_score.get(c, 0.0), c))):
+        if len(shard["subs"]) + len(shard["ob_subs"]) >= WS_MAX_SUBSCRIPTIONS:
             break
-        if not _ws_connected:
+        if not shard["connected"]:
             break
-        _ws_subscribe(ws, code)
+        _ws_subscribe(shard, code)
         _ws_delay = 0.3 if _ws_idx >= 3 else 0.2
         time.sleep(_ws_delay)
 
+    # v177.33 #AV: 호가 구독 — 체결 구독 완료된 종목만
+    for code in sorted(target_ob - current_ob, key=lambda c: (-_ws_code_score.get(c, 0.0), c)):
+        if len(shard["subs"]) + len(shard["ob_subs"]) >= WS_MAX_SUBSCRIPTIONS or not shard["connected"]:
+            break
+        if code not in shard["subs"]:
+            continue
+        _ws_orderbook_subscribe(shard, code)
+        time.sleep(0.3)
+
+
+def _ws_refresh_connected() -> None:
+    global _ws_connected
+    _ws_connected = any(sh["connected"] for sh in _ws_shards)
+
 
-def _ws_connect_loop() -> None:
-    """WebSocket 수신 루프 — 별도 스레드에서 실행. 지수 백오프 재연결."""
-    global _ws_connected, _ws_reconnect_count, _ws_last_sync_ts
+def _ws_release_shard(shard: dict) -> None:
+    """샤드 연결 종료 — 구독·배정 해제 (다음 배정에서 다른 샤드로 이동)."""
+    shard["connected"] = False
+    with _ws_lock:
+        for code in list(shard["subs"].keys()):
+            _ws_drop_shard_sub(shard, code)
+        shard["ob_subs"].clear()
+        for code in [c for c, i in _ws_code_shard.items() if i == shard["idx"]]:
+            _ws_code_shard.pop(code, None)
+            _ws_code_since.pop(code, None)
+            _ws_code_orderbook.pop(code, None)
+    _ws_refresh_connected()
+
+
+def _ws_connect_loop(shard: dict | None = None) -> None:
+    """WebSocket 수신 루프 — 샤드별 스레드에서 실행. 지수 백오프 재연결."""
+    global _ws_reconnect_count, _ws_last_plan_ts
     import websocket as _websocket_lib
 
+    shard = shard or _ws_shards[0]
+    tag = f"[샤드 {shard['idx']}] " if len(_ws_shards) > 1 else ""
     backoff = WS_RECONNECT_BASE_SEC
 
     while not _ws_stop_event.is_set():
@@ -11746,36 +13897,37 @@ def _ws_connect_loop() -> None:
         try:
             # 시장 미개장이면 대기
             if not is_any_market_open():
-                _ws_connected = False
-                with _ws_lock:
-                    _ws_subscribed_codes.clear()
+                _ws_release_shard(shard)
                 _ws_stop_event.wait(30)
                 continue
 
             # approval_key 발급
-            approval_key = _ws_get_approval_key()
+            approval_key = _ws_get_approval_key(shard)
             if not approval_key:
                 _ws_stop_event.wait(min(backoff, WS_RECONNECT_MAX_SEC))
                 backoff = min(backoff * 2, WS_RECONNECT_MAX_SEC)
                 continue
 
-            _log_info_msg(f"🔌 WebSocket 연결 시도: {WS_URL}")
+            _log_info_msg(f"🔌 {tag}WebSocket 연결 시도: {WS_URL}")
             ws = _websocket_lib.WebSocket()
             ws.connect(WS_URL, ping_interval=60, ping_timeout=30)
-            _ws_connected = True
+            shard["ws"] = ws
+            shard["connected"] = True
+            _ws_refresh_connected()
             backoff = WS_RECONNECT_BASE_SEC
-            _ws_last_sync_ts = 0.0  # 즉시 동기화 트리거
+            shard["last_sync_ts"] = 0.0  # 즉시 동기화 트리거
+            _ws_last_plan_ts = 0.0       # 새 샤드 용량 반영해 즉시 재배정
             _ws_subscribe_fail_count.clear()    # v165.6 [#6]: 재연결 시 실패 카운트 초기화
-            _log_info_msg(f"✅ WebSocket 연결 성공")
+            _log_info_msg(f"✅ {tag}WebSocket 연결 성공")
 
             # 초기 구독 동기화
-            _ws_sync_subscriptions(ws)
+            _ws_sync_subscriptions(shard)
 
             # 수신 루프
             while not _ws_stop_event.is_set():
                 # 시장 폐장 확인
                 if not is_any_market_open():
-                    _log_info_msg("🔌 시장 폐장 — WebSocket 연결 해제")
+                    _log_info_msg(f"🔌 {tag}시장 폐장 — WebSocket 연결 해제")
                     break
 
                 try:
@@ -11792,24 +13944,23 @@ def _ws_connect_loop() -> None:
                         _ws_on_message(data)
                 except _websocket_lib.WebSocketTimeoutException:
                     # 주기적 구독 동기화
-                    _ws_sync_subscriptions(ws)
+                    _ws_sync_subscriptions(shard)
                     continue
                 except _websocket_lib.WebSocketConnectionClosedException:
-                    _log_warn_msg("⚠️ WebSocket 연결 종료됨 — 재연결 예정")
+                    _log_warn_msg(f"⚠️ {tag}WebSocket 연결 종료됨 — 재연결 예정")
                     break
                 except Exception as e:
-                    _log_warn_msg(f"⚠️ WebSocket 수신 오류: {e}")
+                    _log_warn_msg(f"⚠️ {tag}WebSocket 수신 오류: {e}")
                     break
 
                 # 주기적 구독 동기화
-                _ws_sync_subscriptions(ws)
+                _ws_sync_subscriptions(shard)
 
         except Exception as e:
-            _log_warn_msg(f"⚠️ WebSocket 연결 실패: {e}")
+            _log_warn_msg(f"⚠️ {tag}WebSocket 연결 실패: {e}")
         finally:
-            _ws_connected = False
-            with _ws_lock:
-                _ws_subscribed_codes.clear()
+            _ws_release_shard(shard)
+            shard["ws"] = None
             if ws:
                 try:
                     ws.close()
@@ -11823,15 +13974,15 @@ def _ws_connect_loop() -> None:
         _ws_reconnect_count += 1
         _ws_stats["reconnects"] += 1
         wait_sec = min(backoff + random.uniform(0, 1), WS_RECONNECT_MAX_SEC)
-        _log_info_msg(f"🔄 WebSocket 재연결 대기 {wait_sec:.1f}초 (#{_ws_reconnect_count})")
+        _log_info_msg(f"🔄 {tag}WebSocket 재연결 대기 {wait_sec:.1f}초 (#{_ws_reconnect_count})")
         _ws_stop_event.wait(wait_sec)
         backoff = min(backoff * 2, WS_RECONNECT_MAX_SEC)
 
-    _log_info_msg("🔌 WebSocket 루프 종료")
+    _log_info_msg(f"🔌 {tag}WebSocket 루프 종료")
 
 
 def _ws_start() -> None:
-    """WebSocket 스레드 시작 (이미 실행 중이면 skip)."""
+    """WebSocket 샤드 스레드 시작 (이미 실행 중이면 skip)."""
     global _ws_thread
     if not WEBSOCKET_ENABLED:
         return
@@ -11841,18 +13992,25 @@ def _ws_start() -> None:
     if _ws_thread and _ws_thread.is_alive():
         return
     _ws_stop_event.clear()
-    _ws_thread = threading.Thread(target=_ws_connect_loop, name="KIS-WebSocket", daemon=True)
-    _ws_thread.start()
-    _log_info_msg("🚀 WebSocket 스레드 시작")
+    restore_execution_context_from_journal()   # v177.34 #AW: 구독 전 최근 틱 맥락 복원
+    _ws_tick_worker_start()
+    for shard in _ws_shards:
+        name = "KIS-WebSocket" if shard["idx"] == 0 else f"KIS-WebSocket-{shard['idx']}"
+        shard["thread"] = threading.Thread(target=_ws_connect_loop, args=(shard,), name=name, daemon=True)
+        shard["thread"].start()
+    _ws_thread = _ws_shards[0]["thread"]
+    _log_info_msg(f"🚀 WebSocket 스레드 시작 (샤드 {len(_ws_shards)}개 × 구독 {WS_MAX_SUBSCRIPTIONS})")
 
 
 def _ws_stop() -> None:
     """WebSocket 스레드 중지."""
     global _ws_thread
     _ws_stop_event.set()
-    if _ws_thread:
-        _ws_thread.join(timeout=10)
-        _ws_thread = None
+    for shard in _ws_shards:
+        if shard.get("thread"):
+            shard["thread"].join(timeout=10)
+            shard["thread"] = None
+    _ws_thread = None
     _log_info_msg("🛑 WebSocket 스레드 중지")
 
 
@@ -11864,6 +14022,11 @@ def _ws_is_active() -> bool:
     return (time.time() - _ws_last_recv_ts) < 60.0
 
 
+def _ws_capacity() -> int:
+    """연결된 샤드 기준 구독 가능 총량 (미연결이면 샤드 1개 기준)."""
+    return WS_MAX_SUBSCRIPTIONS * max(1, sum(1 for sh in _ws_shards if sh["connected"]))
+
+
 def _ws_get_status_summary() -> str:
     """WebSocket 상태 요약 문자열."""
     if not WEBSOCKET_ENABLED:
@@ -11871,21 +14034,36 @@ def _ws_get_status_summary() -> str:
     connected = "연결됨" if _ws_connected else "미연결"
     with _ws_lock:
         sub_count = len(_ws_subscribed_codes)
+        shard_part = ""
+        if len(_ws_shards) > 1:
+            shard_part = " | 샤드 " + " ".join(
+                f"#{sh['idx']}:{len(sh['subs'])}{'' if sh['connected'] else '✕'}" for sh in _ws_shards)
+        if _ws_shard_stats["overflow"]:
+            shard_part += f" (초과 {_ws_shard_stats['overflow']}종목 REST)"
+        churn_part = (f" | 교체 {_ws_shard_stats['swapped']}·해제 {_ws_shard_stats['released']}회"
+                      f" (유지 {_ws_shard_stats['held']}, 보류 {_ws_shard_stats['deferred']})")
+        if WS_ORDERBOOK_ENABLED:
+            churn_part += (f" | 호가 {sum(len(sh['ob_subs']) for sh in _ws_shards)}/{_ws_orderbook_stats['planned']}"
+                           f" (조회 {_ws_orderbook_stats['hit']}, 지연 {_ws_orderbook_stats['stale']})")
     age = int(time.time() - _ws_last_recv_ts) if _ws_last_recv_ts > 0 else -1
-    return (f"WebSocket: {connected} | 구독 {sub_count}/{WS_MAX_SUBSCRIPTIONS} | "
+    return (f"WebSocket: {connected} | 구독 {sub_count}/{_ws_capacity()}{shard_part}{churn_part} | "
             f"수신 {_ws_stats['recv_count']}건 | 재연결 {_ws_stats['reconnects']}회 | "
-            f"마지막 수신 {age}초 전")
+            f"마지막 수신 {age}초 전 | "
+            f"틱큐 {_ws_tick_queue.qsize()}/{_ws_tick_queue.maxsize} (최대 {_ws_tick_stats['max_depth']}, "
+            f"폐기 {_ws_tick_stats['dropped']}, 지연 {_ws_tick_stats['last_lag_ms']:.0f}ms) | "
+            f"대시보드 발행 {_dashboard_publish_stats['published']}/요청 {_dashboard_publish_stats['marked']}"
+            f" (미발행 {_dashboard_publish_stats['throttled']}) | "
+            f"상태 저장 {_state_flush_stats['flushed']}/표시 {_state_flush_stats['marked']} (대기 {len(_state_dirty)})")
 
 # ════════════════════════════════════════════════════════════════
 _execution_setup_watch: dict = {}
 _execution_setup_watch_last_persist_ts: float = 0.0
 def _prune_execution_snapshots(code: str, now_ts: float | None = None) -> None:
     now_ts = float(now_ts or time.time())
-    buf = _execution_snapshots.get(code)
-    if not isinstance(buf, list):
+    ring = _execution_snapshots.get(code)
+    if not ring:
         return
-    cutoff = now_ts - max(EXEC_SPEED_WINDOW_SEC * 4, 360)
-    _execution_snapshots[code] = [s for s in buf if float(s.get("ts", 0) or 0) >= cutoff][-80:]
+    _exec_ring_evict_before(ring, now_ts - max(EXEC_SPEED_WINDOW_SEC * 4, 360))   # 용량(80) 초과분은 append가 덮어씀
 def _get_exec_speed_micro_trade_threshold(price: int, market: str = "KRX", sample_ts: float | None = None) -> int:
     price = safe_int(price, 0)
     if price <= 0:
@@ -11902,64 +14080,221 @@ def _get_exec_speed_micro_trade_threshold(price: int, market: str = "KRX", sampl
     share_multiplier = EXEC_SPEED_MICRO_TRADE_SHARE_MULTIPLIER_NXT if relaxed else EXEC_SPEED_MICRO_TRADE_SHARE_MULTIPLIER
     min_krw = EXEC_SPEED_MICRO_TRADE_MIN_KRW_NXT if relaxed else EXEC_SPEED_MICRO_TRADE_MIN_KRW
     return max(int(price * max(1, share_multiplier)), int(min_krw))
-def _record_execution_snapshot(code: str, payload: dict, market: str = "KRX") -> None:
+def _record_execution_snapshot(code: str, payload: dict, market: str = "KRX", sample_ts: float | None = None) -> None:
     code = normalize_stock_code(code)
     if not code or not isinstance(payload, dict):
         return
-    price = safe_int(payload.get("price", 0))
-    today_vol = safe_int(payload.get("today_vol", 0))
+    _record_execution_tick(
+        code, market,
+        safe_int(payload.get("price", 0)),
+        safe_int(payload.get("today_vol", 0)),
+        float(payload.get("change_rate", 0.0) or 0.0),
+        safe_int(payload.get("ask_qty", 0)),
+        safe_int(payload.get("bid_qty", 0)),
+        safe_int(payload.get("weighted_avg", 0)),
+        safe_int(payload.get("exec_vol", 0)),
+        float(payload.get("exec_strength", 0.0) or 0.0),
+        safe_int(payload.get("acml_tr_pbmn", 0)),
+        safe_int(payload.get("high", 0)),
+        safe_int(payload.get("low", 0)),
+        safe_int(payload.get("vi_price", 0)),
+        str(payload.get("bstp_name", "") or ""),
+        sample_ts=sample_ts,
+    )
+def _record_execution_tick(code: str, market: str, price: int, today_vol: int, change_rate: float,
+                           ask_qty: int, bid_qty: int, weighted_avg: int, exec_vol: int, exec_strength: float,
+                           acml_tr_pbmn: int, high: int, low: int, vi_price: int, bstp_name: str = "",
+                           sample_ts: float | None = None, recv_ts: float = 0.0) -> None:
+    """검증된 체결 값으로 링버퍼 기록 (v177.30 #AS: 웹소켓 fast parser가 dict 없이 직접 호출).
+    sample_ts 지정 = 틱 저널 재생 (v177.34 #AW): 기록 시각 사용, 링 마지막보다 과거면 무시, VI 조회 생략.
+    recv_ts 지정 = 실시간 수신 시각 (워커 처리 시각 대신): 재생 분기 없이 시각만 사용, 샤드 간 역전은 링 마지막 시각으로 보정."""
     if price <= 0 or today_vol <= 0:
         return
-    now_ts = time.time()
-    buf = _execution_snapshots.setdefault(code, [])
-    prev = buf[-1] if buf else {}
-    prev_vol = safe_int(prev.get("today_vol", 0))
+    if sample_ts is not None:
+        now_ts = float(sample_ts)
+    else:
+        now_ts = float(recv_ts) if recv_ts > 0 else time.time()
+    ring = _execution_snapshots.get(code)
+    if ring is None:
+        ring = _execution_snapshots.setdefault(code, _new_exec_snapshot_ring())
+    prev_ts, prev_price, prev_vol, prev_bstp = _exec_ring_last_core(ring)
+    if prev_ts > 0 and prev_price == price and prev_vol == today_vol:
+        return
+    if now_ts < prev_ts:
+        if sample_ts is not None:
+            return
+        now_ts = prev_ts
     vol_delta = max(today_vol - prev_vol, 0)
     trade_value_delta = int(vol_delta * price)
-    prev_ts = float(prev.get("ts", 0) or 0)
     elapsed_sec = max(now_ts - prev_ts, 1.0) if prev_ts > 0 else 0.0
     trade_value_per_sec = float(trade_value_delta / elapsed_sec) if trade_value_delta > 0 and elapsed_sec > 0 else 0.0
     micro_threshold = _get_exec_speed_micro_trade_threshold(price, market=market, sample_ts=now_ts)
-    sample = {
-        "ts": now_ts,
-        "market": market,
-        "price": price,
-        "today_vol": today_vol,
-        "change_rate": float(payload.get("change_rate", 0.0) or 0.0),
-        "ask_qty": safe_int(payload.get("ask_qty", 0)),
-        "bid_qty": safe_int(payload.get("bid_qty", 0)),
-        "vol_delta": vol_delta,
-        "trade_value_delta": trade_value_delta,
-        "elapsed_sec": round(elapsed_sec, 2),
-        "trade_value_per_sec": round(trade_value_per_sec, 2),
-        "micro_trade": bool(vol_delta > 0 and trade_value_delta < micro_threshold),
-        # v162.4: F구간 VWAP 눌림반등용 추가 저장
-        "weighted_avg": safe_int(payload.get("weighted_avg", 0)),
-        "exec_vol": safe_int(payload.get("exec_vol", 0)),
-        "exec_strength": float(payload.get("exec_strength", 0.0) or 0.0),
-        "acml_tr_pbmn": safe_int(payload.get("acml_tr_pbmn", 0)),
-        "high": safe_int(payload.get("high", 0)),
-        "low": safe_int(payload.get("low", 0)),
-        # v163: VI 발동 기준가 저장
-        "vi_price": safe_int(payload.get("vi_price", 0)),
+    # 필드 순서: _EXEC_SNAP_INT_FIELDS / _EXEC_SNAP_FLOAT_FIELDS / _EXEC_SNAP_STR_FIELDS
+    # v162.4: weighted_avg·exec_vol·exec_strength·acml_tr_pbmn·high·low (F구간 VWAP 눌림반등), v163: vi_price
+    _exec_ring_write(
+        ring,
+        (price, today_vol, ask_qty, bid_qty, vol_delta, trade_value_delta,
+         weighted_avg, exec_vol, acml_tr_pbmn, high, low, vi_price),
+        (now_ts, change_rate, round(elapsed_sec, 2), round(trade_value_per_sec, 2), exec_strength),
+        vol_delta > 0 and trade_value_delta < micro_threshold,
         # v170.2: 섹터명 저장 — 대시보드 섹터 분류용 (WebSocket 틱엔 없으므로 이전 값 유지)
-        "bstp_name": str(payload.get("bstp_name", "") or prev.get("bstp_name", "") or ""),
-    }
-    if prev and prev.get("price") == price and prev.get("today_vol") == today_vol:
-        return
-    buf.append(sample)
+        (market, bstp_name or prev_bstp or ""),
+    )
     _prune_execution_snapshots(code, now_ts)
+    _update_intraday_indicators(code, price, now_ts)
     # v163: VI 발동 감지 → 섹터별 VI 순서 기록
     # v163.5: get_stock_info 미정의 → get_stock_price 폴백으로 수정
-    _vi_price_val = safe_int(payload.get("vi_price", 0))
-    if _vi_price_val > 0:
+    # v177.28 #AQ: 틱 워커에서 get_stock_price 동기 REST 제거 → 캐시 메타 사용, 없으면 백그라운드 조회
+    if vi_price > 0 and sample_ts is None:
         try:
-            _stock_info = get_stock_price(code) or {}
-            _vi_sector  = str(_stock_info.get("bstp_name", "") or _stock_info.get("sector", "") or "")
-            _vi_name    = str(_stock_info.get("name", code) or code)
-            _update_vi_sector_tracker(code, _vi_name, _vi_sector, _vi_price_val)
+            _note_vi_tick(code, vi_price, bstp_name or prev_bstp or "", now_ts)
         except Exception as _ve:
             _swallow_exception(_ve)
+# ============================================================
+# 🧩 체결 틱 저널 (v177.34 #AW)
+# - 웹소켓 체결 틱을 일자별 고정폭 바이너리 파일(ticks_YYYYMMDD.bin)에 append — 링버퍼(약 6분)·재시작과 무관하게 보존
+# - 헤더 8바이트(매직 + 버전 + 레코드 크기) + 레코드 72바이트 (_TICK_JOURNAL_REC)
+# - iter_tick_journal: mmap 조회 (수신 ts 오름차순 → since_ts 이진 탐색), 마지막 불완전 레코드 무시
+# - replay_tick_journal: _record_execution_snapshot 경유 재생 (speed=0 최대 속도)
+#   WS 시작 시 당일 저널 최근 구간 재생 → 재시작 직후 체결속도 맥락 즉시 복원
+# - python stock_alert.py --replay-ticks YYYYMMDD [--speed N] : 오프라인 재생·처리량 측정
+# ============================================================
+import struct as _struct
+import mmap as _mmap
+TICK_JOURNAL_ENABLED = os.getenv("TICK_JOURNAL_ENABLED", "true").strip().lower() in ("true", "1", "yes")
+TICK_JOURNAL_DIR = _state_path("tick_journal")
+TICK_JOURNAL_KEEP_DAYS = int(os.getenv("TICK_JOURNAL_KEEP_DAYS", "5") or "5")
+_TICK_JOURNAL_MAGIC = b"SATJ"
+_TICK_JOURNAL_VERSION = 1
+# recv_ts, code, market(0=KRX 1=NXT), price, today_vol, change_rate, ask_qty, bid_qty, weighted_avg,
+# exec_vol, exec_strength, acml_tr_pbmn, high, low, vi_price — _ws_iter_h0stcnt0 레코드 순서
+_TICK_JOURNAL_REC = _struct.Struct("<d6sBxiqfiiiifqiii")
+_TICK_JOURNAL_HEADER = _struct.Struct("<4sHH")
+_tick_journal_state = {"date": "", "fh": None, "records": 0, "errors": 0, "restored_date": ""}
+
+
+def _tick_journal_path(day: str) -> str:
+    return os.path.join(TICK_JOURNAL_DIR, f"ticks_{day}.bin")
+
+
+def _tick_journal_pack(out: list, recv_ts: float, market: str, rec: tuple) -> None:
+    try:
+        out.append(_TICK_JOURNAL_REC.pack(recv_ts, rec[0].encode("ascii"), 1 if market == "NXT" else 0, *rec[1:]))
+    except (_struct.error, UnicodeEncodeError):
+        _tick_journal_state["errors"] += 1
+
+
+def _tick_journal_cleanup(today: str) -> None:
+    cutoff = (datetime.strptime(today, "%Y%m%d") - timedelta(days=max(1, TICK_JOURNAL_KEEP_DAYS))).strftime("%Y%m%d")
+    for name in os.listdir(TICK_JOURNAL_DIR):
+        day = name[6:14] if name.startswith("ticks_") and name.endswith(".bin") else ""
+        if day and day < cutoff:
+            try:
+                os.remove(os.path.join(TICK_JOURNAL_DIR, name))
+            except OSError as e:
+                _swallow_exception(e, "tick_journal_cleanup")
+
+
+def _tick_journal_write(chunks: list) -> None:
+    """틱 워커(단일 스레드)에서 배치당 1회 호출 — 일자 바뀌면 새 파일."""
+    today = _now_kst().strftime("%Y%m%d")
+    st = _tick_journal_state
+    try:
+        if st["date"] != today or st["fh"] is None:
+            if st["fh"] is not None:
+                st["fh"].close()
+                st["fh"] = None
+            os.makedirs(TICK_JOURNAL_DIR, exist_ok=True)
+            path = _tick_journal_path(today)
+            fh = open(path, "ab", buffering=0)
+            size = fh.seek(0, os.SEEK_END)
+            if size == 0:
+                fh.write(_TICK_JOURNAL_HEADER.pack(_TICK_JOURNAL_MAGIC, _TICK_JOURNAL_VERSION, _TICK_JOURNAL_REC.size))
+            elif (size - _TICK_JOURNAL_HEADER.size) % _TICK_JOURNAL_REC.size:
+                # 비정상 종료로 잘린 레코드 → 레코드 경계로 되돌린 뒤 이어쓰기
+                fh.truncate(size - (size - _TICK_JOURNAL_HEADER.size) % _TICK_JOURNAL_REC.size)
+            st["fh"], st["date"] = fh, today
+            _tick_journal_cleanup(today)
+        st["fh"].write(b"".join(chunks))
+        st["records"] += len(chunks)
+    except Exception as e:
+        st["errors"] += 1
+        _swallow_exception(e, "tick_journal_write")
+
+
+def iter_tick_journal(day: str, since_ts: float | None = None, until_ts: float | None = None):
+    """저널 레코드 튜플(_TICK_JOURNAL_REC 순서, code는 bytes) 순회 — mmap 읽기 전용."""
+    path = _tick_journal_path(day)
+    if not os.path.exists(path):
+        return
+    rec = _TICK_JOURNAL_REC
+    hsz = _TICK_JOURNAL_HEADER.size
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size <= hsz:
+            return
+        with _mmap.mmap(f.fileno(), 0, access=_mmap.ACCESS_READ) as mm:
+            magic, version, rec_size = _TICK_JOURNAL_HEADER.unpack_from(mm, 0)
+            if magic != _TICK_JOURNAL_MAGIC or rec_size != rec.size:
+                _log_warn_msg(f"⚠️ 틱 저널 형식 불일치: {path} (v{version}, {rec_size}B)")
+                return
+            n = (size - hsz) // rec.size
+            lo, hi = 0, n
+            if since_ts:
+                while lo < hi:
+                    mid = (lo + hi) // 2
+                    if _struct.unpack_from("<d", mm, hsz + mid * rec.size)[0] < since_ts:
+                        lo = mid + 1
+                    else:
+                        hi = mid
+            for off in range(hsz + lo * rec.size, hsz + n * rec.size, rec.size):
+                row = rec.unpack_from(mm, off)
+                if until_ts and row[0] > until_ts:
+                    break
+                yield row
+
+
+def replay_tick_journal(day: str | None = None, speed: float = 0.0, since_ts: float | None = None,
+                        until_ts: float | None = None, codes=None) -> dict:
+    """저널 → _record_execution_snapshot 재생. speed=0 대기 없음, speed=N 기록 간격의 1/N 대기."""
+    day = day or _now_kst().strftime("%Y%m%d")
+    codes = set(codes) if codes else None
+    started = time.perf_counter()
+    total = replayed = 0
+    prev_ts = None
+    for (ts, code_b, mkt, price, today_vol, change_rate, ask_qty, bid_qty, weighted_avg, exec_vol,
+         exec_strength, acml_tr_pbmn, high, low, vi_price) in iter_tick_journal(day, since_ts, until_ts):
+        total += 1
+        code = code_b.decode("ascii")
+        if codes is not None and code not in codes:
+            continue
+        if speed > 0 and prev_ts is not None and ts > prev_ts:
+            time.sleep((ts - prev_ts) / speed)
+        prev_ts = ts
+        _record_execution_snapshot(code, {
+            "price": price, "today_vol": today_vol, "change_rate": round(change_rate, 2),
+            "ask_qty": ask_qty, "bid_qty": bid_qty, "weighted_avg": weighted_avg, "exec_vol": exec_vol,
+            "exec_strength": round(exec_strength, 2), "acml_tr_pbmn": acml_tr_pbmn,
+            "high": high, "low": low, "vi_price": vi_price,
+        }, "NXT" if mkt else "KRX", sample_ts=ts)
+        replayed += 1
+    elapsed = time.perf_counter() - started
+    return {"day": day, "records": total, "replayed": replayed, "sec": round(elapsed, 3),
+            "records_per_sec": int(replayed / elapsed) if elapsed > 0 else 0}
+
+
+def restore_execution_context_from_journal() -> None:
+    """당일 저널의 링버퍼 보존 구간만 재생 (하루 1회) — 재시작 직후 체결속도 지표 공백 제거."""
+    today = _now_kst().strftime("%Y%m%d")
+    if not TICK_JOURNAL_ENABLED or _tick_journal_state["restored_date"] == today:
+        return
+    _tick_journal_state["restored_date"] = today
+    try:
+        res = replay_tick_journal(today, since_ts=time.time() - max(EXEC_SPEED_WINDOW_SEC * 4, 360))
+        if res["replayed"]:
+            _log_info_msg(f"📼 틱 저널 복원: {res['replayed']}건 ({res['sec']}초)")
+    except Exception as e:
+        _swallow_exception(e, "tick_journal_restore")
 def _build_execution_speed_metrics_base(current_price: int | None = None) -> dict:
     base_price = safe_int(current_price, 0)
     return {
@@ -11986,74 +14321,6 @@ def _build_execution_speed_metrics_base(current_price: int | None = None) -> dic
         "flow_state": "중립",
         "summary": "샘플 부족",
     }
-def _collect_execution_speed_window_samples(code: str, now_ts: float, window_sec: int, out: dict) -> tuple[list, list]:
-    samples = [s for s in (_execution_snapshots.get(code) or []) if float(s.get("ts", 0) or 0) >= now_ts - window_sec]
-    out["window_samples"] = len(samples)
-    if len(samples) < 2:
-        return samples, []
-    positive = [s for s in samples if int(s.get("vol_delta", 0) or 0) > 0]
-    valid = [s for s in positive if not s.get("micro_trade")]
-    out["valid_samples"] = len(valid)
-    if positive:
-        out["micro_trade_filtered_ratio"] = round(max(0.0, 1.0 - len(valid) / max(len(positive), 1)), 2)
-    if len(valid) < 2:
-        out["summary"] = "유효 체결 부족"
-    return samples, valid
-def _calc_execution_speed_price_context(samples: list, valid: list, current_price: int | None, out: dict) -> tuple[int, int, float, float]:
-    prices = [safe_int(s.get("price", 0), 0) for s in samples if safe_int(s.get("price", 0), 0) > 0]
-    peak_price = max(prices) if prices else safe_int(current_price, 0)
-    last_price = safe_int(current_price, 0) or safe_int(samples[-1].get("price", 0), 0)
-    out["recent_peak_price"] = peak_price
-    out["pullback_pct"] = round((peak_price - last_price) / peak_price * 100, 2) if peak_price else 0.0
-    valid_amounts = [int(s.get("trade_value_delta", 0) or 0) for s in valid]
-    mean_amount = sum(valid_amounts) / max(len(valid_amounts), 1)
-    mean_abs_dev = sum(abs(v - mean_amount) for v in valid_amounts) / max(len(valid_amounts), 1)
-    consistency = max(0.0, 1.0 - (mean_abs_dev / mean_amount)) if mean_amount > 0 else 0.0
-    return peak_price, last_price, mean_amount, consistency
-def _execution_speed_rate_from_sample(sample: dict, prev_ts: float | None) -> tuple[float, float]:
-    ts = float(sample.get("ts", 0) or 0)
-    elapsed = float(sample.get("elapsed_sec", 0) or 0)
-    if elapsed <= 0 and prev_ts:
-        elapsed = max(ts - prev_ts, 1.0)
-    rate = float(int(sample.get("trade_value_delta", 0) or 0)) / max(elapsed, 1.0) if elapsed > 0 else 0.0
-    return ts, rate
-def _collect_execution_speed_flow_rates(valid: list) -> tuple[list[float], float]:
-    flow_rates = []
-    prev_ts = None
-    for sample in valid:
-        ts, rate = _execution_speed_rate_from_sample(sample, prev_ts)
-        flow_rates.append(rate)
-        prev_ts = ts or prev_ts
-    mean_rate = sum(flow_rates) / max(len(flow_rates), 1)
-    return flow_rates, mean_rate
-def _collect_execution_speed_recent_profile(valid: list, now_ts: float, window_sec: int, mean_rate: float) -> dict:
-    recent_window = max(15, min(window_sec, EXEC_SPEED_RECENT_WINDOW_SEC))
-    recent_cutoff = now_ts - recent_window
-    recent_rates, prior_rates = [], []
-    recent_valid_samples = 0
-    last_valid_ts = 0.0
-    prev_ts = None
-    for sample in valid:
-        ts, rate = _execution_speed_rate_from_sample(sample, prev_ts)
-        if ts >= recent_cutoff:
-            recent_rates.append(rate)
-            recent_valid_samples += 1
-        else:
-            prior_rates.append(rate)
-        if ts > last_valid_ts:
-            last_valid_ts = ts
-        prev_ts = ts or prev_ts
-    recent_rate = sum(recent_rates) / max(len(recent_rates), 1) if recent_rates else mean_rate
-    prior_rate = sum(prior_rates) / max(len(prior_rates), 1) if prior_rates else mean_rate
-    accel_ratio = recent_rate / max(prior_rate, 1.0) if recent_rate > 0 and prior_rate > 0 else 1.0
-    return {
-        "recent_rate": recent_rate,
-        "prior_rate": prior_rate,
-        "accel_ratio": accel_ratio,
-        "recent_valid_samples": recent_valid_samples,
-        "last_valid_ts": last_valid_ts,
-        "prior_rates": prior_rates,
-    }
 def _score_execution_speed_freshness(last_active_age_sec: int) -> int:
     if last_active_age_sec <= 10:
         return 100
@@ -12066,36 +14333,18 @@ def _score_execution_speed_freshness(last_active_age_sec: int) -> int:
     if last_active_age_sec <= 70:
         return 35
     return 15
-def _resolve_execution_speed_flow_state(last_active_age_sec: int, recent_valid_samples: int, accel_ratio: float, prior_rates: list[float]) -> str:
+def _resolve_execution_speed_flow_state(last_active_age_sec: int, recent_valid_samples: int, accel_ratio: float, prior_valid_samples: int) -> str:
     if last_active_age_sec > EXEC_SPEED_STALE_WARN_SEC:
         return "정체"
     if recent_valid_samples >= 2 and accel_ratio >= 1.25:
         return "가속"
-    if prior_rates and accel_ratio <= 0.80:
+    if prior_valid_samples and accel_ratio <= 0.80:
         return "둔화"
     return "유지"
-def _calc_execution_speed_bid_context(valid: list, samples: list, out: dict, mean_amount: float) -> tuple[float, float]:
-    bid_ratios = []
-    for sample in valid:
-        ask_qty = safe_int(sample.get("ask_qty", 0), 0)
-        bid_qty = safe_int(sample.get("bid_qty", 0), 0)
-        if ask_qty > 0 and bid_qty > 0:
-            bid_ratios.append(min(bid_qty / ask_qty, COMMON_THRESHOLD_3P0))
-    avg_bid_ratio = sum(bid_ratios) / len(bid_ratios) if bid_ratios else 1.0
-    active_ratio = len(valid) / max(len(samples), 1)
-    out["avg_bid_ask_ratio"] = round(avg_bid_ratio, 2)
-    out["active_ratio"] = round(active_ratio, 2)
-    out["amount_per_active"] = int(mean_amount)
-    return avg_bid_ratio, active_ratio
-def _calc_execution_speed_dip_score(valid: list, peak_price: int, mean_amount: float, pullback_pct: float) -> int:
-    dip_samples = [
-        s for s in valid
-        if peak_price > 0 and safe_int(s.get("price", 0), 0) <= int(peak_price * (1 - EXEC_SPEED_CONFIRM_MIN_PULLBACK_PCT / 100.0))
-    ]
-    if dip_samples:
-        dip_mean = sum(int(s.get("trade_value_delta", 0) or 0) for s in dip_samples) / max(len(dip_samples), 1)
+def _calc_execution_speed_dip_score(stats: dict, mean_amount: float, pullback_pct: float) -> int:
+    if stats.get("dip_n"):
         base_mean = mean_amount or 1.0
-        dip_ratio = max(0.0, min(dip_mean / base_mean, 1.4))
+        dip_ratio = max(0.0, min(stats["dip_mean"] / base_mean, 1.4))
         return int(min(100, max(0, round(dip_ratio * 100))))
     if pullback_pct >= EXEC_SPEED_CONFIRM_MIN_PULLBACK_PCT:
         return 45
@@ -12148,7 +14397,7 @@ def _calc_execution_speed_score(mean_amount: float, mean_rate: float, valid_coun
         accel_bonus = 0
     stale_penalty = -8 if last_active_age_sec > 60 else (-4 if last_active_age_sec > EXEC_SPEED_STALE_WARN_SEC else 0)
     return max(0, min(100, amount_score + pace_score + depth_score + active_score + consistency_score + bid_score + freshness_bonus + accel_bonus + stale_penalty))
-def _finalize_execution_speed_metrics(out: dict, samples: list, valid: list, last_price: int, peak_price: int) -> dict:
+def _finalize_execution_speed_metrics(out: dict, window_count: int, valid_count: int, last_price: int, peak_price: int) -> dict:
     suggested_entry = safe_int(last_price, 0)
     if peak_price and last_price:
         if out["pullback_pct"] < EXEC_SPEED_CONFIRM_MIN_PULLBACK_PCT:
@@ -12159,7 +14408,7 @@ def _finalize_execution_speed_metrics(out: dict, samples: list, valid: list, las
     ready_window_min = max(2, EXEC_SPEED_MIN_SAMPLES)
     ready_valid_min = max(2, EXEC_SPEED_MIN_SAMPLES - 1)
     flow_hint = f" / 흐름 {out['flow_state']} / 최근체결 {out['last_active_age_sec']}초전"
-    if len(samples) >= ready_window_min and len(valid) >= ready_valid_min:
+    if window_count >= ready_window_min and valid_count >= ready_valid_min:
         out["ready"] = True
         out["summary"] = f"속도 {out['execution_speed_score']}점 / 눌림유지 {out['dip_resilience_score']}점{flow_hint}"
     else:
@@ -12167,30 +14416,59 @@ def _finalize_execution_speed_metrics(out: dict, samples: list, valid: list, las
         out["summary"] = f"예비판단 {out['execution_speed_score']}점 / 눌림유지 {out['dip_resilience_score']}점{flow_hint}"
     return out
 def get_execution_speed_metrics(code: str, current_price: int | None = None, window_sec: int = EXEC_SPEED_WINDOW_SEC) -> dict:
+    """v177.29 #AR: 창 재스캔 대신 링버퍼 누적합(_exec_ring_window_stats) 기반."""
     code = normalize_stock_code(code)
     now_ts = time.time()
     out = _build_execution_speed_metrics_base(current_price)
     if not code:
         return out
-    samples, valid = _collect_execution_speed_window_samples(code, now_ts, window_sec, out)
-    if len(samples) < 2 or len(valid) < 2:
+    ring = _execution_snapshots.get(code)
+    if not ring:
+        return out
+    recent_window = max(15, min(window_sec, EXEC_SPEED_RECENT_WINDOW_SEC))
+    st = _exec_ring_window_stats(ring, now_ts - window_sec, now_ts - recent_window, EXEC_SPEED_CONFIRM_MIN_PULLBACK_PCT)
+    window_count = st["window_samples"]
+    out["window_samples"] = window_count
+    if window_count < 2:
+        return out
+    valid_count = int(st["valid"])
+    positive_count = int(st["pos"])
+    out["valid_samples"] = valid_count
+    if positive_count:
+        out["micro_trade_filtered_ratio"] = round(max(0.0, 1.0 - valid_count / max(positive_count, 1)), 2)
+    if valid_count < 2:
+        out["summary"] = "유효 체결 부족"
         return out
-    peak_price, last_price, mean_amount, consistency = _calc_execution_speed_price_context(samples, valid, current_price, out)
-    _, mean_rate = _collect_execution_speed_flow_rates(valid)
-    recent_profile = _collect_execution_speed_recent_profile(valid, now_ts, window_sec, mean_rate)
+    # 가격 맥락: 창 최고가 / 현재가 / 눌림
+    peak_price = st["peak_price"] or safe_int(current_price, 0)
+    last_price = safe_int(current_price, 0) or st["last_price"]
+    out["recent_peak_price"] = peak_price
+    out["pullback_pct"] = round((peak_price - last_price) / peak_price * 100, 2) if peak_price else 0.0
+    mean_amount = st["amt"] / max(valid_count, 1)
+    consistency = max(0.0, 1.0 - (st["mean_abs_dev"] / mean_amount)) if mean_amount > 0 else 0.0
+    # 흐름: 전체 / 최근 / 이전 구간 평균 체결대금 속도
+    mean_rate = st["rate"] / max(valid_count, 1)
+    recent_rate = st["recent_rate"] / st["recent_valid"] if st["recent_valid"] else mean_rate
+    prior_rate = st["prior_rate"] / st["prior_valid"] if st["prior_valid"] else mean_rate
+    accel_ratio = recent_rate / max(prior_rate, 1.0) if recent_rate > 0 and prior_rate > 0 else 1.0
     out["trade_value_per_sec"] = int(mean_rate)
-    out["recent_trade_value_per_sec"] = int(recent_profile["recent_rate"])
-    out["prior_trade_value_per_sec"] = int(recent_profile["prior_rate"])
-    out["acceleration_ratio"] = round(recent_profile["accel_ratio"], 2)
-    out["recent_valid_samples"] = recent_profile["recent_valid_samples"]
-    last_active_age_sec = max(0, int(now_ts - recent_profile["last_valid_ts"])) if recent_profile["last_valid_ts"] > 0 else 999
+    out["recent_trade_value_per_sec"] = int(recent_rate)
+    out["prior_trade_value_per_sec"] = int(prior_rate)
+    out["acceleration_ratio"] = round(accel_ratio, 2)
+    out["recent_valid_samples"] = st["recent_valid"]
+    last_active_age_sec = max(0, int(now_ts - st["last_valid_ts"])) if st["last_valid_ts"] > 0 else 999
     out["last_active_age_sec"] = last_active_age_sec
     out["freshness_score"] = _score_execution_speed_freshness(last_active_age_sec)
-    out["flow_state"] = _resolve_execution_speed_flow_state(last_active_age_sec, recent_profile["recent_valid_samples"], recent_profile["accel_ratio"], recent_profile["prior_rates"])
-    avg_bid_ratio, active_ratio = _calc_execution_speed_bid_context(valid, samples, out, mean_amount)
-    out["dip_resilience_score"] = _calc_execution_speed_dip_score(valid, peak_price, mean_amount, out["pullback_pct"])
-    out["execution_speed_score"] = int(_calc_execution_speed_score(mean_amount, mean_rate, len(valid), active_ratio, consistency, avg_bid_ratio, out["freshness_score"], recent_profile["accel_ratio"], last_active_age_sec))
-    return _finalize_execution_speed_metrics(out, samples, valid, last_price, peak_price)
+    out["flow_state"] = _resolve_execution_speed_flow_state(last_active_age_sec, st["recent_valid"], accel_ratio, st["prior_valid"])
+    # 호가 맥락
+    avg_bid_ratio = st["bid"] / st["bid_n"] if st["bid_n"] else 1.0
+    active_ratio = valid_count / max(window_count, 1)
+    out["avg_bid_ask_ratio"] = round(avg_bid_ratio, 2)
+    out["active_ratio"] = round(active_ratio, 2)
+    out["amount_per_active"] = int(mean_amount)
+    out["dip_resilience_score"] = _calc_execution_speed_dip_score(st, mean_amount, out["pullback_pct"])
+    out["execution_speed_score"] = int(_calc_execution_speed_score(mean_amount, mean_rate, valid_count, active_ratio, consistency, avg_bid_ratio, out["freshness_score"], accel_ratio, last_active_age_sec))
+    return _finalize_execution_speed_metrics(out, window_count, valid_count, last_price, peak_price)
 def _tick_exec_speed_prewarm() -> None:
     """포착 직후 등록된 종목의 체결속도 스냅샷을 사전 누적 (진입가 도달 시 샘플 부족 최소화).
     run_scan() 1사이클(20초)마다 호출되며, check_entry_watch() 직전에 실행해
@@ -12217,11 +14495,7 @@ def _tick_exec_speed_prewarm() -> None:
     targets = targets[:EXEC_SPEED_PREWARM_MAX_CODES]
     for code, _reg_ts in targets:
         # 현재 유효 샘플 수 확인
-        samples = _execution_snapshots.get(code) or []
-        recent_samples = [
-            s for s in samples
-            if float(s.get("ts", 0) or 0) >= now_ts - EXEC_SPEED_WINDOW_SEC
-        ]
+        recent_samples = _exec_snap_rows(code, now_ts - EXEC_SPEED_WINDOW_SEC)
         recent_count = len(recent_samples)
         recent_valid_count = sum(
             1 for s in recent_samples
@@ -12879,7 +15153,8 @@ def _register_execution_setup_watch(s: dict) -> None:
 def _update_signal_log_execution_confirmed(log_key: str | None, watch: dict, entry_price: int, stop_price: int, target_price: int,
                                           metrics: dict | None, hit_time: str, hit_price: int) -> None:
     try:
-        data = _read_json_locked(SIGNAL_LOG_FILE)
+        # v177.36 #AY: 같은 종목 행만 인덱스 조회 → 변경 행만 upsert
+        data = _signal_log_query(code=normalize_stock_code(watch.get("code")), keys=[log_key])
     except Exception as e:
         _swallow_exception(e)  # v105 structured silent-exception log
         return
@@ -12921,7 +15196,7 @@ def _update_signal_log_execution_confirmed(log_key: str | None, watch: dict, ent
         rec["feature_snapshot"]["dip_resilience_score"] = int(metrics.get("dip_resilience_score", 0) or 0)
         rec["feature_snapshot"]["micro_trade_filtered_ratio"] = float(metrics.get("micro_trade_filtered_ratio", 0.0) or 0.0)
         rec["feature_snapshot"]["execution_pullback_pct"] = float(metrics.get("pullback_pct", 0.0) or 0.0)
-    _write_json_atomic(SIGNAL_LOG_FILE, data, indent=2)
+    _signal_log_write(data)
 def _register_active_entry_watch_from_confirmation(watch: dict, entry_price: int, stop_price: int, target_price: int,
                                                    hit_price: int, hit_time: str, persist: bool = True) -> None:
     code = normalize_stock_code(watch.get("code"))
@@ -13549,7 +15824,7 @@ def _collect_next_open_gap_candidate_codes(max_codes: int = NEXT_OPEN_GAP_POOL_M
                 _push_gap_code(item.get("code") if isinstance(item, dict) else item)
     except Exception as e:
         _swallow_exception(e)
-    siglog = _read_json_safe(SIGNAL_LOG_FILE, {})
+    siglog = _signal_log_read()
     if isinstance(siglog, dict):
         recs = [v for v in siglog.values() if isinstance(v, dict)]
     elif isinstance(siglog, list):
@@ -14430,7 +16705,7 @@ def build_next_open_gap_candidates(stage: str = "krx", max_items: int = NEXT_OPE
     phase = _normalize_preclose_gap_phase(phase)
     stage_label = _get_preclose_gap_stage_summary(stage, phase)
     stage_tag = _get_preclose_gap_stage_label(stage, phase)
-    signal_data = _read_json_safe(SIGNAL_LOG_FILE, {})
+    signal_data = _signal_log_read()
     if isinstance(signal_data, dict):
         signal_records = [v for v in signal_data.values() if isinstance(v, dict)]
     elif isinstance(signal_data, list):
@@ -14571,19 +16846,20 @@ def _upsert_preclose_gap_signal(candidate: dict, stage: str) -> str:
     """PRECLOSE_GAP_ENTRY 신호를 signal_log에 저장/업데이트해서 학습 데이터화."""
     now_dt = datetime.now()
     stock = _build_preclose_gap_signal_stock(candidate, stage, now_dt)
-    data = _read_json_safe(SIGNAL_LOG_FILE, {})
+    today = now_dt.strftime("%Y%m%d")
+    data = _signal_log_query(code=normalize_stock_code(stock["code"]), signal_type=PRECLOSE_GAP_SIGNAL_TYPE, detect_date=today)
     if not isinstance(data, dict):
         data = {}
-    existing_key = _find_preclose_gap_signal_key(data, stock, now_dt.strftime("%Y%m%d"))
+    existing_key = _find_preclose_gap_signal_key(data, stock, today)
     if not existing_key:
         save_signal_log(stock)
         new_key = f"{stock['code']}_{now_dt.strftime('%Y%m%d%H%M')}"
-        data = _read_json_safe(SIGNAL_LOG_FILE, {})
+        data = _signal_log_query(keys=[new_key])
         if isinstance(data, dict) and isinstance(data.get(new_key), dict):
             rec = data.get(new_key) or {}
             rec["gap_entry_meta"] = stock.get("gap_entry_meta", {})
             _apply_preclose_gap_feature_snapshot(rec, stock)
-            _write_json_atomic(SIGNAL_LOG_FILE, data, indent=2)
+            _signal_log_write(data)
         return new_key
     rec = data.get(existing_key) or {}
     rec.update({
@@ -14595,7 +16871,7 @@ def _upsert_preclose_gap_signal(candidate: dict, stage: str) -> str:
     })
     _apply_preclose_gap_feature_snapshot(rec, stock)
     data[existing_key] = rec
-    _write_json_atomic(SIGNAL_LOG_FILE, data, indent=2)
+    _signal_log_write(data)
     return existing_key
 def register_preclose_gap_watch(candidate: dict, signal_log_key: str) -> None:
     """장마감 전까지만 유효한 선진입 전용 감시 등록."""
@@ -14753,7 +17029,7 @@ def update_preclose_gap_open_outcomes(stage: str = "all") -> None:
             return
         if stage not in {"all", "krx", "nxt"}:
             stage = "all"
-        data = _read_json_safe(SIGNAL_LOG_FILE, {})
+        data = _signal_log_read()
         if not isinstance(data, dict):
             return
         today = datetime.now().strftime("%Y%m%d")
@@ -14821,7 +17097,7 @@ def update_preclose_gap_open_outcomes(stage: str = "all") -> None:
                     })
             changed = True
         if changed:
-            _write_json_atomic(SIGNAL_LOG_FILE, data, indent=2)
+            _signal_log_write(data)
         for exit_stage, rows in exit_rows_by_stage.items():
             if rows:
                 _send_preclose_gap_open_exit_brief(rows, stage=exit_stage)
@@ -15129,9 +17405,7 @@ def _run_pullback_wait_monitor() -> None:
             continue
         current_price = 0
         try:
-            ws_buf = list((_execution_snapshots.get(code) or []))
-            if ws_buf:
-                current_price = safe_int(ws_buf[-1].get("price", 0))
+            current_price = safe_int(_exec_snap_last(code).get("price", 0))
         except Exception:
             pass
         if not current_price:
@@ -15570,7 +17844,7 @@ def _resolve_stock_name(code: str, name_hint: str = "", cur: dict | None = None)
         except Exception as e:
             _swallow_exception(e)
         try:
-            data = _read_json_locked(SIGNAL_LOG_FILE)
+            data = _signal_log_read()
             if isinstance(data, dict):
                 for _k, rec in sorted(data.items(), reverse=True):
                     if not isinstance(rec, dict):
@@ -15754,6 +18028,10 @@ def refresh_dynamic_candidates(force_rank: bool = False):
             f"KRX_rank={len(krx_rank_stocks)} [{rank_mode}], NXT_seed={len(nxt_stocks)}, NXT_rank={len(nxt_rank_stocks)}, "
             f"랭킹후보={early_rank_cnt}, material_prewatch={material_prewatch_cnt}, 피드백={adaptive_cnt}, 테마피드백={theme_feedback_cnt}, 장후NXT={nxt_post_cnt}, force_rank={int(bool(force_rank))})"
         )
+        # v177.24 #AM: 후보군 지표 일괄 계산 (백그라운드 레인, 스캔 비차단)
+        # v177.26 #AO: 같은 스레드에서 상관행렬까지 (일봉은 지표 계산 때 _daily_cache 적재됨)
+        threading.Thread(target=_precompute_candidate_analytics, args=(list(_dynamic_candidates.keys()),),
+                         daemon=True, name="indicator_batch").start()
     except Exception as e:
         _log_warn_msg(f"⚠️ 동적 후보군 갱신 오류: {e}")
 
@@ -16645,8 +18923,182 @@ def get_stock_price(code: str) -> dict:
         _remember_public_stock_meta(code, payload.get("name", ""), payload.get("bstp_name", ""))
     except Exception as e:
         _swallow_exception(e)
+    _note_market_flag_quote(code, payload)
     return payload
 # ============================================================
+# 멀티종목 시세 (v177.16 #AE: 관심종목 멀티시세 FHKST11300006 배치 조회)
+# ============================================================
+KIS_MULTI_QUOTE_ENABLED = os.getenv("KIS_MULTI_QUOTE_ENABLED", "true").strip().lower() in ("true", "1", "yes")
+KIS_MULTI_QUOTE_MAX = max(1, min(30, int(os.getenv("KIS_MULTI_QUOTE_MAX", "30") or "30")))  # KIS 요청당 최대 30종목
+_multi_quote_disabled_date = ""
+_multi_quote_stats = {"batch_calls": 0, "batch_codes": 0, "single_fallback": 0}
+def _multi_quote_row_to_payload(o: dict) -> dict:
+    """FHKST11300006 output 1행 → get_stock_price()와 동일 키의 payload.
+    업종/시총/정지·VI 플래그는 멀티시세에 없으므로 기본값 — quote_source="multi", quote_partial=True 로 구분.
+    정지·VI 는 _full_quote_for_market_flags 가 최근 단건 시세 플래그를 덧씌워 판별, 진입 판단 전에는 단건 시세 확보."""
+    code = normalize_stock_code(o.get("inter_shrn_iscd"))
+    price = safe_int(o.get("inter2_prpr", 0))
+    if not code or not price:
+        return {}
+    today_vol = safe_int(o.get("acml_vol", 0))
+    return {
+        "code": code, "name": str(o.get("inter_kor_isnm", "") or ""),
+        "price": price, "change_rate": safe_float(o.get("prdy_ctrt", 0), 0.0),
+        "volume_ratio": get_real_volume_ratio(code, today_vol),
+        "today_vol": today_vol,
+        "high": safe_int(o.get("inter2_hgpr", 0)),
+        "low":  safe_int(o.get("inter2_lwpr", 0)),
+        "open": safe_int(o.get("inter2_oprc", 0)),
+        "upper_price": safe_int(o.get("inter2_mxpr", 0)),
+        "lower_price": safe_int(o.get("inter2_llam", 0)),
+        "acml_tr_pbmn": safe_int(o.get("acml_tr_pbmn", 0)),
+        "prdy_vrss_sign": str(o.get("prdy_vrss_sign", "3") or "3"),
+        "ask_qty": safe_int(o.get("seln_rsqn", 0)),
+        "bid_qty": safe_int(o.get("shnu_rsqn", 0)),
+        "ask_price": safe_int(o.get("inter2_askp", 0)),
+        "bid_price": safe_int(o.get("inter2_bidp", 0)),
+        "prev_close": safe_int(o.get("inter2_prdy_clpr", 0)),
+        "bstp_code": "",
+        "bstp_name": "",   # 미상 — 체결 스냅샷 메타의 기존 업종명 유지
+        "vi_cls_code": "",
+        "raw_status_code": "",
+        "raw_temp_stop": "",
+        "raw_trht_yn": "",
+        "raw_halt_yn": "",
+        "mrkt_alrm_cls_code": "",
+        "cap_size": "small",
+        "quote_source": "multi",
+        "quote_partial": True,
+    }
+def _fetch_multi_quote_chunk(codes: list) -> dict:
+    """최대 KIS_MULTI_QUOTE_MAX 종목을 1회 REST로 조회 → code → payload."""
+    global _multi_quote_disabled_date
+    params = {}
+    for idx, code in enumerate(codes, start=1):
+        params[f"FID_COND_MRKT_DIV_CODE_{idx}"] = "J"
+        params[f"FID_INPUT_ISCD_{idx}"] = code
+    data, status, _ct, _body = _safe_get(
+        f"{KIS_BASE_URL}/uapi/domestic-stock/v1/quotations/intstock-multprice",
+        "FHKST11300006", params, return_meta=True,
+    )
+    if status == 404:
+        # 미지원 계좌/환경 → 당일 단건 조회로 고정 (rank API 404 처리와 동일 정책)
+        _multi_quote_disabled_date = _now_kst().date().isoformat()
+        _log_warn_msg("⚠️ 멀티시세(FHKST11300006) 404 → 오늘은 단건 시세 조회로 대체")
+        return {}
+    rows = data.get("output", []) if isinstance(data, dict) else []
+    if isinstance(rows, dict):
+        rows = [rows]
+    out = {}
+    for o in rows or []:
+        if not isinstance(o, dict):
+            continue
+        payload = _multi_quote_row_to_payload(o)
+        if not payload:
+            continue
+        code = payload["code"]
+        out[code] = payload
+        try:
+            _record_execution_snapshot(code, payload, market="KRX")
+        except Exception as e:
+            _swallow_exception(e)
+        try:
+            if payload.get("name"):
+                _remember_public_stock_meta(code, payload["name"], "")
+        except Exception as e:
+            _swallow_exception(e)
+    _multi_quote_stats["batch_calls"] += 1
+    _multi_quote_stats["batch_codes"] += len(out)
+    return out
+def get_stock_prices_batch(codes, *, fallback_single: bool = True) -> dict:
+    """여러 종목 현재가를 멀티시세 배치로 조회 → {code: get_stock_price 동일 payload}.
+    - KRX 장중에만 배치 사용. NXT 단독 시간대는 get_stock_price()의 NX 분기를 그대로 따름.
+    - 배치 응답에 빠진 종목은 fallback_single=True면 단건 get_stock_price()로 보완.
+    """
+    uniq = []
+    seen = set()
+    for c in codes or []:
+        code = normalize_stock_code(c)
+        if code and code not in seen:
+            seen.add(code)
+            uniq.append(code)
+    if not uniq:
+        return {}
+    quotes = {}
+    use_batch = (
+        KIS_MULTI_QUOTE_ENABLED
+        and len(uniq) > 1
+        and _multi_quote_disabled_date != _now_kst().date().isoformat()
+        and not (is_nxt_open() and not is_market_open())
+    )
+    if use_batch:
+        # v177.17 #AF: 30종목 청크를 KIS 워커 풀로 동시 조회
+        chunks = [uniq[i:i + KIS_MULTI_QUOTE_MAX] for i in range(0, len(uniq), KIS_MULTI_QUOTE_MAX)]
+        for part in _kis_gather_calls([(_fetch_multi_quote_chunk, chunk) for chunk in chunks], default=dict):
+            quotes.update(part or {})
+    if fallback_single:
+        missing = [code for code in uniq if code not in quotes]
+        _multi_quote_stats["single_fallback"] += len(missing)
+        for code, cur in zip(missing, _kis_gather_calls([(get_stock_price, code) for code in missing], default=dict)):
+            if cur:
+                quotes[code] = cur
+    return quotes
+def _resolve_full_quote_if_needed(code: str, cur: dict | None) -> dict:
+    """멀티시세 payload를 단건 시세로 교체 (실패 시 빈 dict → 판단 보류). 조회 결과 정지·VI 플래그는 get_stock_price 가 기록."""
+    if not isinstance(cur, dict) or not cur or cur.get("quote_partial"):
+        return get_stock_price(code) or {}
+    return cur
+# 정지·VI 플래그: 멀티시세에 없으므로 단건 시세(get_stock_price) 응답 때 종목별로 기록해 두고 재사용
+MARKET_FLAG_RECHECK_SEC = float(os.getenv("MARKET_FLAG_RECHECK_SEC", "60") or "60")
+_MARKET_FLAG_KEYS = ("vi_cls_code", "raw_status_code", "raw_temp_stop", "raw_trht_yn", "raw_halt_yn")
+_market_flag_quotes: dict = {}   # code → (단건 시세 ts, 정지·VI 플래그)
+def _note_market_flag_quote(code: str, cur: dict | None) -> None:
+    if isinstance(cur, dict) and cur.get("price") and not cur.get("quote_partial"):
+        _market_flag_quotes[code] = (time.time(), {k: cur.get(k, "") for k in _MARKET_FLAG_KEYS})
+def _market_flags_fresh(code: str) -> bool:
+    hit = _market_flag_quotes.get(code)
+    return bool(hit) and time.time() - hit[0] < MARKET_FLAG_RECHECK_SEC
+def _full_quote_for_market_flags(code: str, cur: dict | None):
+    """정지·VI 판별용 — 멀티시세(quote_partial) payload 면 재확인 주기 내 단건 시세 플래그를 덧씌움.
+    REST 재조회는 하지 않음: 기록된 플래그가 없거나 오래됐으면 None (API 플래그 판별 생략)."""
+    if isinstance(cur, dict) and cur.get("quote_partial"):
+        if not _market_flags_fresh(code):
+            return None
+        merged = dict(cur)
+        merged.update(_market_flag_quotes[code][1])
+        return merged
+    return cur
+# 진입감시 선필터: 멀티시세 가격·누적거래량이 직전 단건 판단 때와 같으면 ENTRY_WATCH_FULL_RECHECK_SEC 동안 판단 생략
+ENTRY_WATCH_FULL_RECHECK_SEC = float(os.getenv("ENTRY_WATCH_FULL_RECHECK_SEC", "20") or "20")
+_entry_watch_quote_sig: dict = {}   # code → (멀티시세 price, today_vol, 단건 판단 ts)
+def _entry_watch_batch_unchanged(code: str, quote: dict | None) -> bool:
+    if not isinstance(quote, dict) or not quote.get("quote_partial") or not _is_live_trading_normal(quote):
+        return False
+    sig = _entry_watch_quote_sig.get(code)
+    return bool(sig) and sig[:2] == (quote.get("price"), quote.get("today_vol")) \
+        and time.time() - sig[2] < ENTRY_WATCH_FULL_RECHECK_SEC
+ENTRY_WATCH_NEAR_ENTRY_PCT = float(os.getenv("ENTRY_WATCH_NEAR_ENTRY_PCT", "1.0") or "1.0")
+def _entry_watch_needs_full_quote(watch: dict, quote: dict | None) -> bool:
+    """멀티시세 행으로 판단 — 진입가(손절가 포함 그 아래) 근접 또는 정지·VI 플래그 재확인 주기 도래 시에만 단건 시세.
+    상승이탈·상한가 만료·고저 갱신은 멀티시세 행(가격·등락률·상한가)만으로 처리."""
+    if not isinstance(quote, dict) or not quote.get("quote_partial"):
+        return True
+    if not _market_flags_fresh(watch["code"]):
+        return True
+    if watch.get("entry_hit_locked"):
+        return False
+    price = safe_int(quote.get("price", 0), 0)
+    entry = safe_int(watch.get("entry_price", 0), 0)
+    if price <= 0 or entry <= 0:
+        return True
+    near = max(_get_dynamic_entry_reach_slack_pct(watch), ENTRY_WATCH_NEAR_ENTRY_PCT / 100.0)
+    return price <= int(round(entry * (1.0 + near)))
+def _note_entry_watch_full_quote(code: str, quote: dict | None) -> None:
+    if isinstance(quote, dict) and quote.get("quote_partial"):
+        _entry_watch_quote_sig[code] = (quote.get("price"), quote.get("today_vol"), time.time())
+    else:
+        _entry_watch_quote_sig.pop(code, None)
+# ============================================================
 # 후보군 생성 fallback (랭킹 API 404 대비)
 # ============================================================
 UNIVERSE_FILE = _state_path("universe.json")
@@ -16770,8 +19222,8 @@ def _load_universe_codes() -> list:
         _swallow_exception(e)
     # signal_log.json
     try:
-        if os.path.exists(SIGNAL_LOG_FILE):
-            j = _read_json_locked(SIGNAL_LOG_FILE)
+        if _signal_log_exists():
+            j = _signal_log_read()
             found = set()
             _extract_codes_recursive(j, found, limit=5000)
             codes.extend(sorted(found))
@@ -16788,7 +19240,7 @@ def _load_universe_codes() -> list:
     return _UNIVERSE_CACHE["codes"]
 def _load_performance_universe_log() -> dict:
     try:
-        log = _read_json_locked(SIGNAL_LOG_FILE)
+        log = _signal_log_read()
         return log if isinstance(log, dict) else {}
     except Exception as e:
         _swallow_exception(e)
@@ -18444,9 +20896,9 @@ def _vi_evaluate_context(code: str, name: str, vi_price: int, vi_type: str) -> d
                 if c2 == code:
                     continue
                 if (info2 or {}).get("sector") == sec_name:
-                    buf = _execution_snapshots.get(c2)
-                    if buf:
-                        sec_chgs.append(float(buf[-1].get("change_rate", 0) or 0))
+                    snap2 = _exec_snap_last(c2)
+                    if snap2:
+                        sec_chgs.append(float(snap2.get("change_rate", 0) or 0))
             if sec_chgs and (sum(sec_chgs) / len(sec_chgs)) >= 3.0:
                 signals["c2_sector"] = 1
                 score += 1.0
@@ -18455,9 +20907,8 @@ def _vi_evaluate_context(code: str, name: str, vi_price: int, vi_type: str) -> d
 
     # C3. 종목 컨텍스트: 거래대금 100억↑ + 호가잔량 충분
     try:
-        buf = _execution_snapshots.get(code)
-        if buf:
-            snap = buf[-1]
+        snap = _exec_snap_last(code)
+        if snap:
             amt = float(snap.get("acml_tr_pbmn", 0) or 0)
             ask_ok = not bool(snap.get("no_ask_liquidity"))
             if amt >= 10_000_000_000 and ask_ok:
@@ -18529,7 +20980,7 @@ def _vi_calc_entry_price(code: str, vi_price: int) -> int:
         f1 = int(vi_price * 0.98)
         # F2: 5분 평균가
         f2 = 0
-        buf = _execution_snapshots.get(code)
+        buf = _exec_snap_rows(code)
         if buf and len(buf) > 0:
             cutoff_ts = time.time() - 300
             recent = [s for s in buf if float(s.get("ts", 0) or 0) >= cutoff_ts]
@@ -18896,9 +21347,7 @@ def _vi_release_check():
                     continue
                 # 현재가 조회 (WebSocket 스냅샷 우선)
                 cur_price = 0
-                buf = _execution_snapshots.get(code)
-                if buf:
-                    cur_price = int(buf[-1].get("price", 0) or 0)
+                cur_price = int(_exec_snap_last(code).get("price", 0) or 0)
                 if not cur_price:
                     # 스냅샷 없으면 KIS REST 호출 (rate limit 안전)
                     try:
@@ -19316,6 +21765,11 @@ def _get_quiet_investor_trend(code: str, market: str = "KRX") -> dict:
         lambda: get_nxt_investor_trend(code) if market == "NXT" else get_investor_trend(code),
     )
 def _get_quiet_orderbook_snapshot(code: str, market: str = "KRX") -> dict:
+    # v177.33 #AV: 실시간 호가 스트림 수신 중이면 REST 조회 생략 (H0STASP0 = KRX 호가)
+    if market != "NXT":
+        live_book = get_ws_orderbook_snapshot(code)
+        if live_book:
+            return live_book
     return _get_quiet_cached_snapshot("orderbook", code, market, lambda: get_orderbook_depth_snapshot(code, market=market))
 def _get_quiet_trade_snapshot(code: str, market: str = "KRX") -> dict:
     return _get_quiet_cached_snapshot("trade", code, market, lambda: get_trade_intensity_snapshot(code, market=market))
@@ -19419,7 +21873,7 @@ def _build_opening_gap_watch_pool() -> list:
     try:
         today  = _now_kst().strftime("%Y%m%d")
         yest   = (_now_kst() - timedelta(days=1)).strftime("%Y%m%d")
-        siglog = _read_json_safe(SIGNAL_LOG_FILE, {})
+        siglog = _signal_log_read()
         recs   = list(siglog.values()) if isinstance(siglog, dict) else (siglog if isinstance(siglog, list) else [])
         for rec in recs:
             if not isinstance(rec, dict):
@@ -19983,13 +22437,17 @@ def get_orderbook_depth_snapshot(code: str, market: str = "KRX") -> dict:
     out = _first_dict_output(data, "output1", "output")
     if not out:
         return {}
+    return _orderbook_depth_summary(
+        [safe_int(out.get(f"askp_rsqn{idx}", 0), 0) for idx in range(1, 11)],
+        [safe_int(out.get(f"bidp_rsqn{idx}", 0), 0) for idx in range(1, 11)],
+    )
+def _orderbook_depth_summary(ask_qtys, bid_qtys) -> dict:
+    """호가 1~10단계 잔량 → 총잔량·매수/매도 비율·활성/지지 단계 수 (REST·WS 호가 공용, v177.33 #AV)."""
     ask_total = 0
     bid_total = 0
     active_levels = 0
     support_levels = 0
-    for idx in range(1, 11):
-        ask_qty = safe_int(out.get(f"askp_rsqn{idx}", 0), 0)
-        bid_qty = safe_int(out.get(f"bidp_rsqn{idx}", 0), 0)
+    for ask_qty, bid_qty in zip(ask_qtys, bid_qtys):
         ask_total += ask_qty
         bid_total += bid_qty
         if ask_qty > 0 or bid_qty > 0:
@@ -20541,11 +22999,97 @@ def calc_price_correlation(code_a: str, code_b: str) -> float:
     except Exception as e:
         _swallow_exception(e)  # v105 structured silent-exception log
         return 0.0
+# ============================================================
+# 🔗 후보군 수익률 상관행렬 (v177.26 #AO)
+# - 세션(날짜+장전/정규장/장후)당 1회: 후보군 CORR_LOOKBACK일 수익률을 평균 0·노름 1 벡터로 정규화
+#   → 상관계수 = 두 벡터 내적 (calc_price_correlation 과 같은 모집단 피어슨 값)
+# - 행렬 행에서 상위 k 조회, 행렬에 없는 종목만 기존 calc_price_correlation 폴백
+# ============================================================
+CORR_MATRIX_ENABLED = os.getenv("CORR_MATRIX_ENABLED", "true").strip().lower() in ("true", "1", "yes")
+_corr_matrix: dict = {"key": "", "vecs": {}, "rows": {}, "ts": 0.0, "build_sec": 0.0}
+_corr_matrix_lock = threading.Lock()
+def _corr_unit_vector(items: list) -> list | None:
+    closes = [i["close"] for i in items[-CORR_LOOKBACK:] if i["close"]]
+    if len(closes) < CORR_LOOKBACK:
+        return None   # 짧은 이력은 위치 정렬이 달라지므로 행렬 제외 → 폴백 계산
+    rets = [(closes[i] - closes[i-1]) / closes[i-1] for i in range(1, len(closes))]
+    n2 = len(rets)
+    mean = sum(rets) / n2
+    norm = math.sqrt(sum((r - mean) ** 2 for r in rets))
+    if norm == 0:
+        return None
+    return [(r - mean) / norm for r in rets]
+def _corr_dot(va: list, vb: list) -> float:
+    return round(sum(a * b for a, b in zip(va, vb)), 3)
+def rebuild_correlation_matrix(codes: list) -> int:
+    """후보군 상관행렬 재구성 (세션당 1회). 행렬 종목 수 반환."""
+    if not CORR_MATRIX_ENABLED:
+        return 0
+    key = _session_phase_key()
+    with _corr_matrix_lock:
+        if _corr_matrix["key"] == key and _corr_matrix["vecs"]:
+            return len(_corr_matrix["vecs"])
+    t0 = time.monotonic()
+    todo = [c for c in dict.fromkeys(normalize_stock_code(c) for c in (codes or [])) if c]
+    missing = [c for c in todo if c not in _daily_cache]
+    fetched = dict(zip(missing, _kis_gather_calls([(get_daily_data, c, CORR_LOOKBACK + 5) for c in missing],
+                                                        default=list, background=True)))
+    vecs = {}
+    for c in todo:
+        items = fetched.get(c) if c in fetched else (_daily_cache.get(c) or {}).get("items", [])
+        v = _corr_unit_vector(items or [])
+        if v is not None:
+            vecs[c] = v
+    codes_ok = list(vecs)
+    rows = {c: {} for c in codes_ok}
+    for i, a in enumerate(codes_ok):
+        va = vecs[a]
+        for b in codes_ok[i+1:]:
+            corr = _corr_dot(va, vecs[b])
+            rows[a][b] = corr
+            rows[b][a] = corr
+    with _corr_matrix_lock:
+        _corr_matrix.update({"key": key, "vecs": vecs, "rows": rows, "ts": time.time(),
+                             "build_sec": round(time.monotonic() - t0, 2)})
+    return len(vecs)
+def get_price_correlation(code_a: str, code_b: str) -> float:
+    """행렬 조회 우선, 없으면 calc_price_correlation."""
+    with _corr_matrix_lock:
+        if _corr_matrix["key"] == _session_phase_key():
+            corr = (_corr_matrix["rows"].get(code_a) or {}).get(code_b)
+            if corr is not None:
+                return corr
+    return calc_price_correlation(code_a, code_b)
+def get_correlated_peers(code: str, candidates: dict, k: int = 6, min_corr: float = CORR_MIN,
+                         max_fallback: int = 20) -> list:
+    """candidates {code: name} 중 code와 상관계수 min_corr 이상 상위 k개 [(code, name, corr)]."""
+    with _corr_matrix_lock:
+        row = dict(_corr_matrix["rows"].get(code) or {}) if _corr_matrix["key"] == _session_phase_key() else {}
+        in_matrix = bool(row) or code in _corr_matrix["vecs"]
+        known = set(_corr_matrix["vecs"]) if in_matrix else set()
+    peers = []
+    fallback = 0
+    for peer_code, peer_name in candidates.items():
+        if peer_code == code:
+            continue
+        if peer_code in row:
+            corr = row[peer_code]
+        elif in_matrix and peer_code in known:
+            continue
+        else:
+            if fallback >= max_fallback:   # 행렬 밖 종목만 개별 계산 (API 부하 방지)
+                continue
+            fallback += 1
+            corr = calc_price_correlation(code, peer_code)
+        if corr >= min_corr:
+            peers.append((peer_code, peer_name, corr))
+    peers.sort(key=lambda x: x[2], reverse=True)
+    return peers[:k]
 def build_correlation_theme(code: str, name: str) -> list:
     """
     급등 종목과 상관관계 높은 종목들을 탐색 → 동적 테마 구성
     거래량 상위 + 상한가 상위에서 후보 선정 → 상관계수 0.7 이상만 채택
-    캐시 1시간
+    캐시 1시간 (v177.26: 상관행렬 행 조회, 행렬 밖 종목만 개별 계산)
     """
     cache_key = f"corr_{code}"
     cached = _sector_cache.get(cache_key)
@@ -20557,15 +23101,8 @@ def build_correlation_theme(code: str, name: str) -> list:
             c = s.get("code","")
             if c and c != code:
                 candidates[c] = s.get("name", c)
-        # 최대 20개 후보만 계산 (API 부하 방지)
-        peers = []
-        for peer_code, peer_name in list(candidates.items())[:20]:
-            corr = calc_price_correlation(code, peer_code)
-            if corr >= CORR_MIN:
-                peers.append((peer_code, peer_name, corr))
-            time.sleep(0.05)
-        peers.sort(key=lambda x: x[2], reverse=True)
-        result = [(c, n) for c, n, _ in peers[:6]]
+        peers = get_correlated_peers(code, candidates, k=6, min_corr=CORR_MIN)
+        result = [(c, n) for c, n, _ in peers]
         _sector_cache[cache_key] = {"peers": result, "ts": time.time()}
         if result:
             _log_info_msg(f"  🔗 [{name}] 가격 상관관계 종목 {len(result)}개: {[n for _,n in result]}")
@@ -20612,9 +23149,9 @@ def update_news_cooccur(headlines: list):
             prev = _news_cooccur[code]["peers"].get(peer_code, 0)
             _news_cooccur[code]["peers"][peer_code] = prev + cnt
         _news_cooccur[code]["ts"] = time.time()
-    # 파일 저장 (장 마감 후 분석용)
+    # 파일 저장 (장 마감 후 분석용) — v177.38 #BA: 지연 기록, 분석용이라 fsync 생략
     try:
-        _write_json_atomic(NEWS_COOCCUR_FILE, _news_cooccur, indent=2)
+        _mark_state_dirty(NEWS_COOCCUR_FILE, lambda: _news_cooccur, durability="fast")
     except Exception as e:
         _swallow_exception(e)
 def get_news_cooccur_peers(code: str) -> list:
@@ -21711,7 +24248,7 @@ def _build_market_scenario_digest_text(force: bool = False) -> str:
     today_str = datetime.now().strftime("%Y%m%d")
     today_signals: list[dict] = []
     try:
-        siglog = _read_json_safe(SIGNAL_LOG_FILE, {})
+        siglog = _signal_log_read()
         for rec in siglog.values():
             if not isinstance(rec, dict):
                 continue
@@ -22414,7 +24951,7 @@ def calc_real_sector_score(code_a: str, code_b: str,
     layers  = {}
     # ① 주가 상관계수 (60일)
     try:
-        corr = calc_price_correlation(code_a, code_b)
+        corr = get_price_correlation(code_a, code_b)
         if corr >= 0.7:
             pts = int(40 * min((corr - 0.7) / 0.3 + 0.5, 1.0))  # 0.7→20점, 1.0→40점
             score += pts
@@ -22580,9 +25117,11 @@ def _resolve_geo_sector_bias(theme_name: str) -> int:
         return 0
 def _collect_sector_momentum_results(peers: list, peers_all: dict) -> list:
     results = []
+    # v177.16 #AE: 피어 8종목 단건 조회 + 종목별 sleep → 멀티시세 1회 배치
+    quotes = get_stock_prices_batch([peer_code for peer_code, _ in peers[:8]])
     for peer_code, peer_name in peers[:8]:
         try:
-            cur = get_stock_price(peer_code)
+            cur = quotes.get(peer_code) or {}
             if not cur:
                 continue
             safe_peer_name = _resolve_stock_name(peer_code, peer_name, cur)
@@ -22603,7 +25142,6 @@ def _collect_sector_momentum_results(peers: list, peers_all: dict) -> list:
                 "source": src,
                 "reason": rsn,
             })
-            time.sleep(GEO_PREWATCH_POLL_DELAY_SEC)
         except Exception as e:
             _swallow_exception(e)
     return results
@@ -22745,6 +25283,243 @@ def calc_sector_momentum(code: str, name: str) -> dict:
 # 📋 신호 로그 저장 (모든 신호 유형 공통)
 # ============================================================
 SIGNAL_LOG_FILE = _state_path("signal_log.json")   # 모든 신호 추적 (신규)
+# ============================================================
+# 🧩 signal_log SQLite(WAL) 저장소 (v177.36 #AY)
+# - 기본 SIGNAL_LOG_BACKEND=sqlite : state/signal_log.sqlite3, 레코드 1행(body=JSON) + code/status/detect_date/signal_type 인덱스
+# - _signal_log_read()/_signal_log_query() 결과(_SignalLogRows)는 읽은 시점 행 본문(base)을 함께 보관
+#   _signal_log_write(data) 는 읽은 뒤 호출자가 바꾼 행만 upsert (한 트랜잭션), 삭제는 deleted_keys 로 넘긴 키만
+#   → 읽은 뒤 다른 스레드가 추가·수정한 행은 호출자가 건드리지 않았으면 덮어쓰거나 삭제하지 않음
+# - _signal_log_query(code=..., status=...) : 인덱스 부분 조회 — 신호 저장·추적·종가선진입 경로는 부분 조회만 사용
+#   건수 정리(_prune_and_write_signal_log 전체 읽기)는 _signal_log_prune_if_needed 가 한도 초과 시에만
+# - 전역 _file_lock 대신 전용 잠금, 첫 실행 시 signal_log.json 이관
+# - signal_log.json 은 SIGNAL_LOG_EXPORT_MIN 분마다 내보내기 (백업·/download 용, 기존 스냅샷 백업 경로 유지)
+# - SIGNAL_LOG_BACKEND=json 이면 기존 JSON 파일 전체 읽기/쓰기
+# ============================================================
+import sqlite3 as _sqlite3
+SIGNAL_LOG_BACKEND = os.getenv("SIGNAL_LOG_BACKEND", "sqlite").strip().lower()
+SIGNAL_LOG_DB_FILE = _state_path("signal_log.sqlite3")
+SIGNAL_LOG_EXPORT_MIN = max(1, int(os.getenv("SIGNAL_LOG_EXPORT_MIN", "10") or "10"))
+_SIGNAL_LOG_INDEX_FIELDS = ("code", "status", "detect_date", "signal_type")
+_signal_log_db_lock = threading.RLock()
+_signal_log_db_state = {"conn": None, "failed": False, "export_dirty": False}
+_signal_log_stats = {"writes": 0, "upserts": 0, "deletes": 0, "unchanged": 0, "exports": 0}
+
+
+def _signal_log_dumps(rec) -> str:
+    return json.dumps(rec, ensure_ascii=False, separators=(",", ":"))
+
+
+class _SignalLogRows(dict):
+    """signal_log 조회 결과 — base 에 읽은 시점 행 본문(key → JSON)을 보관해 쓰기 때 호출자 변경분만 판별."""
+    __slots__ = ("base",)
+
+
+def _signal_log_rows(pairs, base: dict | None = None) -> dict:
+    out = _SignalLogRows()
+    out.base = {} if base is None else base
+    for k, body in pairs:
+        out[k] = json.loads(body)
+        out.base[k] = body
+    return out
+
+
+def _signal_log_conn():
+    """_signal_log_db_lock 보유 상태에서 호출. sqlite 미사용/실패 시 None (JSON 경로)."""
+    st = _signal_log_db_state
+    if SIGNAL_LOG_BACKEND != "sqlite" or st["failed"]:
+        return None
+    if st["conn"] is not None:
+        return st["conn"]
+    try:
+        _ensure_dir(os.path.dirname(SIGNAL_LOG_DB_FILE))
+        conn = _sqlite3.connect(SIGNAL_LOG_DB_FILE, timeout=30, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS signal_log ("
+            " key TEXT PRIMARY KEY, code TEXT, status TEXT, detect_date TEXT, signal_type TEXT,"
+            " updated_ts REAL, body TEXT NOT NULL)"
+        )
+        for col in _SIGNAL_LOG_INDEX_FIELDS:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_signal_log_{col} ON signal_log({col})")
+        if conn.execute("SELECT COUNT(*) FROM signal_log").fetchone()[0] == 0 and os.path.exists(SIGNAL_LOG_FILE):
+            legacy = _read_json_locked(SIGNAL_LOG_FILE)
+            if isinstance(legacy, dict) and legacy:
+                conn.execute("BEGIN")
+                conn.executemany(
+                    "INSERT OR REPLACE INTO signal_log VALUES (?,?,?,?,?,?,?)",
+                    [_signal_log_row(k, rec) for k, rec in legacy.items() if isinstance(rec, dict)],
+                )
+                conn.execute("COMMIT")
+                _log_info_msg(f"📋 signal_log.json → SQLite 이관: {len(legacy)}건")
+        st["conn"] = conn
+        return conn
+    except Exception as e:
+        st["failed"] = True
+        _log_warn_msg(f"⚠️ signal_log SQLite 열기 실패 — JSON 파일 사용: {e}")
+        return None
+
+
+def _signal_log_row(key, rec: dict, body: str | None = None) -> tuple:
+    return (str(key),) + tuple(str(rec.get(f, "") or "") for f in _SIGNAL_LOG_INDEX_FIELDS) + (
+        time.time(), body if body is not None else _signal_log_dumps(rec))
+
+
+def _signal_log_read() -> dict:
+    """signal_log 전체 (key → 레코드, 저장 순서)."""
+    with _signal_log_db_lock:
+        conn = _signal_log_conn()
+        if conn is not None:
+            return _signal_log_rows(conn.execute("SELECT key, body FROM signal_log ORDER BY rowid").fetchall())
+        data = _signal_log_read_json_file()
+    return _signal_log_rows((k, _signal_log_dumps(rec)) for k, rec in data.items())
+
+
+def _signal_log_read_json_file() -> dict:
+    data = _read_json_locked(SIGNAL_LOG_FILE) if os.path.exists(SIGNAL_LOG_FILE) else {}
+    return data if isinstance(data, dict) else {}
+
+
+def _signal_log_query(code: str | None = None, status=None, detect_date: str | None = None,
+                      signal_type: str | None = None, keys=None) -> dict:
+    """인덱스 조건 부분 조회 (status 는 문자열 또는 목록). keys 지정 시 해당 키도 포함."""
+    conds, args = [], []
+    for col, val in (("code", code), ("detect_date", detect_date), ("signal_type", signal_type)):
+        if val:
+            conds.append(f"{col} = ?")
+            args.append(str(val))
+    if status:
+        statuses = [status] if isinstance(status, str) else list(status)
+        conds.append(f"status IN ({','.join('?' * len(statuses))})")
+        args.extend(statuses)
+    key_list = [str(k) for k in (keys or []) if k]
+    with _signal_log_db_lock:
+        conn = _signal_log_conn()
+        if conn is not None:
+            key_where = f"key IN ({','.join('?' * len(key_list))})" if key_list else ""
+            if conds:
+                where = " AND ".join(conds)
+                if key_where:
+                    where = f"({where}) OR {key_where}"
+            else:
+                where = key_where or "1"   # 키만 지정하면 해당 키만
+            rows = conn.execute(f"SELECT key, body FROM signal_log WHERE {where} ORDER BY rowid", args + key_list).fetchall()
+            return _signal_log_rows(rows)
+    full = _signal_log_read()
+    statuses = None if not status else ({status} if isinstance(status, str) else set(status))
+    match_all = not (conds or key_list)
+    return _signal_log_rows(
+        (k, full.base[k]) for k, rec in full.items()
+        if k in key_list or (isinstance(rec, dict) and (match_all or conds)
+            and (not code or str(rec.get("code", "")) == str(code))
+            and (statuses is None or rec.get("status") in statuses)
+            and (not detect_date or rec.get("detect_date") == detect_date)
+            and (not signal_type or rec.get("signal_type") == signal_type))
+    )
+
+
+def _signal_log_write(data: dict, deleted_keys=None) -> None:
+    """호출자가 바꾼 행만 upsert, deleted_keys 로 넘긴 키만 delete.
+    data 가 _signal_log_read/_signal_log_query 결과면 읽은 시점 본문(base)과 비교 → 읽은 뒤 다른 스레드가
+    수정한 행도 호출자가 건드리지 않았으면 덮어쓰지 않음. base 가 없으면 현재 저장 본문과 비교.
+    data 에 없는 행은 건드리지 않음 (부분 조회 결과 그대로 저장 가능, JSON 백엔드도 행 단위 병합)."""
+    if not isinstance(data, dict):
+        return
+    base = getattr(data, "base", None)
+    deletable = {str(k) for k in (deleted_keys or ()) if k not in data}
+    with _signal_log_db_lock:
+        conn = _signal_log_conn()
+        current = None
+        if base is None:
+            if conn is None:
+                current = {k: _signal_log_dumps(v) for k, v in _signal_log_read_json_file().items()}
+            elif len(data) <= 900:   # SQLite 바인딩 변수 한도 안 → 해당 행만 조회
+                keys = [str(k) for k in data]
+                current = dict(conn.execute(
+                    f"SELECT key, body FROM signal_log WHERE key IN ({','.join('?' * len(keys))})", keys
+                ).fetchall()) if keys else {}
+            else:
+                current = dict(conn.execute("SELECT key, body FROM signal_log").fetchall())
+        ref = base if base is not None else current
+        upserts = []
+        for k, rec in data.items():
+            if not isinstance(rec, dict):
+                continue
+            body = _signal_log_dumps(rec)
+            k = str(k)
+            if ref.get(k) == body:
+                continue
+            upserts.append(_signal_log_row(k, rec, body))
+        deletes = [(k,) for k in deletable]
+        _signal_log_stats["writes"] += 1
+        _signal_log_stats["unchanged"] += len(data) - len(upserts)
+        if not upserts and not deletes:
+            return
+        if conn is None:
+            full = _signal_log_read_json_file()
+            for row in upserts:
+                full[row[0]] = data[row[0]]
+            for (k,) in deletes:
+                full.pop(k, None)
+            _write_json_atomic(SIGNAL_LOG_FILE, full, indent=2)
+            _signal_log_written(base, upserts, deletes)
+            return
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            if upserts:
+                conn.executemany(
+                    "INSERT INTO signal_log VALUES (?,?,?,?,?,?,?) ON CONFLICT(key) DO UPDATE SET"
+                    " code=excluded.code, status=excluded.status, detect_date=excluded.detect_date,"
+                    " signal_type=excluded.signal_type, updated_ts=excluded.updated_ts, body=excluded.body",
+                    upserts,
+                )
+            if deletes:
+                conn.executemany("DELETE FROM signal_log WHERE key = ?", deletes)
+            conn.execute("COMMIT")
+        except Exception as e:
+            try:
+                conn.execute("ROLLBACK")
+            except Exception:
+                pass
+            _log_warn_msg(f"⚠️ signal_log 저장 실패: {e}")
+            return
+        _signal_log_stats["upserts"] += len(upserts)
+        _signal_log_stats["deletes"] += len(deletes)
+        _signal_log_db_state["export_dirty"] = True
+        _signal_log_written(base, upserts, deletes)
+
+
+def _signal_log_written(base: dict | None, upserts: list, deletes: list) -> None:
+    """저장 성공 후 base 갱신 — 같은 조회 결과로 다시 쓰면 그 사이 변경분만 비교."""
+    if base is None:
+        return
+    for row in upserts:
+        base[row[0]] = row[-1]
+    for (k,) in deletes:
+        base.pop(k, None)
+
+
+def _signal_log_exists() -> bool:
+    with _signal_log_db_lock:
+        conn = _signal_log_conn()
+        if conn is not None:
+            return conn.execute("SELECT 1 FROM signal_log LIMIT 1").fetchone() is not None
+    return os.path.exists(SIGNAL_LOG_FILE)
+
+
+def _signal_log_export_json(force: bool = False) -> None:
+    """SQLite → signal_log.json 내보내기 (변경 있을 때만, force=True 면 항상)."""
+    if SIGNAL_LOG_BACKEND != "sqlite" or _signal_log_db_state["failed"]:
+        return
+    if not force and not _signal_log_db_state["export_dirty"]:
+        return
+    try:
+        _signal_log_db_state["export_dirty"] = False
+        _write_json_atomic(SIGNAL_LOG_FILE, _signal_log_read(), indent=2)
+        _signal_log_stats["exports"] += 1
+    except Exception as e:
+        _signal_log_db_state["export_dirty"] = True
+        _swallow_exception(e, "signal_log_export")
 STATS_SCOPE_FILE = _state_path("stats_scope.json")
 CAPTURE_FUNNEL_FILE = _state_path("capture_funnel.json")  # saved/watch/reached 전환율 집계
 # ============================================================
@@ -22764,11 +25539,11 @@ def _strict_cleanup_legacy_entry_hits() -> None:
     try:
         if os.path.exists(STRICT_ENTRY_CLEANUP_MARKER):
             return
-        if not os.path.exists(SIGNAL_LOG_FILE):
+        if not _signal_log_exists():
             with open(STRICT_ENTRY_CLEANUP_MARKER, "w", encoding="utf-8") as f:
                 f.write(datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
             return
-        data = _read_json_locked(SIGNAL_LOG_FILE)
+        data = _signal_log_read()
         if not isinstance(data, dict):
             return
         changed = 0
@@ -22791,9 +25566,9 @@ def _strict_cleanup_legacy_entry_hits() -> None:
                 rec["entry_hit_time"] = None
                 changed += 1
         if changed > 0:
-            original = _read_json_locked(SIGNAL_LOG_FILE)
+            original = _signal_log_read()
             _write_json_atomic(backup_path, original, indent=2)
-            _write_json_atomic(SIGNAL_LOG_FILE, data, indent=2)
+            _signal_log_write(data)
             _log_info_msg(f"🧹 strict cleanup: 과거 비실진입 entry_hit {changed}건 초기화, 백업={os.path.basename(backup_path)}")
         else:
             _log_info_msg("🧹 strict cleanup: 초기화할 과거 비실진입 entry_hit 없음")
@@ -22911,14 +25686,13 @@ def _normalize_signal_log_pnl_fields(data: dict) -> int:
 def migrate_signal_log_pnl_fields() -> None:
     """기존 signal_log에 gross/net/cost 필드를 1회 보강해 net 기준 통계를 유지한다."""
     try:
-        data = _read_json_locked(SIGNAL_LOG_FILE)
+        data = _signal_log_read()
         if not isinstance(data, dict) or not data:
             return
         changed = _normalize_signal_log_pnl_fields(data)
         if changed <= 0:
             return
-        data = _prune_signal_log(data)
-        _write_json_atomic(SIGNAL_LOG_FILE, data, indent=2)
+        data = _prune_and_write_signal_log(data)
         try:
             _history_cache["data"] = data
             _history_cache["ts"] = time.time()
@@ -22967,6 +25741,38 @@ def _prune_signal_log(data: dict) -> dict:
     except Exception as e:
         _swallow_exception(e)  # v105 structured silent-exception log
         return data
+def _prune_and_write_signal_log(data: dict) -> dict:
+    """_prune_signal_log 후 저장 — 정리로 빠진 키만 삭제 대상으로 전달 (읽은 시점 base 유지)."""
+    pruned = _prune_signal_log(data)
+    if not isinstance(pruned, dict):
+        return pruned
+    removed = [k for k in data if k not in pruned]
+    base = getattr(data, "base", None)
+    if base is not None and not isinstance(pruned, _SignalLogRows):
+        rows = _SignalLogRows(pruned)
+        rows.base = base
+        pruned = rows
+    _signal_log_write(pruned, deleted_keys=removed)
+    return pruned
+SIGNAL_LOG_PRUNE_CHECK_SEC = 60
+def _signal_log_prune_if_needed() -> None:
+    """부분 조회 저장 경로용 — 건수 한도 초과 또는 아카이브 대상 완료건이 있을 때만 전체 읽기 정리 (최대 분당 1회)."""
+    st = _signal_log_db_state
+    now = time.time()
+    if now - st.get("prune_check_ts", 0.0) < SIGNAL_LOG_PRUNE_CHECK_SEC:
+        return
+    st["prune_check_ts"] = now
+    cutoff = (datetime.now() - timedelta(days=SIGNAL_LOG_ARCHIVE_DAYS)).strftime("%Y%m%d")
+    with _signal_log_db_lock:
+        conn = _signal_log_conn()
+        if conn is not None:
+            count = conn.execute("SELECT COUNT(*) FROM signal_log").fetchone()[0]
+            stale = conn.execute(
+                "SELECT 1 FROM signal_log WHERE status IN ('수익','손실','본전') AND detect_date < ? LIMIT 1", (cutoff,)
+            ).fetchone()
+            if count <= SIGNAL_LOG_MAX_RECORDS and stale is None:
+                return
+    _prune_and_write_signal_log(_signal_log_read())
 def _get_params_snapshot() -> dict:
     """신호 당시 '조건'을 최소 핵심만 스냅샷(최적화용)."""
     try:
@@ -23171,7 +25977,7 @@ def _drop_tracking_runtime_artifacts(codes: set[str]) -> None:
 def purge_orphan_tracking(notify: bool = False) -> int:
     """signal_log 전체에서 고아 추적 종목을 일괄 만료 처리. 봇 시작 시 호출."""
     try:
-        data = _read_json_locked(SIGNAL_LOG_FILE)
+        data = _signal_log_read()
     except Exception as e:
         _swallow_exception(e)  # v105 structured silent-exception log
         return 0
@@ -23196,7 +26002,7 @@ def purge_orphan_tracking(notify: bool = False) -> int:
             _log_info_msg(f"  🗑 고아 추적 만료: {rec.get('name', rec.get('code', log_key))} ({elapsed}일 경과)")
     if purged:
         try:
-            _write_json_atomic(SIGNAL_LOG_FILE, data)
+            _signal_log_write(data)
         except Exception as e:
             _swallow_exception(e)
         _drop_tracking_runtime_artifacts(purged_codes)
@@ -23484,9 +26290,10 @@ def _merge_tracking_episode_records(data: dict | None, code: str, representative
     if isinstance(rep, dict):
         rep["episode_representative"] = True
     return changed
-def _load_signal_log_data() -> dict:
+def _load_signal_log_data(code: str | None = None) -> dict:
+    """code 지정 시 해당 종목 행만 인덱스 조회 (신호 저장 경로)."""
     try:
-        data = _read_json_locked(SIGNAL_LOG_FILE)
+        data = _signal_log_query(code=code) if code else _signal_log_read()
         if isinstance(data, dict):
             _normalize_signal_log_pnl_fields(data)
         return data if isinstance(data, dict) else {}
@@ -23669,8 +26476,8 @@ def _update_representative_signal_log_record(data: dict, stock: dict, ctx: dict)
         rec["entry_reference_date"] = ""
         rec["entry_reference_clock"] = ""
         rec["entry_reference_price"] = 0
-    data = _prune_signal_log(data)
-    _write_json_atomic(SIGNAL_LOG_FILE, data, indent=2)
+    _signal_log_write(data)
+    _signal_log_prune_if_needed()
     _record_capture_funnel_event("saved", stock, {"mode": "representative_update"})
     _log_info_msg(f"  💾 신호 저장(대표갱신): {stock['name']} [{ctx['sig_type']}] → {representative_key}")
     return True
@@ -23772,8 +26579,8 @@ def save_signal_log(stock: dict):
             if _tgt <= _entry:
                 stock["target_price"] = int(_entry * 1.10 / 10) * 10
                 stock["target_pct"]   = 10.0
-        data = _load_signal_log_data()
         ctx = _build_signal_log_context(stock)
+        data = _load_signal_log_data(code=ctx["code"])   # 같은 종목 행만 (대표 레코드 탐색·통합 범위)
         # v165.44 [1]: _force_new_signal_log_record=True이면 대표 레코드 갱신 금지 (1차 데이터 보존)
         # entry_hit=True 재포착(2차진입 시나리오)에서 호출됨 — 1차 signal_log 독립 유지
         if stock.get("_force_new_signal_log_record"):
@@ -23783,8 +26590,8 @@ def save_signal_log(stock: dict):
             data[ctx["log_key"]] = _build_new_signal_log_record(stock, ctx)
             data[ctx["log_key"]]["_reopen_label"] = "2차재포착"
             stock["signal_log_key"] = ctx["log_key"]
-            data = _prune_signal_log(data)
-            _write_json_atomic(SIGNAL_LOG_FILE, data, indent=2)
+            _signal_log_write(data)
+            _signal_log_prune_if_needed()
             _record_capture_funnel_event("saved", stock, {"mode": "new_2차"})
             _log_info_msg(f"  💾 신호 저장(2차재포착): {stock['name']} [{ctx['sig_type']}] → {ctx['log_key']}")
             return
@@ -23792,8 +26599,8 @@ def save_signal_log(stock: dict):
             return
         data[ctx["log_key"]] = _build_new_signal_log_record(stock, ctx)
         stock["signal_log_key"] = ctx["log_key"]
-        data = _prune_signal_log(data)
-        _write_json_atomic(SIGNAL_LOG_FILE, data, indent=2)
+        _signal_log_write(data)
+        _signal_log_prune_if_needed()
         _record_capture_funnel_event("saved", stock, {"mode": "new"})
         _log_info_msg(f"  💾 신호 저장: {stock['name']} [{ctx['sig_type']}] 진입{stock.get('entry_price',0):,} 손절{stock.get('stop_loss',0):,} 목표{stock.get('target_price',0):,}")
     except Exception as e:
@@ -23839,7 +26646,7 @@ _tracking_notified = set()   # 이미 결과 알림 보낸 log_key
 # ============================================================
 def _build_overnight_risk_alert_message(limit_items: int | None = None, include_stats: bool = True) -> str:
     try:
-        data = _read_json_locked(SIGNAL_LOG_FILE)
+        data = _signal_log_read()
     except Exception as e:
         _swallow_exception(e)  # v105 structured silent-exception log
         return ""
@@ -24163,7 +26970,7 @@ def _send_pending_result_reminder():
     try:
         data = {}
         try:
-            data = _read_json_locked(SIGNAL_LOG_FILE)
+            data = _signal_log_read()
         except Exception as e:
             _swallow_exception(e)  # v105 structured silent-exception log
             return
@@ -24221,7 +27028,7 @@ def _send_pending_result_reminder():
         _log_warn_msg(f"⚠️ 결과 입력 알림 오류: {e}")
 def _load_tracking_results_runtime():
     try:
-        data = _read_json_locked(SIGNAL_LOG_FILE)
+        data = _signal_log_query(status=TRACK_ACTIVE_STATUSES)   # 추적·대표 통합은 활성 행만 사용
     except Exception as e:
         _swallow_exception(e)  # v105 structured silent-exception log
         return None
@@ -24273,10 +27080,10 @@ def _handle_tracking_orphan_record(rec, log_key, today, code):
         f"(entry/stop/target 미설정, {elapsed_orphan}일 경과)"
     )
     return True, True
-def _get_tracking_runtime_price(code):
+def _get_tracking_runtime_price(code, quotes: dict | None = None):
     try:
         if is_market_open():
-            cur = get_stock_price(code)
+            cur = (quotes or {}).get(code) or get_stock_price(code)
             price = cur.get("price", 0)
         elif is_nxt_open():
             nxt_cur = get_nxt_stock_price(code)
@@ -24795,7 +27602,7 @@ def _finalize_tracking_exit_record(rec, code, price, entry, exit_reason, today,
                     )
                 except Exception as e:
                     _swallow_exception(e)
-def _process_tracking_result_record(data, today, log_key, rec):
+def _process_tracking_result_record(data, today, log_key, rec, quotes: dict | None = None):
     if rec.get("status") != "추적중" or log_key in _tracking_notified:
         return False
     rec["episode_representative"] = True
@@ -24809,7 +27616,7 @@ def _process_tracking_result_record(data, today, log_key, rec):
         return orphan_updated
     detect_date = rec.get("detect_date", today)
     elapsed_days = _calc_tracking_elapsed_days(detect_date, today)
-    price = _get_tracking_runtime_price(code)
+    price = _get_tracking_runtime_price(code, quotes)
     if not price:
         return False
     _refresh_tracking_record_extremes(rec, price)
@@ -24865,15 +27672,25 @@ def _run_tracking_results_batch(runtime):
     data = runtime["data"]
     updated = bool(runtime.get("updated"))
     today = runtime["today"]
+    # v177.16 #AE: KRX 장중이면 추적중 종목 시세를 멀티시세로 선조회
+    quotes = {}
+    if is_market_open():
+        codes = [rec.get("code") for k, rec in data.items()
+                 if isinstance(rec, dict) and rec.get("status") == "추적중" and k not in _tracking_notified]
+        try:
+            quotes = get_stock_prices_batch(codes, fallback_single=False)
+        except Exception as e:
+            _swallow_exception(e)
     for log_key, rec in data.items():
-        updated = _process_tracking_result_record(data, today, log_key, rec) or updated
+        updated = _process_tracking_result_record(data, today, log_key, rec, quotes) or updated
     runtime["updated"] = updated
 def _persist_tracking_results_runtime(runtime):
     if not runtime or not runtime.get("updated"):
         return
-    data = _prune_signal_log(runtime["data"])
-    _write_json_atomic(SIGNAL_LOG_FILE, data, indent=2)
+    _signal_log_write(runtime["data"])
+    _signal_log_prune_if_needed()
     load_tracker_feedback()
+@_with_kis_lane("critical")  # v177.20 #AI
 def _run_tracking_results_cycle():
     runtime = _load_tracking_results_runtime()
     if not runtime:
@@ -25143,8 +27960,8 @@ def save_carry_stocks():
                 if not _is_active_carry_snapshot(snap):
                     continue
                 payload[code] = snap
-            with open(CARRY_FILE, "w", encoding="utf-8", newline="\n") as f:
-                json.dump(payload, f, ensure_ascii=False)
+            # v177.39 #BB: 제자리 덮어쓰기 대신 원자적 교체 (하드링크 백업 inode 보호)
+            _atomic_write_bytes(CARRY_FILE, json.dumps(payload, ensure_ascii=False).encode("utf-8"))
         except Exception as e:
             _log_warn_msg(f"⚠️ 이월 저장 실패: {e}")
 def _purge_orphan_tracking_bootstrap() -> None:
@@ -25217,7 +28034,7 @@ def load_carry_stocks():
     """Railway 재시작 시 추적 상태 전체 복원"""
     _purge_orphan_tracking_bootstrap()
     try:
-        sig_data = _read_json_locked(SIGNAL_LOG_FILE)
+        sig_data = _signal_log_read()
     except Exception as e:
         _swallow_exception(e)
         sig_data = {}
@@ -25559,7 +28376,7 @@ def _load_completed_signal_kpi_records(completed: list | None) -> list:
     if completed is not None:
         return [row for row in completed if row.get("status") in ["수익", "손실", "본전"] and _record_matches_stats_scope(row)]
     try:
-        data = _read_json_locked(SIGNAL_LOG_FILE)
+        data = _signal_log_read()
     except Exception as e:
         _swallow_exception(e)
         data = {}
@@ -25862,7 +28679,7 @@ def _auto_tune_entry_pullback_ratio_feedback(data: dict, completed: list, tune_s
     return changes
 def _auto_tune_load_completed_records():
     try:
-        data = _read_json_locked(SIGNAL_LOG_FILE)
+        data = _signal_log_read()
     except Exception as e:
         _swallow_exception(e)  # v105 structured silent-exception log
         return None, []
@@ -27265,7 +30082,7 @@ def _sync_entry_watch_representative_log(s: dict, ctx: dict) -> None:
     try:
         sig_data = {}
         try:
-            sig_data = _read_json_locked(SIGNAL_LOG_FILE)
+            sig_data = _signal_log_read()
         except Exception as e:
             _swallow_exception(e)
         representative_key = _find_representative_tracking_log_key(sig_data, ctx["code"], preferred_key=ctx["signal_log_key"])
@@ -27306,7 +30123,7 @@ def _sync_entry_watch_representative_log(s: dict, ctx: dict) -> None:
         rec["entry_reference_clock"] = ""
         rec["entry_reference_price"] = 0
         _merge_tracking_episode_records(sig_data, ctx["code"], representative_key, reason="재포착_대표레코드통합")
-        _write_json_atomic(SIGNAL_LOG_FILE, sig_data, indent=2)
+        _signal_log_write(sig_data)
     except Exception as e:
         _log_warn_msg(f"⚠️ 대표 진입가 동기화 오류: {e}")
 def _archive_prior_entry_watches(old_items: list[tuple[str, dict]], ctx: dict) -> None:
@@ -27576,7 +30393,7 @@ def _record_entry_blocked(watch: dict, reason: str, blocked_price: int):
     try:
         data = {}
         try:
-            data = _read_json_locked(SIGNAL_LOG_FILE)
+            data = _signal_log_read()
         except Exception as e:
             _swallow_exception(e)
         target_log_key = str(watch.get("signal_log_key") or "").strip()
@@ -27599,7 +30416,7 @@ def _record_entry_blocked(watch: dict, reason: str, blocked_price: int):
                 updated = True
                 break
         if updated:
-            _write_json_atomic(SIGNAL_LOG_FILE, data, indent=2)
+            _signal_log_write(data)
         # v161.3 #9: 종목별 30초 쿨다운으로 중복 경고 억제
         blocked_code = str(watch.get("code") or "")
         _cooldown_key = f"{blocked_code}_{reason}"
@@ -27613,7 +30430,7 @@ def _record_entry_policy_filtered(watch: dict, reason: str, filtered_price: int)
     try:
         data = {}
         try:
-            data = _read_json_locked(SIGNAL_LOG_FILE)
+            data = _signal_log_read()
         except Exception as e:
             _swallow_exception(e)
         target_log_key = str(watch.get("signal_log_key") or "").strip()
@@ -27634,7 +30451,7 @@ def _record_entry_policy_filtered(watch: dict, reason: str, filtered_price: int)
             updated = True
             break
         if updated:
-            _write_json_atomic(SIGNAL_LOG_FILE, data, indent=2)
+            _signal_log_write(data)
         _log_info_msg(f"  📴 정책제외 기록: {watch.get('name','')} {reason} @ {int(filtered_price or 0):,}")
     except Exception as e:
         _log_warn_msg(f"⚠️ 정책제외 기록 오류: {e}")
@@ -27642,7 +30459,7 @@ def _record_entry_dropped(watch: dict, reason: str, current_price: int):
     try:
         data = {}
         try:
-            data = _read_json_locked(SIGNAL_LOG_FILE)
+            data = _signal_log_read()
         except Exception as e:
             _swallow_exception(e)
         target_log_key = str(watch.get("signal_log_key") or "").strip()
@@ -27664,7 +30481,7 @@ def _record_entry_dropped(watch: dict, reason: str, current_price: int):
             updated = True
             break
         if updated:
-            _write_json_atomic(SIGNAL_LOG_FILE, data, indent=2)
+            _signal_log_write(data)
         _mark_entry_termination_state(watch.get("code", ""), reason, watch.get("signal_type", ""), watch.get("execution_grade") or watch.get("grade") or "", watch.get("score", 0))
         _log_info_msg(f"  🗑 근거약화 탈락 기록: {watch.get('name','')} {reason} @ {int(current_price or 0):,}")
     except Exception as e:
@@ -27674,7 +30491,7 @@ def _record_entry_guard_followup(watch: dict, reason: str, current_price: int):
     try:
         data = {}
         try:
-            data = _read_json_locked(SIGNAL_LOG_FILE)
+            data = _signal_log_read()
         except Exception as e:
             _swallow_exception(e)
         target_log_key = str(watch.get("signal_log_key") or "").strip()
@@ -27694,7 +30511,7 @@ def _record_entry_guard_followup(watch: dict, reason: str, current_price: int):
             updated = True
             break
         if updated:
-            _write_json_atomic(SIGNAL_LOG_FILE, data, indent=2)
+            _signal_log_write(data)
         _log_warn_msg(f"  ⚠️ 진입 보류/취소 기록: {watch.get('name','')} {reason} @ {int(current_price or 0):,}")
     except Exception as e:
         _log_warn_msg(f"⚠️ 진입 보류/취소 기록 오류: {e}")
@@ -28623,6 +31440,7 @@ def _is_krx_vi_reference_mode(cur: dict, code: str) -> bool:
         return False
     if not (is_nxt_open() and is_nxt_listed(code)):
         return False
+    cur = _full_quote_for_market_flags(code, cur) or {}
     for _k in ("vi_cls_code", "vi_yn", "trht_yn", "halt_yn", "raw_temp_stop", "is_vi", "raw_status_code"):
         if _is_truthy_market_flag(cur.get(_k)):
             return True
@@ -28637,6 +31455,7 @@ def _is_trading_halt(code: str, cur: dict | None = None) -> bool:
     code = normalize_stock_code(code)
     if not code:
         return False
+    cur = _full_quote_for_market_flags(code, cur)
     # 0) 영속 거래정지 상태 체크 (재시작 후 재포착 방지)
     persisted = _get_persisted_trading_halt(code)
     if persisted:
@@ -28674,7 +31493,7 @@ def _record_entry_reference_reach(watch: dict, ref_price: int, market: str = "NX
     try:
         data = {}
         try:
-            data = _read_json_locked(SIGNAL_LOG_FILE)
+            data = _signal_log_read()
         except Exception as e:
             _swallow_exception(e)
         target_log_key = str(watch.get("signal_log_key") or "").strip()
@@ -28697,7 +31516,7 @@ def _record_entry_reference_reach(watch: dict, ref_price: int, market: str = "NX
                 updated = True
                 break
         if updated:
-            _write_json_atomic(SIGNAL_LOG_FILE, data, indent=2)
+            _signal_log_write(data)
         _log_info_msg(f"  🟦 참고도달 기록: {watch.get('name','')} {market} @ {int(ref_price or 0):,}")
     except Exception as e:
         _log_warn_msg(f"⚠️ 참고도달 기록 오류: {e}")
@@ -28706,7 +31525,7 @@ def _record_entry_miss(watch: dict, reason: str, final_price: int):
     try:
         data = {}
         try:
-            data = _read_json_locked(SIGNAL_LOG_FILE)
+            data = _signal_log_read()
         except Exception as e:
             _swallow_exception(e)
         entry     = watch.get("entry_price", 0)
@@ -28740,7 +31559,7 @@ def _record_entry_miss(watch: dict, reason: str, final_price: int):
                     rec["pnl_pct"]     = 0.0
                     rec["exit_reason"] = f"진입미달_{reason}"
                 break
-        _write_json_atomic(SIGNAL_LOG_FILE, data, indent=2)
+        _signal_log_write(data)
         _log_info_msg(f"  📝 진입미달 기록: {watch['name']} {reason} (진입가 대비 {miss_away:+.1f}%)")
     except Exception as e:
         _log_warn_msg(f"⚠️ 진입미달 기록 오류: {e}")
@@ -28753,7 +31572,7 @@ def _track_escape_aftermath() -> list:
     """
     changes = []
     try:
-        data = _read_json_locked(SIGNAL_LOG_FILE) if os.path.exists(SIGNAL_LOG_FILE) else {}
+        data = _signal_log_read()
         if not isinstance(data, dict):
             return changes
         today = _now_kst().strftime("%Y%m%d")
@@ -28803,7 +31622,7 @@ def _track_escape_aftermath() -> list:
                 f"📊 상승이탈 후속: {name} 진입가 {entry:,}원 → 현재 {price:,}원 ({aftermath_pct:+.1f}%)"
             )
         if updated:
-            _write_json_atomic(SIGNAL_LOG_FILE, data, indent=2)
+            _signal_log_write(data)
         # entry_pullback_ratio 정밀 조정 데이터로 활용
         if changes:
             _refine_pullback_ratio_from_escape(data)
@@ -28858,7 +31677,8 @@ def _mark_entry_hit_in_signal_log(code: str, signal_type: str, hit_price: int |
     try:
         data = {}
         try:
-            data = _read_json_locked(SIGNAL_LOG_FILE)
+            # v177.36 #AY: 같은 종목 행만 인덱스 조회 → 변경 행만 upsert
+            data = _signal_log_query(code=code, keys=[log_key])
         except Exception as e:
             _swallow_exception(e)  # v105 structured silent-exception log
             return
@@ -28913,7 +31733,7 @@ def _mark_entry_hit_in_signal_log(code: str, signal_type: str, hit_price: int |
                 if extra.get("phase2_stop"):
                     rec["stop_loss"] = int(extra["phase2_stop"])
             data[target_key] = rec
-            _write_json_atomic(SIGNAL_LOG_FILE, data, indent=2)
+            _signal_log_write(data)
     except Exception as e:
         _log_warn_msg(f"⚠️ entry_hit 기록 오류: {e}")
 def _lookup_entry_hit_fallback(rec: dict | None) -> dict:
@@ -28924,7 +31744,7 @@ def _lookup_entry_hit_fallback(rec: dict | None) -> dict:
     signal_type = str(rec.get('signal_type') or '').strip()
     log_key = str(rec.get('log_key') or '').strip()
     try:
-        data = _read_json_locked(SIGNAL_LOG_FILE)
+        data = _signal_log_read()
         if isinstance(data, dict):
             target = None
             if log_key and isinstance(data.get(log_key), dict):
@@ -29080,7 +31900,7 @@ def _handle_entry_watch_expiry(log_key: str, watch: dict, expired: list) -> bool
             _log_info_msg(f"  🔧 진입가 비율 완화: {old_ratio:.2f}→{_dynamic['entry_pullback_ratio']:.2f} (미도달 {miss_count}회)")
     expired.append((log_key, "기간만료", _entry_watch_final_status(watch)))
     return True
-def _resolve_entry_watch_quote(watch: dict):
+def _resolve_entry_watch_quote(watch: dict, quotes: dict | None = None):
     code = watch["code"]
     krx_ok = is_market_open()
     nxt_ok = (not krx_ok) and is_nxt_open() and is_nxt_listed(code)
@@ -29089,10 +31909,17 @@ def _resolve_entry_watch_quote(watch: dict):
     reference_only = False
     reference_reason = ""
     if krx_ok:
-        cur = get_stock_price(code)
+        batch_quote = (quotes or {}).get(code)
+        if _entry_watch_batch_unchanged(code, batch_quote):
+            return None   # 직전 판단 이후 체결 변화 없음 — 재확인 주기 전까지 보류
+        if _entry_watch_needs_full_quote(watch, batch_quote):
+            cur = _resolve_full_quote_if_needed(code, batch_quote)
+        else:
+            cur = batch_quote   # 진입가 근접 전 — 정지·VI 는 주기 단건 확인 플래그(_full_quote_for_market_flags)로 판별
         price = cur.get("price", 0)
         if not price:
             return None
+        _note_entry_watch_full_quote(code, batch_quote)
         if _is_trading_halt(code, cur):
             _notify_trading_halt_cancel(watch, cur=cur)
             return {"expired": ("거래정지", _entry_watch_final_status(watch, "거래정지"))}
@@ -29320,12 +32147,12 @@ def _handle_entry_watch_reach_state(log_key: str, watch: dict, cur: dict, price:
     if _send_entry_phase_alert(watch, cur, price, entry, use_nxt=use_nxt, reach_via_recovery=reach_via_recovery):
         changed = True
     return changed
-def _process_entry_watch_item(log_key: str, watch: dict, expired: list) -> bool:
+def _process_entry_watch_item(log_key: str, watch: dict, expired: list, quotes: dict | None = None) -> bool:
     if _handle_entry_watch_expiry(log_key, watch, expired):
         return False
     changed = False
     try:
-        snapshot = _resolve_entry_watch_quote(watch)
+        snapshot = _resolve_entry_watch_quote(watch, quotes)
         if not snapshot:
             return changed
         if snapshot.get("expired"):
@@ -29402,12 +32229,23 @@ def _finalize_entry_watch_expired_items(expired: list) -> bool:
             _archive_entry_watch_record(k, watch, consume_reason=consume_reason, final_status=final_status or _entry_watch_final_status(watch))
             changed_active = True
     return changed_active
+@_with_kis_lane("critical")  # v177.20 #AI
 def check_entry_watch():
     if not _entry_watch:
         return
     expired: list[tuple[str, str, str]] = []
     changed_active = False
     _nxt_only_now = is_nxt_open() and not is_market_open()
+    # v177.16 #AE: KRX 장중 감시 종목 시세를 멀티시세로 선조회 (종목당 단건 REST 제거)
+    quotes = {}
+    if is_market_open():
+        try:
+            quotes = get_stock_prices_batch(
+                [w.get("code") for w in _entry_watch.values() if isinstance(w, dict)],
+                fallback_single=False,
+            )
+        except Exception as e:
+            _swallow_exception(e)
     for log_key, watch in list(_entry_watch.items()):
         # v165.15: NXT 전용 시간대에 KRX 전용 종목 watch 처리 스킵
         # market="NXT" 없으면 KRX 전용으로 판단 — _is_nxt_eligible 불안정 대신 필드 기준 사용
@@ -29415,7 +32253,7 @@ def check_entry_watch():
             _w_market = str(watch.get("market") or "").upper()
             if _w_market != "NXT":
                 continue  # KRX 전용 종목 스킵
-        changed_active |= _process_entry_watch_item(log_key, watch, expired)
+        changed_active |= _process_entry_watch_item(log_key, watch, expired, quotes)
     changed_active |= _finalize_entry_watch_expired_items(expired)
     if changed_active:
         _save_entry_watch_active()
@@ -29787,7 +32625,7 @@ def get_today_performance_summary() -> str:
     """signal_log 기준 당일 완료 성과를 한 줄로 요약."""
     try:
         today = datetime.now().strftime("%Y%m%d")
-        data = _read_json_locked(SIGNAL_LOG_FILE)
+        data = _signal_log_read()
         if not isinstance(data, dict):
             return ""
         done_today = [
@@ -29814,7 +32652,7 @@ def update_dashboard(force: bool = False) -> None:
     # 장 운영 시간에만 텔레그램 대시보드 갱신
     if not is_any_market_open():
         # v169.17: 장 마감/휴장 시에도 대시보드 JSON push (updated_at 타임스탬프 갱신)
-        threading.Thread(target=_push_dashboard_json, daemon=True).start()
+        _mark_dashboard_dirty()
         return
     # ensure MARKET_REGIME is populated; fall back to US signals if needed
     try:
@@ -29866,7 +32704,7 @@ def update_dashboard(force: bool = False) -> None:
         ws_conn = "🟢연결" if _ws_connected else "🔴미연결"
         with _ws_lock:
             ws_sub = len(_ws_subscribed_codes)
-        text += f"• WebSocket: {ws_conn} | 구독 {ws_sub}/{WS_MAX_SUBSCRIPTIONS}\n"
+        text += f"• WebSocket: {ws_conn} | 구독 {ws_sub}/{_ws_capacity()}\n"
     text += f"• 업데이트: {datetime.now().strftime('%m-%d %H:%M')}\n"
     # v39.4-#6: 내용 해시 비교 → 변동 없으면 스킵 (메시지량 감소)
     content_hash = hashlib.md5(f"{regime}{tracked_n}{perf}".encode()).hexdigest()[:8]
@@ -29902,7 +32740,7 @@ _WEB_DASHBOARD_RANK_FILE     = _state_path("web_dashboard_rank.json")       # v1
 _WEB_DASHBOARD_ALERTS: list  = []
 _WEB_DASHBOARD_LOCK          = threading.Lock()
 _WEB_DASHBOARD_LAST_PUSH: float = 0.0
-_WEB_DASHBOARD_THROTTLE_SEC  = 3.0
+_WEB_DASHBOARD_THROTTLE_SEC  = float(os.getenv("DASHBOARD_PUBLISH_WINDOW_SEC", "3.0") or "3.0")   # v177.35 #AX: 발행 병합 윈도우
 _WEB_DASHBOARD_PREMARKET_SECTORS: list = []  # v169.14: 장전/장마감 섹터 캐시
 # v173.0: SSE 실시간 푸시 — 연결된 브라우저 큐 목록
 _SSE_SUBSCRIBERS: list = []
@@ -29951,6 +32789,7 @@ def _save_premarket_sectors() -> None:
     except Exception:
         pass
 
+@_with_kis_lane("background")  # v177.20 #AI
 def _refresh_premarket_sectors() -> None:
     """장전/장마감 섹터를 _build_premarket_sector_snapshot()으로 갱신.
     API 결과가 없으면 _load_today_sector_results() 기반 fallback 사용."""
@@ -30095,7 +32934,7 @@ def _refresh_premarket_sectors() -> None:
         _WEB_DASHBOARD_PREMARKET_SECTORS = sectors_out
         _save_premarket_sectors()
         # JSON 즉시 갱신
-        threading.Thread(target=_push_dashboard_json, daemon=True).start()
+        _mark_dashboard_dirty()
     except Exception as e:
         _swallow_exception(e)
 
@@ -30155,11 +32994,61 @@ def _fmt_amt(v: int) -> str:
 
 def _get_snap(code: str) -> dict:
     """웹소켓 _execution_snapshots 에서 최신 틱 반환 — KIS API 추가호출 없음"""
-    buf = _execution_snapshots.get(code)
-    return buf[-1] if buf else {}
+    return _exec_snap_last(code)
+
+# ============================================================
+# 🧩 대시보드 단일 발행 스레드 (v177.35 #AX)
+# - 틱 배치·schedule 작업·실시간 루프·시작 시 갱신 요청은 _mark_dashboard_dirty() 로 통지만
+# - "KIS-Dashboard" 스레드가 통지를 모아 직전 발행 후 _WEB_DASHBOARD_THROTTLE_SEC 경과 시점에 1회 빌드
+#   → 요청마다 스레드 생성·throttle 탈락 반복 제거, 빌드는 항상 한 스레드에서 직렬 실행
+# ============================================================
+_dashboard_dirty = threading.Event()
+_dashboard_publisher_thread: threading.Thread | None = None
+_dashboard_publisher_lock = threading.Lock()
+_dashboard_publish_stats = {"marked": 0, "published": 0, "throttled": 0}
+
+
+def _mark_dashboard_dirty() -> None:
+    """대시보드 갱신 요청 (호출 스레드에서는 빌드하지 않음)."""
+    _dashboard_publish_stats["marked"] += 1
+    _dashboard_dirty.set()
+    if _dashboard_publisher_thread is None or not _dashboard_publisher_thread.is_alive():
+        _dashboard_publisher_start()
 
-def _push_dashboard_json() -> None:
-    """웹 대시보드 JSON 원자적 갱신 — 웹소켓 스냅샷 직접 사용"""
+
+def _dashboard_publisher_start() -> None:
+    global _dashboard_publisher_thread
+    with _dashboard_publisher_lock:
+        if _dashboard_publisher_thread and _dashboard_publisher_thread.is_alive():
+            return
+        _dashboard_publisher_thread = threading.Thread(target=_dashboard_publisher_loop, name="KIS-Dashboard", daemon=True)
+        _dashboard_publisher_thread.start()
+
+
+@_with_kis_lane("background")
+def _dashboard_publisher_loop() -> None:
+    while True:
+        _dashboard_dirty.wait()
+        # 윈도우 남은 시간 동안 들어온 통지는 이번 발행에 병합
+        remain = _WEB_DASHBOARD_LAST_PUSH + _WEB_DASHBOARD_THROTTLE_SEC - time.time()
+        if remain > 0:
+            time.sleep(remain)
+        _dashboard_dirty.clear()
+        try:
+            if _push_dashboard_json():
+                _dashboard_publish_stats["published"] += 1
+            else:
+                # throttle·생성 실패로 미발행 → 병합된 통지를 다음 윈도우에 다시 발행
+                _dashboard_publish_stats["throttled"] += 1
+                _dashboard_dirty.set()
+        except Exception as e:
+            _swallow_exception(e, "dashboard_publisher")
+
+
+@_with_kis_lane("background")  # v177.20 #AI
+def _push_dashboard_json() -> bool:
+    """웹 대시보드 JSON 원자적 갱신 — 웹소켓 스냅샷 직접 사용 (v177.35: _dashboard_publisher_loop 에서만 호출)
+    실제로 JSON을 교체했으면 True (throttle 차단·생성 실패는 False)."""
     global _WEB_DASHBOARD_LAST_PUSH
     now_ts = time.time()
     if now_ts - _WEB_DASHBOARD_LAST_PUSH < _WEB_DASHBOARD_THROTTLE_SEC:
@@ -30172,8 +33061,9 @@ def _push_dashboard_json() -> None:
                 _log_info_msg(f"⏸ dashboard JSON throttle 차단 (last_push={now_ts-_WEB_DASHBOARD_LAST_PUSH:.1f}s ago)")
         except Exception:
             pass
-        return
+        return False
     _WEB_DASHBOARD_LAST_PUSH = now_ts
+    pushed = False
     try:
         # ── 섹터 (장중=실시간, 장마감/휴장=장전 시나리오) v169.28 ──
         sectors_raw = []
@@ -30276,9 +33166,10 @@ def _push_dashboard_json() -> None:
 
                 # v172.0 [A]: 거래소 업종 보완 — 테마가 5개 미만일 때만 추가 (테마 우선 노출)
                 snap_by_sector: dict = {}
-                for _scode, _sbuf in list(_execution_snapshots.items()):
-                    if not _sbuf or not _scode or len(_scode) != 6: continue
-                    _snap = _sbuf[-1]
+                for _scode in list(_execution_snapshots.keys()):
+                    if not _scode or len(_scode) != 6: continue
+                    _snap = _exec_snap_last(_scode)
+                    if not _snap: continue
                     _sec_name = str(_snap.get("bstp_name") or "").strip()
                     if not _sec_name:
                         _sc = _sector_cache.get(_scode)
@@ -30360,9 +33251,9 @@ def _push_dashboard_json() -> None:
                 _SECTOR_EXCLUDE_PAT = ("ETF","ETN","선물","옵션","스팩","SPAC","수익증권","상장지수","관리종목","투자경고","투자위험","단기과열")
                 if not sectors_raw or not any(s["stocks"] for s in sectors_raw):
                     snap_groups: dict = {}
-                    for code, buf in list(_execution_snapshots.items()):
-                        if not buf: continue
-                        snap = buf[-1]
+                    for code in list(_execution_snapshots.keys()):
+                        snap = _exec_snap_last(code)
+                        if not snap: continue
                         sec_name = (_sector_cache.get(code) or {}).get("sector") or "기타"
                         if any(p in sec_name for p in _SECTOR_EXCLUDE_PAT): continue
                         _sn_name = _resolve_stock_name(code, "")
@@ -30400,7 +33291,7 @@ def _push_dashboard_json() -> None:
         _hit_time_idx: dict = {}
         _today_cap_str = _now_kst().strftime("%Y-%m-%d")
         try:
-            _slog = _read_json_locked(SIGNAL_LOG_FILE)
+            _slog = _signal_log_read()
             if isinstance(_slog, dict):
                 for _v in _slog.values():
                     if not isinstance(_v, dict): continue
@@ -30572,9 +33463,8 @@ def _push_dashboard_json() -> None:
             # KIS 등락률 응답은 vol/amt 없음 -> _execution_snapshots에서 보완
             for _row in rank_chg_out:
                 if _row["vol_raw"] == 0 or _row["amt_raw"] == 0:
-                    _sb = _execution_snapshots.get(_row["code"])
-                    if _sb:
-                        _sn = _sb[-1]
+                    _sn = _exec_snap_last(_row["code"])
+                    if _sn:
                         if _row["vol_raw"] == 0:
                             _row["vol_raw"] = safe_int(_sn.get("today_vol") or 0)
                             _row["vol"] = _fmt_vol(_row["vol_raw"]) if _row["vol_raw"] > 0 else "--"
@@ -30632,9 +33522,8 @@ def _push_dashboard_json() -> None:
             # HTS 응답에 chg/vol/amt 없으면 _execution_snapshots에서 보완
             for _row in rank_view_out:
                 if _row["chg"] == 0.0 or _row["vol_raw"] == 0 or _row["amt_raw"] == 0:
-                    _sb = _execution_snapshots.get(_row["code"])
-                    if _sb:
-                        _sn = _sb[-1]
+                    _sn = _exec_snap_last(_row["code"])
+                    if _sn:
                         if _row["chg"] == 0.0:
                             _row["chg"] = float(safe_float(_sn.get("change_rate") or 0, 0.0))
                         if _row["vol_raw"] == 0:
@@ -30712,6 +33601,7 @@ def _push_dashboard_json() -> None:
         with open(tmp,"w",encoding="utf-8") as f:
             json.dump(payload, f, ensure_ascii=False)
         os.replace(tmp, _WEB_DASHBOARD_JSON)
+        pushed = True
         # v173.0: SSE 전체 스냅샷 브로드캐스트 (섹터/포착/랭킹 갱신 시)
         try:
             if _SSE_SUBSCRIBERS:
@@ -30731,6 +33621,7 @@ def _push_dashboard_json() -> None:
             _swallow_exception(_de, "dashboard_debug_log")
     except Exception as e:
         _swallow_exception(e, "_push_dashboard_json:main_block")
+    return pushed
 
 
 # ── Flask 앱 ──────────────────────────────────────────────────
@@ -34036,6 +36927,12 @@ def _should_soft_allow_no_ask_liquidity_general(cur: dict, signal: dict | None =
         return False
     ask_qty = safe_int(cur.get("ask_qty", 0), 0)
     bid_qty = safe_int(cur.get("bid_qty", 0), 0)
+    # v177.33 #AV: 실시간 호가 스트림 수신 중이면 시세 조회 시점 1호가 대신 최신 1호가 잔량 사용
+    if str(signal.get("market") or "") != "NXT":
+        live_book = get_ws_orderbook_snapshot(signal.get("code") or cur.get("code") or "")
+        if live_book:
+            ask_qty = live_book["ask_qty1"]
+            bid_qty = live_book["bid_qty1"]
     # v169.6: ask_qty > 0이어도 A급 85점↑ +10%↑ SURGE는 통과
     # 이유: 급등 중 호가 얇지만 완전 0이 아닌 경우 이후 조건 전체 차단됨
     #       KBI메탈+22%/해성옵틱스+18.7%/제룡산업+15% 등 A급 고점수 종목 전부 차단 발생
@@ -34142,7 +37039,7 @@ def _has_recent_actionable_tracking_state(code: str, max_age_minutes: int = 240)
     except Exception as e:
         _swallow_exception(e)
     try:
-        sig_data = _read_json_locked(SIGNAL_LOG_FILE) if os.path.exists(SIGNAL_LOG_FILE) else {}
+        sig_data = _signal_log_read()
     except Exception as e:
         _swallow_exception(e)  # v105 structured silent-exception log
         sig_data = {}
@@ -34269,6 +37166,11 @@ def _is_signal_nxt_premarket_hint(signal: dict | None = None) -> bool:
     return False
 def _signal_bid_ask_ratio_hint(signal: dict | None = None) -> float:
     signal = signal if isinstance(signal, dict) else {}
+    # v177.33 #AV: 실시간 호가 스트림 수신 중이면 신호 시점 값 대신 현재 잔량 비율
+    if str(signal.get("market") or "") != "NXT":
+        live_book = get_ws_orderbook_snapshot(signal.get("code") or "")
+        if live_book:
+            return live_book["bid_ask_ratio"]
     exec_m = signal.get("execution_metrics") or {}
     candidates = [
         safe_float(signal.get("bid_ask_ratio", 0.0), 0.0),
@@ -35491,7 +38393,7 @@ def _prune_trading_halt_state(state: dict | None) -> dict:
     return {"active": pruned}
 def _save_trading_halt_state() -> None:
     try:
-        _write_state_json(TRADING_HALT_STATE_FILE, _prune_trading_halt_state(_trading_halt_state))
+        _mark_state_dirty(TRADING_HALT_STATE_FILE, lambda: _prune_trading_halt_state(_trading_halt_state), backup=False)
     except Exception as e:
         _swallow_exception(e)
 def _load_trading_halt_state() -> None:
@@ -36313,7 +39215,7 @@ def _collect_geo_sector_history_stats(sector_name: str, stock_list: list, direct
         "recent": [],
     }
     try:
-        data = _read_json_locked(SIGNAL_LOG_FILE)
+        data = _signal_log_read()
     except Exception as e:
         _swallow_exception(e)  # v105 structured silent-exception log
         return dict(default)
@@ -38693,6 +41595,16 @@ def _send_telegram_status_summary():
         f"({_early_feedback.get('rate', 0) * 100:.0f}%)"
     ) if _early_feedback.get("total", 0) >= 5 else ""
     nxt_str = f"\n🟡 NXT: {'운영 중' if is_nxt_open() else '마감'}"
+    # v177.19 #AH: KIS TR 캐시 적중률
+    try:
+        _cs = get_kis_tr_cache_stats()
+        nxt_str += f"\n🗄 KIS 캐시: {_cs['hit']}/{_cs['hit'] + _cs['miss']} 적중 ({_cs['hit_rate'] * 100:.0f}%)"
+        # v177.20 #AI: 레인별 누적 대기
+        _ls = get_kis_lane_stats()
+        nxt_str += "\n🚦 KIS 대기: " + " / ".join(f"{ln} {v['wait_sec']:.1f}s" for ln, v in _ls.items())
+        nxt_str += f"\n📶 KIS 한도: {_kis_effective_rest_limit()}/s (제한응답 {_kis_aimd_state['throttle_events']}회)"
+    except Exception as e:
+        _swallow_exception(e)
     send(
         f"🤖 <b>봇 상태</b>  {BOT_VERSION}  {'⏸ 일시정지' if _bot_paused else '▶️ 실행 중'}\n"
         f"🕐 {datetime.now().strftime('%H:%M:%S')}  📅 {BOT_DATE}\n"
@@ -39187,6 +42099,7 @@ def _handle_telegram_compact_toggle():
     send(mode_str)
 def _handle_download_signal_log_command():
     """signal_log.json 파일을 텔레그램으로 전송"""
+    _signal_log_export_json(force=True)   # v177.36 #AY: SQLite → JSON 내보내기 후 전송
     if not os.path.exists(SIGNAL_LOG_FILE):
         send("❌ <b>signal_log.json 없음</b>\n아직 신호가 기록되지 않았습니다.")
         return
@@ -39252,7 +42165,7 @@ def _handle_telegram_nxt_command():
         send(f"⚠️ NXT 조회 오류: {e}")
 def _handle_telegram_week_command():
     try:
-        data = _read_json_locked(SIGNAL_LOG_FILE)
+        data = _signal_log_read()
         today = datetime.now()
         this_mon = (today - timedelta(days=today.weekday())).strftime("%Y%m%d")
         this_fri = today.strftime("%Y%m%d")
@@ -39295,7 +42208,7 @@ def _handle_telegram_week_command():
         send(f"⚠️ 주간 조회 오류: {e}")
 def _handle_telegram_daily_command():
     try:
-        data = _read_json_locked(SIGNAL_LOG_FILE)
+        data = _signal_log_read()
         today = datetime.now().strftime("%Y%m%d")
         today_str = datetime.now().strftime("%m/%d")
         sig_labels = {
@@ -39654,7 +42567,7 @@ def _handle_entry_confirm_command(raw: str):
                  "예) /진입 대주산업 15300"); return
         data = {}
         try:
-            data = _read_json_locked(SIGNAL_LOG_FILE)
+            data = _signal_log_read()
         except Exception as e:
             _swallow_exception(e)
         matched = []
@@ -39680,7 +42593,7 @@ def _handle_entry_confirm_command(raw: str):
             diff_ratio = actual_price / rec["entry_price"] if rec.get("entry_price") else 1
             rec["stop_price"]    = int(rec.get("stop_price",  0) * diff_ratio / 10) * 10
             rec["target_price"]  = int(rec.get("target_price", 0) * diff_ratio / 10) * 10
-        _write_json_atomic(SIGNAL_LOG_FILE, data, indent=2)
+        _signal_log_write(data)
         entry_p  = actual_price or rec.get("entry_price", 0)
         stop_p   = rec.get("stop_price", 0)
         target_p = rec.get("target_price", 0)
@@ -39717,7 +42630,7 @@ def _handle_skip_command(raw: str):
                  "이유 예시: 시간없음 / 조건불일치 / 이미상승 / 분산투자 / 기타"); return
         data = {}
         try:
-            data = _read_json_locked(SIGNAL_LOG_FILE)
+            data = _signal_log_read()
         except Exception as e:
             _swallow_exception(e)
         matched_key  = None
@@ -39734,7 +42647,7 @@ def _handle_skip_command(raw: str):
         data[matched_key]["actual_entry"]  = False
         data[matched_key]["skip_reason"]   = reason
         data[matched_key]["actual_pnl"]    = None
-        _write_json_atomic(SIGNAL_LOG_FILE, data, indent=2)
+        _signal_log_write(data)
         theo_pnl = data[matched_key].get("pnl_pct", 0)
         theo_str = f"+{theo_pnl:.1f}%" if theo_pnl >= 0 else f"{theo_pnl:.1f}%"
         send(
@@ -39761,7 +42674,7 @@ def _build_result_status_bundle(pnl: float) -> dict:
     }
 def _load_result_signal_data() -> dict:
     try:
-        data = _read_json_locked(SIGNAL_LOG_FILE)
+        data = _signal_log_read()
         return data if isinstance(data, dict) else {}
     except Exception as e:
         _swallow_exception(e)
@@ -39800,7 +42713,7 @@ def _apply_result_signal_update(sig_data: dict, sig_matched_key: str, pnl: float
     rec["actual_pnl"] = pnl
     rec["actual_exit_date"] = status_bundle["today"]
     rec["skip_reason"] = ""
-    _write_json_atomic(SIGNAL_LOG_FILE, sig_data, indent=2)
+    _signal_log_write(sig_data)
 def _load_result_early_data() -> dict:
     try:
         data = _read_json_safe(EARLY_LOG_FILE, {}) or {}
@@ -39879,7 +42792,7 @@ def _handle_result_command(raw: str):
         elif not sig_matched_key:
             new_key, new_record = _build_manual_result_record(name_input, pnl, status_bundle)
             sig_data[new_key] = new_record
-            _write_json_atomic(SIGNAL_LOG_FILE, sig_data, indent=2)
+            _signal_log_write(sig_data)
             matched_name = name_input
         display_name = matched_name or name_input
         _send_result_record_message(display_name, pnl, signal_type, status_bundle)
@@ -40012,7 +42925,7 @@ def get_missed_profit_summary() -> dict:
     try:
         data = {}
         try:
-            data = _read_json_locked(SIGNAL_LOG_FILE)
+            data = _signal_log_read()
         except Exception as e:
             _swallow_exception(e)
         missed = [v for v in data.values()
@@ -40312,7 +43225,7 @@ def _roll_market_close_detected_stocks() -> list:
         carry_list.append(f"• {info['name']} ({code}) - {carry_day + 1}일차")
     return carry_list
 def _load_market_close_signal_state(today: str) -> tuple[dict, list, list, list, dict]:
-    data = _read_json_locked(SIGNAL_LOG_FILE)
+    data = _signal_log_read()
     today_recs = [v for v in data.values() if v.get("detect_date") == today]
     done_today = [v for v in today_recs if v.get("status") != "추적중"]
     all_tracking = _get_valid_tracking(data)
@@ -40586,7 +43499,7 @@ def _append_premarket_geo_lines(msg: str, geo_state: dict, overnight_lines: list
     return msg
 def _append_premarket_tracking_lines(msg: str, level: str) -> str:
     try:
-        data = _read_json_locked(SIGNAL_LOG_FILE)
+        data = _signal_log_read()
         tracking = _get_valid_tracking(data)
         if tracking and level in ("경계", "위험"):
             msg += f"\n⚠️ <b>추적 중 {len(tracking)}건 — 진입가 도달 종목 주의</b>\n"
@@ -41311,10 +44224,11 @@ def _build_realtime_sectors_from_kis() -> None:
         _swallow_exception(e, "_build_realtime_sectors_from_kis")
 
 
+@_with_kis_lane("background")  # v177.20 #AI
 def _dashboard_realtime_loop() -> None:
     """v174.0: 대시보드 실시간 갱신 루프 (알람과 완전 독립).
 
-    - 10초마다 _push_dashboard_json() → 종목 시세/포착/랭킹 즉시 반영 + SSE push
+    - 10초마다 _mark_dashboard_dirty() → 발행 스레드가 종목 시세/포착/랭킹 반영 + SSE push (v177.35 #AX)
     - 60초마다 _build_realtime_sectors_from_kis() → KIS 등락률 → 섹터 재산출
     - 장 마감 시 30초 sleep (KIS quota 절약)
     """
@@ -41336,11 +44250,8 @@ def _dashboard_realtime_loop() -> None:
                 except Exception as _be:
                     _swallow_exception(_be, "rt_loop:sector_build")
                     _last_sector_build = now  # 실패해도 다음 사이클까지 대기
-            # 10초마다 대시보드 JSON 갱신 + SSE push
-            try:
-                _push_dashboard_json()
-            except Exception as _pe:
-                _swallow_exception(_pe, "rt_loop:push")
+            # 10초마다 대시보드 JSON 갱신 + SSE push (v177.35 #AX: 발행 스레드에 통지)
+            _mark_dashboard_dirty()
         except Exception as e:
             _swallow_exception(e, "_dashboard_realtime_loop")
         time.sleep(_PUSH_INTERVAL)
@@ -41564,7 +44475,7 @@ def _build_premarket_watch_sections() -> str:
     try:
         data = {}
         try:
-            data = _read_json_locked(SIGNAL_LOG_FILE)
+            data = _signal_log_read()
         except Exception as e:
             _swallow_exception(e)
         yesterday = (datetime.now() - timedelta(days=1)).strftime("%Y%m%d")
@@ -41688,7 +44599,7 @@ def send_premarket_briefing():
     send("".join(parts))
 def _load_weekly_report_records(this_mon: str, this_fri: str) -> tuple[dict, list[dict]]:
     try:
-        data = _read_json_locked(SIGNAL_LOG_FILE)
+        data = _signal_log_read()
     except Exception as e:
         _swallow_exception(e)
         return {}, []
@@ -42935,7 +45846,7 @@ def calc_position_size(signal_type: str, score: int, grade: str) -> dict:
         # 과거 신호 유형별 승률 조회
         data = {}
         try:
-            data = _read_json_locked(SIGNAL_LOG_FILE)
+            data = _signal_log_read()
         except Exception as e:
             _swallow_exception(e)
         same_type = [v for v in data.values()
@@ -43142,7 +46053,7 @@ def _get_carry_position_context() -> tuple[int, set[str]]:
     #       _detected_stocks fallback으로 빠져 stale 23~24개가 보유로 오카운트되어
     #       모든 신규 포착이 position_limit에 막히는 치명적 병목이었음.
     try:
-        siglog_data = _read_json_safe(SIGNAL_LOG_FILE, {})
+        siglog_data = _signal_log_read()
     except Exception as e:
         _swallow_exception(e)  # v105 structured silent-exception log
         siglog_data = {}
@@ -43859,12 +46770,18 @@ def _scan_issue_prewatch_candidates(alerts: list, seen: set) -> None:
 
 def _scan_krx_market_candidates(alerts: list, seen: set) -> None:
     today_date = datetime.now().strftime("%Y%m%d")
+    # v177.17 #AF: 랭킹 소스 6종을 KIS 워커 풀로 동시 조회 (소비 순서는 기존과 동일)
     # v167.0: 상한가 포착 API → _upper_limit_alerted_today 자동 갱신 (장중에만)
-    try:
-        get_capture_uplowprice(prc_cls="0")
-    except Exception as _cue:
-        _swallow_exception(_cue)
-    for stock in get_upper_limit_stocks():
+    (_cap_items, upper_items, surge_items, power_items,
+     near_high_items, fluct_items) = _kis_gather_calls([
+        (get_capture_uplowprice, "0"),
+        (get_upper_limit_stocks,),
+        (get_volume_surge_stocks,),
+        (get_volume_power_rank, "J"),
+        (get_near_new_highlow_rank, True),
+        (get_fluctuation_rank, "J", "0"),
+    ])
+    for stock in upper_items or []:
         code = normalize_stock_code(stock.get("code", ""))
         if not code:
             _log_warn_msg("⚠️ run_scan upper_limit 후보 code 누락 스킵")
@@ -43885,7 +46802,7 @@ def _scan_krx_market_candidates(alerts: list, seen: set) -> None:
         if isinstance(r, dict) and r.get("signal_type") in ("UPPER_LIMIT", "NEAR_UPPER") and result_code:
             _upper_limit_day_alerted[result_code] = {"date": today_date, "alerted": True}
         _append_scan_alert(alerts, seen, r, seen_code=code)
-    for stock in get_volume_surge_stocks():
+    for stock in surge_items or []:
         code = normalize_stock_code(stock.get("code", ""))
         if not code:
             _log_warn_msg("⚠️ run_scan volume_surge 후보 code 누락 스킵")
@@ -43905,7 +46822,7 @@ def _scan_krx_market_candidates(alerts: list, seen: set) -> None:
         _append_scan_alert(alerts, seen, analyze(stock), seen_code=code)
     # v167.0: 체결강도 상위 소스 추가 — 거래량 기준 누락 급등 종목 보완
     try:
-        for stock in get_volume_power_rank("J"):
+        for stock in power_items or []:
             code = normalize_stock_code(stock.get("code", ""))
             if not code or code in seen:
                 continue
@@ -43922,7 +46839,7 @@ def _scan_krx_market_candidates(alerts: list, seen: set) -> None:
         _swallow_exception(_vpe)
     # v167.0: 신고가 근접 소스 추가 — 52주 신고가 5% 이내 돌파 후보
     try:
-        for stock in get_near_new_highlow_rank(high=True):
+        for stock in near_high_items or []:
             code = normalize_stock_code(stock.get("code", ""))
             if not code or code in seen:
                 continue
@@ -43937,7 +46854,7 @@ def _scan_krx_market_candidates(alerts: list, seen: set) -> None:
         _swallow_exception(_nhe)
     # v167.0: 등락률 순위 소스 추가 — 거래량 기준 미포착 등락률 상위 보완
     try:
-        for stock in get_fluctuation_rank("J", "0"):
+        for stock in fluct_items or []:
             code = normalize_stock_code(stock.get("code", ""))
             if not code or code in seen:
                 continue
@@ -43959,11 +46876,14 @@ def _scan_nxt_market_candidates(alerts: list, seen: set) -> None:
     overtime_items: list = []
     if nxt_only_window:
         try:
-            ot_fluct = get_overtime_fluctuation_rank()
-            ot_vol   = get_overtime_volume_rank()
-            # v169.0: NXT 시간대 체결강도·신고가 소스 추가
-            ot_power = get_volume_power_rank("Q")   # Q=NXT 시장코드
-            ot_high  = get_near_new_highlow_rank(high=True)
+            # v177.17 #AF: overtime 소스 4종 동시 조회
+            # v169.0: NXT 시간대 체결강도·신고가 소스 추가 (Q=NXT 시장코드)
+            ot_fluct, ot_vol, ot_power, ot_high = _kis_gather_calls([
+                (get_overtime_fluctuation_rank,),
+                (get_overtime_volume_rank,),
+                (get_volume_power_rank, "Q"),
+                (get_near_new_highlow_rank, True),
+            ])
             seen_ot  = set()
             for it in ot_fluct + ot_vol + ot_power + ot_high:
                 c = normalize_stock_code(it.get("code", ""))
@@ -44159,7 +47079,7 @@ def _detect_fzone_vwap_bounce(code: str) -> dict | None:
     if not krx_open and nxt_open and now.time() >= dtime(19, 40):
         return None
     # WS 스냅샷 확인 — v165.18 [#3]: buf<5 → buf<2 완화 (F존 12종목 알람 0건 해소)
-    buf = list((_execution_snapshots.get(code) or []))
+    buf = _exec_snap_rows(code)
     if len(buf) < 2:
         return None
     recent = buf[-1]
@@ -44671,6 +47591,7 @@ def run_scan():
     finally:
         _run_scan_global_lock.release()
 
+@_with_kis_lane("scan")  # v177.20 #AI
 def _run_scan_body():
     code = ""
     ctx = _build_scan_runtime_context()
@@ -44753,11 +47674,23 @@ def _get_code_hash() -> str:
         _swallow_exception(e)  # v105 structured silent-exception log
         return "unknown"
 if __name__ == "__main__":
+    if "--bench-ws-parser" in sys.argv:   # v177.30 #AS: H0STCNT0 파서 마이크로 벤치마크
+        print(json.dumps(_ws_parser_benchmark(), ensure_ascii=False))
+        sys.exit(0)
+    if "--replay-ticks" in sys.argv:      # v177.34 #AW: 틱 저널 오프라인 재생
+        _i = sys.argv.index("--replay-ticks")
+        _day = sys.argv[_i + 1] if len(sys.argv) > _i + 1 else ""
+        _speed = float(sys.argv[sys.argv.index("--speed") + 1]) if "--speed" in sys.argv else 0.0
+        _res = replay_tick_journal(_day or None, speed=_speed)
+        _res["codes"] = len(_execution_snapshots)
+        print(json.dumps(_res, ensure_ascii=False))
+        sys.exit(0)
     _log_info_msg("="*55)
     _log_info_msg(f"📈 KIS 주식 급등 알림 봇 {BOT_VERSION} 시작")
     _log_info_msg(f"   업데이트: {BOT_DATE}")
     _log_info_msg("="*55)
     install_excepthook()
+    _install_state_flush_handlers()  # v177.38 #BA: 종료 시 지연 상태 기록
     _load_dashboard_alerts()  # v169.12: 반드시 update_dashboard 전에 로드
     _load_premarket_sectors() # v169.14: 장전 섹터 캐시 복원
     # v176.0: VI 영속 데이터 복원 (vi_history.json + vi_learning.json + vi_release_watch.json)
@@ -44770,7 +47703,7 @@ if __name__ == "__main__":
         threading.Thread(target=_refresh_premarket_sectors, daemon=True).start()
     update_dashboard(force=True)
     # update_dashboard → send() → 훅 실행 후 push 한 번 더 보장
-    threading.Thread(target=_push_dashboard_json, daemon=True).start()
+    _mark_dashboard_dirty()
     # v174.0: 대시보드 실시간 루프 시작 (10초 push, 60초 섹터 재산출 — 알람과 독립)
     threading.Thread(target=_dashboard_realtime_loop, daemon=True).start()
     # v176.0: VI 자율 모니터링 데몬 시작 (30초 주기, 분기 A~F 자동 라우팅)
@@ -44840,7 +47773,7 @@ if __name__ == "__main__":
         schedule.every(30).minutes.do(_leader_job(run_overnight_monitor))
         schedule.every(60).minutes.do(_leader_job(run_geo_news_scan))
         # v169.17: 대기모드 대시보드 갱신 + 섹터 업데이트 + 미국시장 자동 알람
-        schedule.every(5).minutes.do(lambda: threading.Thread(target=_push_dashboard_json, daemon=True).start())
+        schedule.every(5).minutes.do(_mark_dashboard_dirty)
         schedule.every(120).minutes.do(_leader_job(_refresh_premarket_sectors))
         schedule.every(180).minutes.do(_leader_job(_auto_push_us_market_info))
         threading.Thread(target=_refresh_premarket_sectors, daemon=True).start()
@@ -44893,6 +47826,7 @@ if __name__ == "__main__":
     schedule.every(5).minutes.do(_leader_job(lambda: send_market_leading_sector_update(force=False)))
     # INFO 참고 알림은 사용자 발송하지 않음
     schedule.every(30).minutes.do(clean_expired_cache)  # [v41.84]
+    schedule.every(SIGNAL_LOG_EXPORT_MIN).minutes.do(_signal_log_export_json)  # v177.36 #AY: signal_log.json 백업 내보내기
     schedule.every().day.at("05:00").do(reset_daily_caches)  # [v41.84]
     schedule.every(30).minutes.do(_leader_job(_prune_all_caches))
     schedule.every().day.at("07:30").do(_send_preopen_watchlist_once)  # v37.9: 익개장 전 워치리스트 요약
@@ -44934,7 +47868,7 @@ if __name__ == "__main__":
         ))
     schedule.every(10).minutes.do(_leader_job(lambda: update_dashboard(force=False)))
     # v170.1 [#1]: 장중 대시보드 1분 주기 독립 갱신 — run_scan 블로킹과 무관하게 섹터/순위/포착 실시간 반영
-    schedule.every(1).minutes.do(lambda: threading.Thread(target=_push_dashboard_json, daemon=True).start() if is_any_market_open() else None)
+    schedule.every(1).minutes.do(lambda: _mark_dashboard_dirty() if is_any_market_open() else None)
     schedule.every(10).minutes.do(_leader_job(run_major_investor_sector_scan))  # v165.35: 메이저 수급 섹터 흐름
     schedule.every(15).minutes.do(_leader_job(run_intraday_watchdog))  # v83: 장중 워치독
     schedule.every(15).minutes.do(_leader_job(_run_pullback_wait_monitor))  # v165.23: 눌림 대기 감시
@@ -44981,7 +47915,7 @@ if __name__ == "__main__":
     schedule.every(30).minutes.do(_leader_job(run_overnight_monitor))
     schedule.every(60).minutes.do(_leader_job(run_geo_news_scan))
     # v169.17: 대시보드 갱신 + 섹터 업데이트 + 미국시장 자동 알람
-    schedule.every(5).minutes.do(lambda: threading.Thread(target=_push_dashboard_json, daemon=True).start())
+    schedule.every(5).minutes.do(_mark_dashboard_dirty)
     schedule.every(120).minutes.do(_leader_job(_refresh_premarket_sectors))
     schedule.every(180).minutes.do(_leader_job(_auto_push_us_market_info))
     threading.Thread(target=_refresh_premarket_sectors, daemon=True).start()